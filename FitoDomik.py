@@ -1,20 +1,33 @@
 import sys
+if __name__ == "__main__" and "--headless" in sys.argv:
+    from farm_daemon import main
+    sys.exit(main(sys.argv[1:]))
 import os
-import time
-import threading
 import serial
-import cv2
-import numpy as np
-import requests
 import json
-from datetime import datetime
+import threading
+import importlib
+from datetime import datetime, timedelta
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QLabel, QLineEdit, QPushButton, 
                             QTabWidget, QGridLayout, QFormLayout, QGroupBox, 
                             QTextEdit, QSpinBox, QDoubleSpinBox, QComboBox,
-                            QProgressBar, QFrame, QFileDialog, QMessageBox)
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal, pyqtSlot, QThread
+                            QProgressBar, QFrame, QFileDialog, QMessageBox, QCheckBox, QTableView, QHeaderView)
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal, pyqtSlot, QThread, QObject, QAbstractListModel, QModelIndex
 from PyQt6.QtGui import QPixmap, QImage, QFont, QIcon
+from sensor_protocol import UPLOAD_MODES, UPLOAD_SUMMARY
+from serial_io import SerialPortActor
+from sensor_store import SensorStore
+from sensor_ingest import SensorIngest
+from farm_api import FarmApiClient, UPLOAD_ENDPOINT, BREAKER_OPEN, BREAKER_HALF_OPEN
+from network_engine import NetworkEngine
+from device_control import DeviceController
+from automation import AutomationEngine, DeviceStates
+from camera import CameraManager, WARMUP_FRAMES
+from photo_pipeline import PhotoPipeline, PHOTO_SCHEDULED, PHOTO_MANUAL
+from farm_photos import PhotoSchedule, FarmPhotographer
+from journal import Journal
+from photo_settings import parse_roi, format_roi, ANALYSIS_SIZES, JPEG_QUALITY
 def get_resource_path(relative_path):
     """Get absolute path to resource, works for dev and for PyInstaller"""
     try:
@@ -23,558 +36,121 @@ def get_resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 CONFIG_FILE = os.path.join(os.path.expanduser("~"), "fitodomik_config.json")
+SENSOR_DB_FILE = os.path.join(os.path.expanduser("~"), "fitodomik_sensors.db")
 ICON_FILE = get_resource_path("67fb70c98d5b2.ico")
 LOCAL_PATH = os.path.join(os.path.expanduser("~"), "FitoDomik_photos")
 API_TOKEN = ''  
 CAMERA_INDEX = 0
-SERVER_URL = "http://farm429.online/api/upload-image.php"
-SENSOR_API_URL = "http://farm429.online/api/save-sensor-data.php"
-LED_API_URL = "http://farm429.online/api/get-lamp-state.php"
-CURTAINS_API_URL = "http://farm429.online/api/get-curtains-state.php"
-THRESHOLDS_API_URL = "http://farm429.online/api/get-thresholds.php"
-MAX_ID_API_URL = "http://farm429.online/api/get-max-sensor-id.php"
 SERIAL_PORT = 'COM10'
 BAUD_RATE = 9600
+PROTOCOL_MODE = "text"
+BINARY_BAUD_RATE = 115200
+UPLOAD_MODE = UPLOAD_SUMMARY
+AUTOMATION_ENABLED = False
 SAVE_LOCAL = True
 OUTPUT_PATH = "plant_analysis.jpg"
 FONT_PATH = get_resource_path("arial.ttf")
 THRESHOLDS_PRINT_INTERVAL = 60
+HARDWARE_PROBE_DELAY = 300
+JOURNAL_FLUSH_INTERVAL = 250
+DEVICE_LABELS = {"LED": ("Лампа", "лампой", ("выключена", "включена")), "CURTAINS": ("Шторы", "шторами", ("открыты", "закрыты"))}
 if SAVE_LOCAL and not os.path.exists(LOCAL_PATH):
     os.makedirs(LOCAL_PATH)
+API_CLIENT = FarmApiClient(API_TOKEN)
 last_temperature = 0.0
 last_humidity = 0.0
 last_soil_moisture = 0.0
 last_light_level = 0.0
 last_co2 = 400.0
 last_pressure = 1013.25  
-last_led_state = None
-last_curtains_state = None
-last_thresholds = None
 last_thresholds_print_time = 0
 auth_error_occurred = False
-last_used_id = 0  
 class SensorMonitoringThread(QThread):
+    """Поток Qt вокруг SensorIngest: переносит последние показания в общие переменные интерфейса и передает события сигналами"""
     update_signal = pyqtSignal()
     log_signal = pyqtSignal(str)
-    def __init__(self, serial_connection, interval=60):
+    def __init__(self, serial_actor, interval=60, store=None, upload_mode=UPLOAD_MODE, engine=None, automation=None, device_states=None):
         super().__init__()
-        self.serial_connection = serial_connection
-        self.interval = interval
-        self.running = False
-        self.first_data_collected = False
-        self.last_send_time = 0
+        self.ingest = SensorIngest(serial_actor, API_CLIENT, SENSOR_DB_FILE, interval, store, upload_mode, engine, automation,
+                                   device_states=device_states,
+                                   on_update=self.publish, log=self.log_signal.emit)
+    @property
+    def running(self):
+        return self.ingest.running
+    @running.setter
+    def running(self, value):
+        self.ingest.running = value
     def run(self):
-        global last_temperature, last_humidity, last_soil_moisture, last_light_level, last_co2, last_pressure
-        global last_led_state, last_curtains_state, last_used_id
-        last_temperature = -1
-        last_humidity = -1
-        last_soil_moisture = -1
-        last_light_level = -1
-        last_co2 = 400
-        last_pressure = 1013.25
-        self.running = True
-        self.log_signal.emit("🧵 Запущен поток мониторинга датчиков")
-        while self.running:
-            try:
-                if self.serial_connection.in_waiting:
-                    line = self.serial_connection.readline().decode('utf-8', errors='replace').strip()
-                    if not line:
-                        continue
-                    if line.startswith("LED:") or line.startswith("CURTAINS:"):
-                        continue
-                    all_data_received = self.update_sensor_values(line)
-                    if not self.first_data_collected:
-                        if self.check_all_sensors_ready():
-                            self.first_data_collected = True
-                            self.log_signal.emit("✅ Получены первые данные со всех датчиков")
-                    self.update_signal.emit()
-                    current_time = time.time()
-                    if self.first_data_collected and (current_time - self.last_send_time >= self.interval):
-                        if self.save_to_server():
-                            self.last_send_time = current_time
-                time.sleep(0.1)
-            except serial.SerialException as e:
-                self.log_signal.emit(f"❌ Ошибка последовательного порта: {str(e)}")
-                time.sleep(1)
-            except Exception as e:
-                self.log_signal.emit(f"❌ Ошибка в потоке мониторинга: {str(e)}")
-                time.sleep(1)
+        self.ingest.run()
     def stop(self):
         self.running = False
         self.wait()
-    def update_sensor_values(self, line):
+    def publish(self):
         global last_temperature, last_humidity, last_soil_moisture, last_light_level, last_co2, last_pressure
-        try:
-            import re
-            temp_match = re.search(r'[Tt]emp(?:erature)?\s*:\s*(\d+\.?\d*)', line)
-            if temp_match:
-                last_temperature = float(temp_match.group(1))
-            humidity_match = re.search(r'[Hh]umidity\s*:\s*(\d+\.?\d*)', line)
-            if humidity_match:
-                last_humidity = float(humidity_match.group(1))
-            soil_match = re.search(r'[Ss]oil\s*moisture\s*:\s*(\d+\.?\d*)', line)
-            if soil_match:
-                last_soil_moisture = float(soil_match.group(1))
-            light_match = re.search(r'[Ll]ight\s*level\s*:\s*(\d+\.?\d*)', line)
-            if light_match:
-                last_light_level = float(light_match.group(1))
-            co2_match = re.search(r'[Cc][Oo]2\s*:\s*(\d+\.?\d*)', line)
-            if co2_match:
-                last_co2 = float(co2_match.group(1))
-            pressure_match = re.search(r'[Pp]ressure\s*:\s*(\d+\.?\d*)', line)
-            if pressure_match:
-                last_pressure = float(pressure_match.group(1))
-            self.log_signal.emit(f"📊 Получены данные: {line}")
-            return (last_temperature > 0 and 
-                    last_humidity > 0 and 
-                    last_soil_moisture >= 0 and 
-                    last_light_level >= 0)
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка при обработке данных датчиков: {str(e)}")
-            return False
-    def check_all_sensors_ready(self):
-        global last_temperature, last_humidity, last_soil_moisture, last_light_level
-        return (last_temperature > 0 and 
-                last_humidity > 0 and 
-                last_soil_moisture >= 0 and 
-                last_light_level >= 0)
-    def save_to_server(self):
-        global last_temperature, last_humidity, last_soil_moisture, last_light_level, last_co2, last_pressure
-        global last_led_state, last_curtains_state, last_used_id, API_TOKEN
-        try:
-            if last_temperature == 0 or last_humidity == 0:
-                return False
-            max_id = self.get_max_sensor_id()
-            next_id = max(max_id + 1, last_used_id + 1)
-            self.log_signal.emit(f"Используем ID {next_id} для новой записи (предыдущий макс. ID: {max_id})")
-            post_data = {
-                'id': next_id,  
-                'user_id': 1,
-                'temperature': float(last_temperature),
-                'humidity': float(last_humidity),
-                'soil_moisture': float(last_soil_moisture),
-                'light_level': float(last_light_level),
-                'co2': int(last_co2),
-                'pressure': float(last_pressure),
-                'lamp_state': int(last_led_state) if last_led_state is not None else 0,
-                'curtains_state': int(last_curtains_state) if last_curtains_state is not None else 0
-            }
-            headers = {
-                'Content-Type': 'application/x-www-form-urlencoded',
-                'X-Auth-Token': API_TOKEN
-            }
-            response = requests.post(SENSOR_API_URL, data=post_data, headers=headers)
-            if response.status_code == 200:
-                try:
-                    resp_data = response.json()
-                    if resp_data.get('success'):
-                        last_used_id = next_id  
-                        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        log_message = f"📅 {current_time}\n"
-                        log_message += "────────────────────────────────────\n"
-                        log_message += f"🆔 ID записи:              {next_id}\n"
-                        log_message += f"🌡️ Температура воздуха:    {post_data['temperature']:.1f}°C\n"
-                        log_message += f"💧 Влажность воздуха:      {post_data['humidity']:.1f}%\n"
-                        log_message += f"🌱 Влажность почвы:        {post_data['soil_moisture']:.1f}%\n"
-                        log_message += f"🔆 Уровень освещенности:   {post_data['light_level']:.2f} lx\n"
-                        log_message += f"🫧 CO₂ уровень:            {post_data['co2']} ppm\n"
-                        log_message += f"🌬️ Атм. давление:          {post_data['pressure']:.2f} hPa\n"
-                        log_message += f"💡 Лампа:                  {'включена' if post_data['lamp_state'] == 1 else 'выключена'}\n"
-                        log_message += f"🪟 Шторы:                  {'закрыты' if post_data['curtains_state'] == 1 else 'открыты'}\n"
-                        log_message += "────────────────────────────────────"
-                        self.log_signal.emit(log_message)
-                        return True
-                    else:
-                        self.log_signal.emit(f"❌ Ошибка при отправке данных: {resp_data.get('message', 'Неизвестная ошибка')}")
-                        return False
-                except json.JSONDecodeError:
-                    self.log_signal.emit(f"❌ Ошибка декодирования JSON в ответе")
-                    return False
-            elif response.status_code == 401:
-                self.log_signal.emit("⛔ ОШИБКА АВТОРИЗАЦИИ ⛔")
-                return False
-            else:
-                self.log_signal.emit(f"❌ Сервер вернул код: {response.status_code}")
-                return False
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка отправки данных: {str(e)}")
-        return False
-    def get_max_sensor_id(self):
-        try:
-            headers = {'X-Auth-Token': API_TOKEN}
-            response = requests.get(MAX_ID_API_URL, headers=headers)
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('success') and 'max_id' in data:
-                    return int(data['max_id'])
-                else:
-                    self.log_signal.emit(f"❌ Ошибка получения max_id: {data.get('message', 'Неизвестная ошибка')}")
-                    return 0
-            elif response.status_code == 401:
-                self.log_signal.emit("⛔ ОШИБКА АВТОРИЗАЦИИ ⛔")
-                return 0
-            else:
-                self.log_signal.emit(f"❌ Сервер вернул код при запросе max_id: {response.status_code}")
-                return 0
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка при запросе max_id: {str(e)}")
+        ingest = self.ingest
+        last_temperature = ingest.temperature
+        last_humidity = ingest.humidity
+        last_soil_moisture = ingest.soil_moisture
+        last_light_level = ingest.light_level
+        last_co2 = ingest.co2
+        last_pressure = ingest.pressure
+        self.update_signal.emit()
+class JournalModel(QAbstractListModel):
+    """Модель Qt над кольцевым буфером журнала: вид запрашивает только видимые строки, новые строки добавляются пачками"""
+    def __init__(self, journal):
+        super().__init__()
+        self.journal = journal
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.journal)
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole) and index.isValid():
+            return self.journal.line(index.row())
+        return None
+    def flush(self):
+        """Переносит накопленные строки в модель: вытесненные старые строки удаляются, новые вставляются одним блоком"""
+        lines = self.journal.take_pending()
+        if not lines:
             return 0
-class DevicesControlThread(QThread):
-    update_signal = pyqtSignal()
-    log_signal = pyqtSignal(str)
-    def __init__(self, serial_connection, check_interval=5):
+        removed = self.journal.overflow(len(lines))
+        if removed:
+            self.beginRemoveRows(QModelIndex(), 0, removed - 1)
+            self.journal.evict(removed)
+            self.endRemoveRows()
+        first = len(self.journal)
+        self.beginInsertRows(QModelIndex(), first, first + len(lines) - 1)
+        self.journal.extend(lines)
+        self.endInsertRows()
+        return len(lines)
+    def clear(self):
+        self.beginResetModel()
+        self.journal.clear()
+        self.endResetModel()
+class JournalView(QTableView):
+    """Вид журнала: одна колонка строк одинаковой высоты, поэтому вставка и прокрутка не пересчитывают разметку всех строк"""
+    def __init__(self, model, font_size=18):
         super().__init__()
-        self.serial_connection = serial_connection
-        self.check_interval = check_interval
-        self.running = False
-    def run(self):
-        global last_led_state, last_curtains_state, last_thresholds
-        self.log_signal.emit("🧵 Запущен поток управления устройствами")
-        last_led_state = None
-        last_curtains_state = None
-        current_lamp_state_from_server = -1
-        current_curtains_state_from_server = -1
-        last_successful_state_check = 0
-        error_count = 0
-        max_errors = 3
-        self.running = True
-        while self.running:
-            try:
-                current_time = time.time()
-                if current_time - last_successful_state_check >= self.check_interval:
-                    led_state = self.get_led_state()
-                    if led_state is not None:
-                        error_count = 0
-                        last_successful_state_check = current_time
-                        current_lamp_state_from_server = led_state
-                        if last_led_state is None or last_led_state != current_lamp_state_from_server:
-                            self.log_signal.emit(f"🔔 Обнаружено изменение состояния лампы: {last_led_state if last_led_state is not None else '?'} ➡️ {current_lamp_state_from_server}")
-                            if self.send_command("LED", current_lamp_state_from_server):
-                                last_led_state = current_lamp_state_from_server
-                    curtains_state = self.get_curtains_state()
-                    if curtains_state is not None:
-                        error_count = 0
-                        last_successful_state_check = current_time
-                        current_curtains_state_from_server = curtains_state
-                        if last_curtains_state is None or last_curtains_state != current_curtains_state_from_server:
-                            self.log_signal.emit(f"🔔 Обнаружено изменение состояния штор: {last_curtains_state if last_curtains_state is not None else '?'} ➡️ {current_curtains_state_from_server}")
-                            if self.send_command("CURTAINS", current_curtains_state_from_server):
-                                last_curtains_state = current_curtains_state_from_server
-                global last_thresholds_print_time, THRESHOLDS_PRINT_INTERVAL
-                if current_time - last_thresholds_print_time >= THRESHOLDS_PRINT_INTERVAL:
-                    current_thresholds = self.get_thresholds()
-                    if current_thresholds is not None:
-                        last_thresholds = current_thresholds
-                self.update_signal.emit()
-                time.sleep(1)
-            except Exception as e:
-                self.log_signal.emit(f"❌ Ошибка в потоке управления устройствами: {str(e)}")
-                error_count += 1
-                if error_count >= max_errors:
-                    self.check_interval = min(30, self.check_interval * 2)  
-                    self.log_signal.emit(f"⚠️ Увеличен интервал проверки до {self.check_interval} секунд из-за повторяющихся ошибок")
-                    error_count = 0  
-                time.sleep(3)
-    def stop(self):
-        self.running = False
-        self.wait()
-    def get_led_state(self):
-        try:
-            headers = {'X-Auth-Token': API_TOKEN}
-            response = requests.get(LED_API_URL, headers=headers, timeout=5)
-            if response.status_code != 200:
-                if response.status_code == 401:
-                    self.log_signal.emit("⛔ ОШИБКА АВТОРИЗАЦИИ ⛔")
-                else:
-                    self.log_signal.emit(f"❌ Ошибка получения состояния лампы: HTTP {response.status_code}")
-                return None
-            try:
-                data = response.json()
-                if data.get('success') == True and 'state' in data:
-                    state = data.get('state')
-                    return 1 if int(state) == 1 else 0
-                else:
-                    self.log_signal.emit(f"❌ Некорректный формат ответа от API: {data}")
-                    return None
-            except json.JSONDecodeError as e:
-                self.log_signal.emit(f"❌ Ошибка разбора JSON в ответе лампы: {str(e)}")
-                return None
-        except requests.exceptions.Timeout:
-            self.log_signal.emit(f"❌ Таймаут при запросе состояния лампы")
-            return None
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка при получении состояния лампы: {str(e)}")
-            return None
-    def get_curtains_state(self):
-        try:
-            headers = {'X-Auth-Token': API_TOKEN}
-            response = requests.get(CURTAINS_API_URL, headers=headers, timeout=5)
-            if response.status_code != 200:
-                if response.status_code == 401:
-                    self.log_signal.emit("⛔ ОШИБКА АВТОРИЗАЦИИ ⛔")
-                else:
-                    self.log_signal.emit(f"❌ Ошибка получения состояния штор: HTTP {response.status_code}")
-                return None
-            try:
-                data = response.json()
-                if data.get('success') == True and 'state' in data:
-                    state = data.get('state')
-                    return 1 if int(state) == 1 else 0
-                else:
-                    self.log_signal.emit(f"❌ Некорректный формат ответа от API: {data}")
-                    return None
-            except json.JSONDecodeError as e:
-                self.log_signal.emit(f"❌ Ошибка разбора JSON в ответе штор: {str(e)}")
-                return None
-        except requests.exceptions.Timeout:
-            self.log_signal.emit(f"❌ Таймаут при запросе состояния штор")
-            return None
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка при получении состояния штор: {str(e)}")
-            return None
-    def send_command(self, device_type, state):
-        try:
-            state_value = 1 if state == 1 else 0
-            command = f"{device_type}:{state_value}\n"
-            if not self.serial_connection.is_open:
-                self.log_signal.emit(f"❌ Ошибка: последовательный порт закрыт")
-                return False
-            self.log_signal.emit(f"📡 Отправляем команду: {command.strip()}")
-            self.serial_connection.write(command.encode())
-            global last_led_state, last_curtains_state
-            if device_type == "LED":
-                status_text = "✅ включена" if state_value == 1 else "❌ выключена"
-                self.log_signal.emit(f"💡 Лампа: {status_text}")
-                last_led_state = state_value
-            elif device_type == "CURTAINS":
-                status_text = "✅ закрыты" if state_value == 1 else "❌ открыты"
-                self.log_signal.emit(f"🪟 Шторы: {status_text}")
-                last_curtains_state = state_value
-            time.sleep(0.5)
-            if self.serial_connection.in_waiting:
-                response = self.serial_connection.readline().decode('utf-8', errors='replace').strip()
-                if response:
-                    self.log_signal.emit(f"🔄 Ответ Arduino: {response}")
-            self.update_signal.emit()
-            return True
-        except serial.SerialException as e:
-            self.log_signal.emit(f"❌ Ошибка последовательного порта: {str(e)}")
-            return False
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка при отправке команды: {str(e)}")
-            return False
-    def get_thresholds(self):
-        try:
-            headers = {'X-Auth-Token': API_TOKEN}
-            response = requests.get(THRESHOLDS_API_URL, headers=headers)
-            if response.status_code == 200:
-                data = response.json()
-                current_time = time.time()
-                global last_thresholds_print_time
-                if current_time - last_thresholds_print_time >= THRESHOLDS_PRINT_INTERVAL:
-                    self.log_signal.emit(f"📊 Получены пороговые значения от сервера")
-                    last_thresholds_print_time = current_time
-                return data
-            elif response.status_code == 401:
-                self.log_signal.emit("⛔ ОШИБКА АВТОРИЗАЦИИ ⛔")
-                return None
-            return None
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка получения порогов: {str(e)}")
-            return None
-class PlantPhotoThread(QThread):
-    photo_taken_signal = pyqtSignal(np.ndarray, np.ndarray, dict)  
+        font = self.font()
+        font.setPixelSize(font_size)
+        self.setFont(font)
+        self.setModel(model)
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        self.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.horizontalHeader().hide()
+        self.horizontalHeader().setStretchLastSection(True)
+        self.verticalHeader().hide()
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 6)
+class NetworkBridge(QObject):
+    """Передает в интерфейс результаты задач сетевого движка через сигналы Qt"""
+    update_signal = pyqtSignal()
     log_signal = pyqtSignal(str)
-    def __init__(self, camera_index=0):
-        super().__init__()
-        self.camera_index = camera_index
-        self.original_image = None
-        self.detection_image = None
-        self.color_percentages = {}
-        self.detected_diseases = []
-        self.detected_pests = []
-    def run(self):
-        try:
-            self.log_signal.emit("📸 Делаем фото с камеры...")
-            frame = self.take_photo()
-            if frame is None:
-                self.log_signal.emit("❌ Не удалось получить изображение с камеры")
-                return
-            self.original_image = frame.copy()
-            height, width = frame.shape[:2]
-            self.log_signal.emit("🔍 Анализируем изображение растения...")
-            self.detect_plant(height, width)
-            analysis = self.analyze_health()
-            report_text = f"АНАЛИЗ СОСТОЯНИЯ РАСТЕНИЯ\nДата анализа: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\nСОСТОЯНИЕ: {analysis['состояние']}\n\nРАСПРЕДЕЛЕНИЕ ЦВЕТОВ:\n{analysis['распределение цветов']}\n\nДЕТАЛИ АНАЛИЗА:\n{analysis['детали']}\n\nРЕКОМЕНДАЦИИ:\n{analysis['рекомендации']}\n"
-            if self.upload_to_server(report_text):
-                self.log_signal.emit("✅ Анализ растения успешно загружен на сервер")
-            self.photo_taken_signal.emit(self.original_image, self.detection_image, analysis)
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка при выполнении фотографирования: {str(e)}")
-    def take_photo(self):
-        """Сделать фото с камеры"""
-        try:
-            cap = cv2.VideoCapture(self.camera_index)
-            if not cap.isOpened():
-                self.log_signal.emit("❌ Ошибка подключения камеры")
-                return None
-            ret, frame = cap.read()
-            cap.release()
-            if not ret:
-                self.log_signal.emit("❌ Ошибка получения изображения с камеры")
-                return None
-            return frame
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка при фотографировании: {str(e)}")
-            return None
-    def detect_plant(self, height, width):
-        """Обнаружение растения на изображении"""
-        LEAF_COLORS = {
-            "healthy_green": {"lower": np.array([35, 30, 30]), "upper": np.array([85, 255, 255]), "name": "здоровый зеленый"},
-            "yellow": {"lower": np.array([20, 30, 30]), "upper": np.array([35, 255, 255]), "name": "желтый"},
-            "brown": {"lower": np.array([10, 30, 10]), "upper": np.array([20, 255, 255]), "name": "коричневый"},
-            "light_green": {"lower": np.array([35, 30, 30]), "upper": np.array([85, 100, 255]), "name": "светло-зеленый"}
-        }
-        try:
-            self.height = height
-            self.width = width
-            hsv = cv2.cvtColor(self.original_image, cv2.COLOR_BGR2HSV)
-            self.detection_image = self.original_image.copy()
-            total_mask = np.zeros((self.height, self.width), dtype=np.uint8)
-            for color_name, color_range in LEAF_COLORS.items():
-                mask = cv2.inRange(hsv, color_range["lower"], color_range["upper"])
-                kernel = np.ones((3,3), np.uint8)
-                mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-                mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-                total_mask = cv2.bitwise_or(total_mask, mask)
-            contours, _ = cv2.findContours(total_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            filtered_contours = []
-            for contour in contours:
-                if cv2.contourArea(contour) > 100:
-                    filtered_contours.append(contour)
-            cv2.drawContours(self.detection_image, filtered_contours, -1, (0, 255, 0), 2)
-            self.plant_mask = np.zeros_like(total_mask)
-            cv2.drawContours(self.plant_mask, filtered_contours, -1, 255, -1)
-            plant_pixels = np.count_nonzero(self.plant_mask)
-            if plant_pixels > 0:
-                for color_name, color_range in LEAF_COLORS.items():
-                    mask = cv2.inRange(hsv, color_range["lower"], color_range["upper"])
-                    color_pixels = cv2.countNonZero(cv2.bitwise_and(mask, self.plant_mask))
-                    self.color_percentages[color_name] = (color_pixels / plant_pixels) * 100
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка при обнаружении растения: {str(e)}")
-    def analyze_health(self):
-        """Анализ здоровья растения"""
-        DISEASES_DB = {
-            "yellow_leaves": {"name": "Хлороз", "description": "Пожелтение листьев", "causes": ["Недостаток железа", "Переувлажнение", "Недостаток азота"], "solutions": ["Добавить железосодержащие удобрения", "Уменьшить полив", "Внести азотные удобрения"]},
-            "brown_spots": {"name": "Грибковое заболевание", "description": "Коричневые пятна на листьях", "causes": ["Грибковая инфекция", "Избыточная влажность", "Плохая вентиляция"], "solutions": ["Обработать фунгицидами", "Улучшить вентиляцию", "Удалить пораженные листья"]}
-        }
-        PESTS_DB = {
-            "aphids": {"name": "Тля", "description": "Мелкие насекомые на листьях и стеблях", "damage": "Высасывают сок из растения, вызывают деформацию листьев", "solutions": ["Обработать инсектицидами", "Использовать мыльный раствор", "Привлечь естественных хищников"]},
-            "thrips": {"name": "Трипсы", "description": "Мелкие удлиненные насекомые", "damage": "Повреждают листья и цветы, переносят вирусы", "solutions": ["Обработать инсектицидами", "Использовать синие липкие ловушки", "Удалять сорняки"]}
-        }
-        try:
-            self.detected_diseases = []
-            self.detected_pests = []
-            if self.color_percentages.get("yellow", 0) > 10:
-                self.detected_diseases.append(DISEASES_DB["yellow_leaves"])
-            if self.color_percentages.get("brown", 0) > 5:
-                self.detected_diseases.append(DISEASES_DB["brown_spots"])
-            if self.color_percentages.get("brown", 0) > 5:
-                if self.color_percentages.get("yellow", 0) > 15:
-                    self.detected_pests.append(PESTS_DB["aphids"])
-                elif self.color_percentages.get("brown", 0) > 10:
-                    self.detected_pests.append(PESTS_DB["thrips"])
-            status = "нормальное"
-            details = []
-            recommendations = []
-            if self.color_percentages.get("yellow", 0) > 10:
-                status = "требует внимания"
-                details.append("Обнаружено значительное пожелтение листьев")
-                recommendations.append("Проверьте режим полива")
-                recommendations.append("Проверьте уровень освещенности")
-            if self.color_percentages.get("brown", 0) > 5:
-                status = "требует внимания"
-                details.append("Обнаружены коричневые участки на листьях")
-                recommendations.append("Проверьте на наличие заболеваний")
-                recommendations.append("Удалите поврежденные листья")
-            for disease in self.detected_diseases:
-                details.append(f"{disease['name']}: {disease['description']}")
-                recommendations.extend(disease['solutions'])
-            for pest in self.detected_pests:
-                details.append(f"{pest['name']}: {pest['description']}")
-                recommendations.extend(pest['solutions'])
-            if not details:
-                recommendations.append("Поддерживайте текущий режим ухода")
-            LEAF_COLORS = {
-                "healthy_green": {"name": "здоровый зеленый"},
-                "yellow": {"name": "желтый"},
-                "brown": {"name": "коричневый"},
-                "light_green": {"name": "светло-зеленый"}
-            }
-            return {
-                "состояние": status,
-                "распределение цветов": "; ".join([f"{LEAF_COLORS[k]['name']}: {v:.1f}%" for k, v in self.color_percentages.items() if v > 1]),
-                "детали": "; ".join(details) if details else "отклонений не выявлено",
-                "рекомендации": "; ".join(recommendations)
-            }
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка при анализе здоровья растения: {str(e)}")
-            return {
-                "состояние": "ошибка анализа",
-                "распределение цветов": "",
-                "детали": f"Ошибка при анализе: {str(e)}",
-                "рекомендации": "Попробуйте повторить анализ"
-            }
-    def upload_to_server(self, text="Анализ состояния растений"):
-        """Загрузить фото на сервер"""
-        if self.original_image is None or self.detection_image is None:
-            self.log_signal.emit("❌ Нет изображений для загрузки на сервер")
-            return False
-        try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            orig_filename = f"farm_photo_{timestamp}.jpg"
-            analysis_filename = f"farm_analysis_{timestamp}.jpg"
-            cv2.imwrite(orig_filename, self.original_image)
-            cv2.imwrite(analysis_filename, self.detection_image)
-            if not os.path.exists(orig_filename) or not os.path.exists(analysis_filename):
-                self.log_signal.emit("❌ Ошибка сохранения файлов")
-                return False
-            data = {
-                'text': text, 
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 
-                'has_analysis': 'true'
-            }
-            headers = {
-                'X-Auth-Token': API_TOKEN
-            }
-            with open(orig_filename, 'rb') as orig_file, open(analysis_filename, 'rb') as analysis_file:
-                files = {
-                    'image': ('original.jpg', orig_file.read(), 'image/jpeg'),
-                    'analysis_image': ('analysis.jpg', analysis_file.read(), 'image/jpeg')
-                }
-                response = requests.post(SERVER_URL, data=data, files=files, headers=headers)
-                if response.status_code != 200:
-                    self.log_signal.emit(f"❌ Ошибка сервера: {response.status_code}")
-                    return False
-                try:
-                    response_data = response.json()
-                    if not response_data.get('success'):
-                        self.log_signal.emit(f"❌ Ошибка сервера: {response_data.get('message', 'Неизвестная ошибка')}")
-                        return False
-                    self.log_signal.emit(f"✅ Фото успешно загружено для пользователя с ID: {response_data.get('user_id')}")
-                    return True
-                except json.JSONDecodeError:
-                    self.log_signal.emit("❌ Ошибка обработки ответа сервера")
-                    return False
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка при загрузке на сервер: {str(e)}")
-            return False
-        finally:
-            for filename in [orig_filename, analysis_filename]:
-                if os.path.exists(filename):
-                    try: os.remove(filename)
-                    except: pass
+    photo_requested_signal = pyqtSignal()
+    photo_taken_signal = pyqtSignal(object, object, dict)
+    ports_found_signal = pyqtSignal(list)
+    binary_mode_signal = pyqtSignal(object, bool)
+    command_result_signal = pyqtSignal(str, int, object)
 class FarmControlApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -583,9 +159,20 @@ class FarmControlApp(QMainWindow):
         self.setWindowIcon(app_icon)
         self.setMinimumSize(900, 850)
         self.serial_connection = None
+        self.serial_actor = None
+        self.sensor_store = None
         self.camera = None
-        self.devices_thread = None
-        self.photo_thread = None
+        self.network_bridge = NetworkBridge()
+        self.network_bridge.update_signal.connect(self.update_sensor_display)
+        self.network_bridge.log_signal.connect(self.log)
+        self.network_bridge.photo_requested_signal.connect(self.take_scheduled_photo)
+        self.network_bridge.photo_taken_signal.connect(self.handle_photo_taken)
+        self.network_bridge.ports_found_signal.connect(self.handle_ports_found)
+        self.network_bridge.binary_mode_signal.connect(self.handle_binary_mode)
+        self.network_bridge.command_result_signal.connect(self.handle_command_result)
+        self.network_engine = NetworkEngine(log=self.network_bridge.log_signal.emit)
+        API_CLIENT.log = self.network_bridge.log_signal.emit
+        self.device_controller = None
         self.monitoring_thread = None
         self.api_token = API_TOKEN
         self.sensor_interval = 60
@@ -596,14 +183,37 @@ class FarmControlApp(QMainWindow):
         self.next_photo_time = 0
         self.serial_port = SERIAL_PORT
         self.baud_rate = BAUD_RATE
+        self.protocol_mode = PROTOCOL_MODE
+        self.binary_baud_rate = BINARY_BAUD_RATE
+        self.upload_mode = UPLOAD_MODE
         self.camera_index = CAMERA_INDEX
-        self.log_text = None
+        self.camera_warmup_frames = WARMUP_FRAMES
+        self.analysis_max_side = None
+        self.analysis_roi = None
+        self.jpeg_quality = JPEG_QUALITY
+        self.photo_archive = False
+        self.journal = Journal()
+        self.log_view = None
         self.auto_connect = False
+        self.automation_enabled = AUTOMATION_ENABLED
         self.load_settings()
+        self.devices = DeviceStates(serial_actor=lambda: self.serial_actor, device_controller=lambda: self.device_controller,
+                                    on_update=self.network_bridge.update_signal.emit, log=self.network_bridge.log_signal.emit)
+        self.automation = AutomationEngine(actuate=self.devices.actuate, enabled=self.automation_enabled,
+                                           log=self.network_bridge.log_signal.emit)
+        self.devices.automation = self.automation
+        self.camera = CameraManager(self.camera_index, self.camera_warmup_frames)
+        self.photographer = FarmPhotographer(self.camera, API_CLIENT, log=self.network_bridge.log_signal.emit)
+        self.configure_photographer()
+        self.photo_pipeline = PhotoPipeline(self.photographer.capture, self.photographer.analyze, self.photographer.upload,
+                                            retry_after=API_CLIENT.breaker(UPLOAD_ENDPOINT).retry_in,
+                                            on_result=self.emit_photo_result, on_idle=self.release_idle_camera,
+                                            log=self.network_bridge.log_signal.emit)
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
         self.main_layout = QVBoxLayout(self.central_widget)
         self.create_ui()
+        QTimer.singleShot(HARDWARE_PROBE_DELAY, self.start_hardware_probe)
     def create_ui(self):
         self.tabs = QTabWidget()
         self.tabs.setStyleSheet("""
@@ -648,10 +258,26 @@ class FarmControlApp(QMainWindow):
                 self.port_combo.setCurrentText(self.serial_port)
             if hasattr(self, 'baud_combo') and self.baud_combo is not None:
                 self.baud_combo.setCurrentText(str(self.baud_rate))
+            if hasattr(self, 'protocol_combo') and self.protocol_combo is not None:
+                self.protocol_combo.setCurrentIndex(1 if self.protocol_mode == "binary" else 0)
+            if hasattr(self, 'binary_baud_combo') and self.binary_baud_combo is not None:
+                self.binary_baud_combo.setCurrentText(str(self.binary_baud_rate))
             if hasattr(self, 'camera_index_spin') and self.camera_index_spin is not None:
                 self.camera_index_spin.setValue(self.camera_index)
+            if hasattr(self, 'camera_warmup_spin') and self.camera_warmup_spin is not None:
+                self.camera_warmup_spin.setValue(self.camera_warmup_frames)
+            if hasattr(self, 'analysis_size_combo') and self.analysis_size_combo is not None:
+                self.analysis_size_combo.setCurrentIndex(ANALYSIS_SIZES.index(self.analysis_max_side) if self.analysis_max_side in ANALYSIS_SIZES else 0)
+            if hasattr(self, 'analysis_roi_input') and self.analysis_roi_input is not None:
+                self.analysis_roi_input.setText(format_roi(self.analysis_roi))
+            if hasattr(self, 'jpeg_quality_spin') and self.jpeg_quality_spin is not None:
+                self.jpeg_quality_spin.setValue(self.jpeg_quality)
+            if hasattr(self, 'photo_archive_checkbox') and self.photo_archive_checkbox is not None:
+                self.photo_archive_checkbox.setChecked(self.photo_archive)
             if hasattr(self, 'sensor_interval_spin') and self.sensor_interval_spin is not None:
                 self.sensor_interval_spin.setValue(self.sensor_interval)
+            if hasattr(self, 'upload_mode_combo') and self.upload_mode_combo is not None:
+                self.upload_mode_combo.setCurrentIndex(UPLOAD_MODES.index(self.upload_mode))
             if hasattr(self, 'photo_interval_combo') and self.photo_interval_combo is not None:
                 mode_index = 0  
                 for i in range(self.photo_interval_combo.count()):
@@ -707,6 +333,9 @@ class FarmControlApp(QMainWindow):
         self.start_system_btn.setMinimumHeight(60)
         self.start_system_btn.clicked.connect(self.start_system)
         system_btn_layout.addWidget(self.start_system_btn)
+        self.server_status_label = QLabel("🌐 Сервер: --")
+        self.server_status_label.setStyleSheet("font-size: 16px; font-weight: bold;")
+        system_btn_layout.addWidget(self.server_status_label)
         analysis_layout.addLayout(system_btn_layout)
         analysis_group.setLayout(analysis_layout)
         layout.addWidget(analysis_group)
@@ -887,6 +516,16 @@ class FarmControlApp(QMainWindow):
         curtains_layout.addWidget(self.curtains_open_btn)
         curtains_group.setLayout(curtains_layout)
         layout.addWidget(curtains_group)
+        automation_group = QGroupBox("Автоматика")
+        automation_group.setStyleSheet("QGroupBox { font-size: 22px; font-weight: bold; }")
+        automation_layout = QVBoxLayout()
+        self.automation_checkbox = QCheckBox("Управлять лампой и шторами по порогам с сервера")
+        self.automation_checkbox.setStyleSheet("font-size: 16px; padding: 8px;")
+        self.automation_checkbox.setChecked(self.automation_enabled)
+        self.automation_checkbox.toggled.connect(self.set_automation_enabled)
+        automation_layout.addWidget(self.automation_checkbox)
+        automation_group.setLayout(automation_layout)
+        layout.addWidget(automation_group)
         photo_group = QGroupBox("Анализ растения")
         photo_group.setStyleSheet("QGroupBox { font-size: 22px; font-weight: bold; }")
         photo_layout = QVBoxLayout()
@@ -903,10 +542,12 @@ class FarmControlApp(QMainWindow):
         log_group = QGroupBox("Журнал событий")
         log_group.setStyleSheet("QGroupBox { font-size: 22px; font-weight: bold; }")
         log_layout = QVBoxLayout()
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
-        self.log_text.setStyleSheet("font-size: 18px;") 
-        log_layout.addWidget(self.log_text)
+        self.journal_model = JournalModel(self.journal)
+        self.log_view = JournalView(self.journal_model)
+        log_layout.addWidget(self.log_view)
+        self.journal_timer = QTimer(self)
+        self.journal_timer.timeout.connect(self.flush_log)
+        self.journal_timer.start(JOURNAL_FLUSH_INTERVAL)
         log_group.setLayout(log_layout)
         layout.addWidget(log_group)
         buttons_layout = QHBoxLayout()
@@ -920,6 +561,11 @@ class FarmControlApp(QMainWindow):
         self.save_log_btn.setMinimumHeight(45)
         self.save_log_btn.setStyleSheet("font-size: 16px; font-weight: bold; padding: 8px; background-color: #4CAF50; color: white; border-radius: 8px;")
         buttons_layout.addWidget(self.save_log_btn)
+        self.export_sensors_btn = QPushButton("Экспорт показаний")
+        self.export_sensors_btn.clicked.connect(self.export_sensor_history)
+        self.export_sensors_btn.setMinimumHeight(45)
+        self.export_sensors_btn.setStyleSheet("font-size: 16px; font-weight: bold; padding: 8px; background-color: #4CAF50; color: white; border-radius: 8px;")
+        buttons_layout.addWidget(self.export_sensors_btn)
         layout.addLayout(buttons_layout)
     def setup_setup_tab(self):
         layout = QVBoxLayout(self.setup_tab)
@@ -961,6 +607,7 @@ class FarmControlApp(QMainWindow):
         arduino_layout.setSpacing(10)  
         self.port_combo = QComboBox()
         self.port_combo.addItems(['COM1', 'COM2', 'COM3', 'COM4', 'COM5', 'COM6', 'COM7', 'COM8', 'COM9', 'COM10'])
+        self.port_combo.setEditable(True)
         self.port_combo.setCurrentText(self.serial_port)
         self.port_combo.setStyleSheet("""
             QComboBox { 
@@ -1009,6 +656,56 @@ class FarmControlApp(QMainWindow):
         """)
         self.baud_combo.setMinimumHeight(36)
         arduino_layout.addRow(QLabel("Скорость:"), self.baud_combo)
+        self.protocol_combo = QComboBox()
+        self.protocol_combo.addItems(['Текстовый', 'Бинарный'])
+        self.protocol_combo.setCurrentIndex(1 if self.protocol_mode == "binary" else 0)
+        self.protocol_combo.setStyleSheet("""
+            QComboBox { 
+                font-size: 16px; 
+                padding: 8px; 
+                border: 2px solid #4CAF50; 
+                border-radius: 4px; 
+            } 
+            QComboBox::drop-down { 
+                subcontrol-origin: content;
+                subcontrol-position: right;
+                width: 0px;
+                border: none;
+            }
+            QComboBox QAbstractItemView {
+                font-size: 16px;
+                border: 2px solid #4CAF50;
+                selection-background-color: #4CAF50;
+                selection-color: white;
+            }
+        """)
+        self.protocol_combo.setMinimumHeight(36)
+        arduino_layout.addRow(QLabel("Протокол:"), self.protocol_combo)
+        self.binary_baud_combo = QComboBox()
+        self.binary_baud_combo.addItems(['57600', '115200', '230400'])
+        self.binary_baud_combo.setCurrentText(str(self.binary_baud_rate))
+        self.binary_baud_combo.setStyleSheet("""
+            QComboBox { 
+                font-size: 16px; 
+                padding: 8px; 
+                border: 2px solid #4CAF50; 
+                border-radius: 4px; 
+            } 
+            QComboBox::drop-down { 
+                subcontrol-origin: content;
+                subcontrol-position: right;
+                width: 0px;
+                border: none;
+            }
+            QComboBox QAbstractItemView {
+                font-size: 16px;
+                border: 2px solid #4CAF50;
+                selection-background-color: #4CAF50;
+                selection-color: white;
+            }
+        """)
+        self.binary_baud_combo.setMinimumHeight(36)
+        arduino_layout.addRow(QLabel("Скорость (бинарный):"), self.binary_baud_combo)
         self.connect_arduino_btn = QPushButton("Подключить Arduino")
         self.connect_arduino_btn.clicked.connect(self.connect_to_arduino)
         self.connect_arduino_btn.setMinimumHeight(32)
@@ -1026,6 +723,61 @@ class FarmControlApp(QMainWindow):
         self.camera_index_spin.setMinimumHeight(36)
         self.camera_index_spin.setButtonSymbols(QSpinBox.ButtonSymbols.NoButtons)  
         camera_layout.addRow(QLabel("Индекс:"), self.camera_index_spin)
+        self.camera_warmup_spin = QSpinBox()
+        self.camera_warmup_spin.setRange(0, 60)
+        self.camera_warmup_spin.setValue(self.camera_warmup_frames)
+        self.camera_warmup_spin.setSuffix(" кадр.")
+        self.camera_warmup_spin.setStyleSheet("font-size: 16px; padding: 8px; border: 2px solid #4CAF50; border-radius: 4px;")
+        self.camera_warmup_spin.setMinimumHeight(36)
+        self.camera_warmup_spin.setButtonSymbols(QSpinBox.ButtonSymbols.NoButtons)
+        camera_layout.addRow(QLabel("Прогрев:"), self.camera_warmup_spin)
+        self.analysis_size_combo = QComboBox()
+        self.analysis_size_combo.addItems(["Полное разрешение" if size is None else f"До {size} пикс." for size in ANALYSIS_SIZES])
+        self.analysis_size_combo.setCurrentIndex(ANALYSIS_SIZES.index(self.analysis_max_side) if self.analysis_max_side in ANALYSIS_SIZES else 0)
+        self.analysis_size_combo.setStyleSheet("""
+            QComboBox { 
+                font-size: 16px; 
+                padding: 8px; 
+                border: 2px solid #4CAF50; 
+                border-radius: 4px; 
+            }
+            QComboBox::drop-down { 
+                subcontrol-origin: content;
+                subcontrol-position: right;
+                width: 0px;
+                border: none;
+            }
+            QComboBox QAbstractItemView {
+                font-size: 16px;
+                border: 2px solid #4CAF50;
+                selection-background-color: #4CAF50;
+                selection-color: white;
+            }
+        """)
+        self.analysis_size_combo.setMinimumHeight(36)
+        camera_layout.addRow(QLabel("Анализ:"), self.analysis_size_combo)
+        self.analysis_roi_input = QLineEdit()
+        self.analysis_roi_input.setPlaceholderText("x, y, ширина, высота в % (пусто - весь кадр)")
+        self.analysis_roi_input.setText(format_roi(self.analysis_roi))
+        self.analysis_roi_input.setStyleSheet("font-size: 16px; padding: 8px; border: 2px solid #4CAF50; border-radius: 4px;")
+        self.analysis_roi_input.setMinimumHeight(36)
+        camera_layout.addRow(QLabel("Область:"), self.analysis_roi_input)
+        self.jpeg_quality_spin = QSpinBox()
+        self.jpeg_quality_spin.setRange(10, 100)
+        self.jpeg_quality_spin.setValue(self.jpeg_quality)
+        self.jpeg_quality_spin.setStyleSheet("font-size: 16px; padding: 8px; border: 2px solid #4CAF50; border-radius: 4px;")
+        self.jpeg_quality_spin.setMinimumHeight(36)
+        self.jpeg_quality_spin.setButtonSymbols(QSpinBox.ButtonSymbols.NoButtons)
+        camera_layout.addRow(QLabel("Качество JPEG:"), self.jpeg_quality_spin)
+        self.photo_archive_checkbox = QCheckBox(f"Сохранять фото в {LOCAL_PATH}")
+        self.photo_archive_checkbox.setStyleSheet("font-size: 16px; padding: 8px;")
+        self.photo_archive_checkbox.setChecked(self.photo_archive)
+        camera_layout.addRow(QLabel("Архив фото:"), self.photo_archive_checkbox)
+        self.save_photo_settings_btn = QPushButton("Сохранить настройки фото")
+        self.save_photo_settings_btn.clicked.connect(self.save_photo_settings)
+        self.save_photo_settings_btn.setMinimumHeight(32)
+        self.save_photo_settings_btn.setStyleSheet("font-size: 14px; font-weight: bold; padding: 4px; background-color: #4CAF50; color: white; border-radius: 6px;")
+        camera_layout.addRow("", self.save_photo_settings_btn)
         self.test_camera_btn = QPushButton("Проверить камеру")
         self.test_camera_btn.clicked.connect(self.test_camera)
         self.test_camera_btn.setMinimumHeight(32)
@@ -1044,6 +796,31 @@ class FarmControlApp(QMainWindow):
         self.sensor_interval_spin.setMinimumHeight(36)
         self.sensor_interval_spin.setButtonSymbols(QSpinBox.ButtonSymbols.NoButtons)  
         intervals_layout.addRow(QLabel("Опрос:"), self.sensor_interval_spin)
+        self.upload_mode_combo = QComboBox()
+        self.upload_mode_combo.addItems(['Текущие значения', 'Сводка за интервал', 'Все показания'])
+        self.upload_mode_combo.setCurrentIndex(UPLOAD_MODES.index(self.upload_mode))
+        self.upload_mode_combo.setStyleSheet("""
+            QComboBox { 
+                font-size: 16px; 
+                padding: 8px; 
+                border: 2px solid #4CAF50; 
+                border-radius: 4px; 
+            }
+            QComboBox::drop-down { 
+                subcontrol-origin: content;
+                subcontrol-position: right;
+                width: 0px;
+                border: none;
+            }
+            QComboBox QAbstractItemView {
+                font-size: 16px;
+                border: 2px solid #4CAF50;
+                selection-background-color: #4CAF50;
+                selection-color: white;
+            }
+        """)
+        self.upload_mode_combo.setMinimumHeight(36)
+        intervals_layout.addRow(QLabel("Выгрузка:"), self.upload_mode_combo)
         photo_layout = QVBoxLayout()
         self.photo_interval_combo = QComboBox()
         photo_modes = [
@@ -1120,15 +897,14 @@ class FarmControlApp(QMainWindow):
         global CAMERA_INDEX
         CAMERA_INDEX = self.camera_index_spin.value()
         self.camera_index = CAMERA_INDEX
+        self.camera_warmup_frames = self.camera_warmup_spin.value()
         try:
-            cap = cv2.VideoCapture(CAMERA_INDEX)
-            if not cap.isOpened():
-                QMessageBox.critical(self, "Ошибка", f"Не удалось подключиться к камере с индексом {CAMERA_INDEX}")
-                return
-            ret, frame = cap.read()
-            cap.release()
-            if not ret:
-                QMessageBox.critical(self, "Ошибка", "Не удалось получить изображение с камеры")
+            self.camera.configure(CAMERA_INDEX, self.camera_warmup_frames)
+            frame = self.camera.read()
+            if not self.sensor_thread_running():
+                self.camera.release()
+            if frame is None:
+                QMessageBox.critical(self, "Ошибка", self.camera.last_error)
                 return
             height, width, channel = frame.shape
             bytes_per_line = 3 * width
@@ -1143,6 +919,26 @@ class FarmControlApp(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Ошибка при подключении к камере: {str(e)}")
             self.log(f"❌ Ошибка при подключении к камере: {str(e)}")
+    def photo_archive_path(self):
+        return LOCAL_PATH if SAVE_LOCAL and self.photo_archive else ""
+    def configure_photographer(self):
+        self.photographer.configure(self.analysis_max_side, self.analysis_roi, self.jpeg_quality, self.photo_archive_path())
+    def save_photo_settings(self):
+        """Применяет разрешение анализа, область кадра, качество JPEG и папку архива; действует со следующего фото"""
+        try:
+            roi = parse_roi(self.analysis_roi_input.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Ошибка", f"Некорректная область анализа: {str(e)}")
+            return
+        self.analysis_max_side = ANALYSIS_SIZES[self.analysis_size_combo.currentIndex()]
+        self.analysis_roi = roi
+        self.jpeg_quality = self.jpeg_quality_spin.value()
+        self.photo_archive = self.photo_archive_checkbox.isChecked()
+        self.configure_photographer()
+        self.save_settings()
+        area = f"область {format_roi(roi)} %" if roi else "весь кадр"
+        archive = f"архив {LOCAL_PATH}" if self.photo_archive else "без архива"
+        self.log(f"✅ Настройки фото: анализ {self.analysis_size_combo.currentText().lower()}, {area}, JPEG {self.jpeg_quality}, {archive}")
     def start_system(self):
         if hasattr(self, 'sensor_thread') and self.sensor_thread.isRunning():
             self.stop_system()
@@ -1150,25 +946,35 @@ class FarmControlApp(QMainWindow):
         if not self.check_connection():
             try:
                 self.log("🔄 Попытка автоматического подключения...")
-                self.serial_connection = serial.Serial(self.serial_port, self.baud_rate, timeout=1)
+                self.open_serial_connection(self.serial_port, self.baud_rate)
                 self.log(f"✅ Успешное автоматическое подключение к Arduino на порту {self.serial_port}")
             except Exception as e:
                 self.log(f"❌ Ошибка автоподключения: {str(e)}")
                 QMessageBox.warning(self, "Ошибка", "Нет подключения к устройству!")
                 return
         self.log("🚀 Система запущена!")
-        self.sensor_thread = SensorMonitoringThread(self.serial_connection, self.sensor_interval)
+        if self.sensor_store is None:
+            self.sensor_store = SensorStore(SENSOR_DB_FILE)
+        try:
+            self.sensor_store.open()
+        except Exception as e:
+            self.log(f"❌ Ошибка открытия локальной базы показаний: {str(e)}")
+            self.sensor_store = None
+        self.network_engine.start()
+        self.sensor_thread = SensorMonitoringThread(self.serial_actor, self.sensor_interval, self.sensor_store, self.upload_mode,
+                                                    self.network_engine, self.automation, self.devices.snapshot)
         self.sensor_thread.update_signal.connect(self.update_sensor_display)
         self.sensor_thread.log_signal.connect(self.log)
         self.sensor_thread.start()
-        self.devices_thread = DevicesControlThread(self.serial_connection)
-        self.devices_thread.update_signal.connect(self.update_sensor_display)
-        self.devices_thread.log_signal.connect(self.log)
-        self.devices_thread.start()
+        self.devices.reset()
+        self.device_controller = DeviceController(API_CLIENT, self.serial_actor, self.network_engine,
+                                                  on_change=self.devices.handle_device_change, log=self.network_bridge.log_signal.emit)
+        self.device_controller.follow_server = not self.automation_enabled
+        self.network_engine.spawn("devices", self.device_controller.run)
         self.calculate_next_photo_time()
-        self.photo_thread_active = True
-        self.photo_thread_runner = threading.Thread(target=self.photo_thread_function, daemon=True)
-        self.photo_thread_runner.start()
+        self.photo_schedule = PhotoSchedule(self.network_bridge.photo_requested_signal.emit, self.photo_mode, self.photo_interval,
+                                            self.photo_time1, self.photo_time2, log=self.network_bridge.log_signal.emit)
+        self.network_engine.spawn("photos", self.photo_schedule.run)
         self.start_system_btn.setText("ОСТАНОВИТЬ СИСТЕМУ")
         self.start_system_btn.setStyleSheet("font-size: 18px; font-weight: bold; padding: 10px; background-color: #F44336; color: white; border-radius: 10px;")
         self.save_api_btn.setEnabled(False)
@@ -1180,10 +986,14 @@ class FarmControlApp(QMainWindow):
         if hasattr(self, 'sensor_thread') and self.sensor_thread.isRunning():
             self.sensor_thread.running = False
             self.sensor_thread.wait()
-        if hasattr(self, 'devices_thread') and self.devices_thread.isRunning():
-            self.devices_thread.running = False
-            self.devices_thread.wait()
-        self.photo_thread_active = False
+        self.network_engine.stop()
+        self.device_controller = None
+        self.camera.release()
+        if self.sensor_store is not None:
+            self.sensor_store.close()
+        self.log(f"📊 Запросы к серверу: {API_CLIENT.format_stats()}")
+        if self.photo_pipeline.captured:
+            self.log(f"📷 Фото: {self.photo_pipeline.format_stats()}")
         self.start_system_btn.setText("ЗАПУСТИТЬ СИСТЕМУ")
         self.start_system_btn.setStyleSheet("font-size: 18px; font-weight: bold; padding: 10px; background-color: #4CAF50; color: white; border-radius: 10px;")
         self.save_api_btn.setEnabled(True)
@@ -1192,83 +1002,24 @@ class FarmControlApp(QMainWindow):
         self.log("Система остановлена!")
         self.auto_connect = False
         self.save_settings()
-    def photo_thread_function(self):
-        """Функция для выполнения периодического фотографирования"""
-        log_message = "🧵 Запущен поток периодического фотографирования: "
-        if self.photo_mode == "Каждые 10 минут (тест)":
-            log_message += f"режим = {self.photo_mode}"
-        elif self.photo_mode == "Раз в день":
-            log_message += f"режим = {self.photo_mode} в {self.photo_time1}"
-        else:  
-            log_message += f"режим = {self.photo_mode} в {self.photo_time1} и {self.photo_time2}"
-        self.log(log_message)
-        self.calculate_next_photo_time()
-        last_photo_time = time.time()
-        last_photo_seconds = 0  
-        current_day = datetime.now().day
-        photos_taken_today = {}
-        while self.photo_thread_active:
-            try:
-                current_time = time.time()
-                now = datetime.now()
-                if now.day != current_day:
-                    current_day = now.day
-                    photos_taken_today = {}
-                    self.log(f"Новый день ({now.strftime('%Y-%m-%d')}). Сбрасываем информацию о сделанных фото.")
-                if self.photo_mode == "Каждые 10 минут (тест)":
-                    if current_time - last_photo_time >= self.photo_interval:
-                        self.log(f"Делаем тестовое фото (прошло {int((current_time - last_photo_time))} секунд)")
-                        self.take_scheduled_photo()
-                        last_photo_time = time.time()
-                else:
-                    current_seconds = now.hour * 3600 + now.minute * 60 + now.second
-                    time_points = []
-                    time_names = {}  
-                    if self.photo_mode == "Раз в день":
-                        try:
-                            hours, minutes = map(int, self.photo_time1.split(':'))
-                            seconds = hours * 3600 + minutes * 60
-                            time_points.append(seconds)
-                            time_names[seconds] = self.photo_time1
-                        except ValueError:
-                            self.log(f"❌ Ошибка формата времени 1: {self.photo_time1}")
-                    else:  
-                        for idx, time_str in enumerate([self.photo_time1, self.photo_time2]):
-                            try:
-                                hours, minutes = map(int, time_str.split(':'))
-                                seconds = hours * 3600 + minutes * 60
-                                time_points.append(seconds)
-                                time_names[seconds] = time_str
-                            except ValueError:
-                                self.log(f"❌ Ошибка формата времени {idx+1}: {time_str}")
-                    time_points.sort()
-                    for seconds in time_points:
-                        time_key = time_names[seconds]  
-                        if time_key in photos_taken_today and photos_taken_today[time_key]:
-                            continue  
-                        if abs(current_seconds - seconds) <= 30:
-                            self.log(f"Наступило запланированное время для фото: {time_names[seconds]}")
-                            self.take_scheduled_photo()
-                            last_photo_time = time.time()
-                            last_photo_seconds = current_seconds
-                            photos_taken_today[time_key] = True
-                            break  
-                time.sleep(5)  
-            except Exception as e:
-                self.log(f"❌ Ошибка в потоке фотографирования: {str(e)}")
-                time.sleep(10)  
+    def set_automation_enabled(self, enabled):
+        self.automation_enabled = bool(enabled)
+        self.automation.enabled = self.automation_enabled
+        if self.device_controller is not None:
+            self.device_controller.follow_server = not self.automation_enabled
+        if self.automation_enabled:
+            self.log("🤖 Автоматика включена: лампа и шторы управляются по порогам сервера")
+        else:
+            self.log("🤖 Автоматика выключена: лампа и шторы следуют состоянию на сервере")
+        self.save_settings()
     def take_scheduled_photo(self):
-        """Делает фото по расписанию"""
+        """Ставит фото по расписанию в конвейер и сразу возвращается"""
         self.log("\n=== Выполнение запланированного фотографирования ===")
-        photo_thread = PlantPhotoThread(CAMERA_INDEX)
-        photo_thread.log_signal.connect(self.log)
-        photo_thread.photo_taken_signal.connect(self.handle_photo_taken)
-        photo_thread.start()
-        photo_thread.wait()  
+        self.photo_pipeline.request(PHOTO_SCHEDULED)
     def update_sensor_display(self):
         """Обновляет отображение данных с датчиков"""
         global last_temperature, last_humidity, last_soil_moisture, last_light_level, last_co2, last_pressure
-        global last_led_state, last_curtains_state
+        led_state, curtains_state = self.devices.snapshot()
         self.temp_label.setText(f"{last_temperature:.1f} °C")
         self.humidity_label.setText(f"{last_humidity:.1f} %")
         self.soil_label.setText(f"{last_soil_moisture:.1f} %")
@@ -1276,13 +1027,27 @@ class FarmControlApp(QMainWindow):
         self.co2_label.setText(f"{last_co2:.0f} ppm")
         self.pressure_label.setText(f"{last_pressure:.1f} hPa")
         led_status = "Неизвестно"
-        if last_led_state is not None:
-            led_status = "Включено" if last_led_state == 1 else "Выключено"
+        if led_state is not None:
+            led_status = "Включено" if led_state == 1 else "Выключено"
         self.led_label.setText(led_status)
         curtains_status = "Неизвестно"
-        if last_curtains_state is not None:
-            curtains_status = "Закрыты" if last_curtains_state == 1 else "Открыты"
+        if curtains_state is not None:
+            curtains_status = "Закрыты" if curtains_state == 1 else "Открыты"
         self.curtains_label.setText(curtains_status)
+        self.update_server_status()
+    def update_server_status(self):
+        """Показывает состояние предохранителей API: доступен, недоступен до времени следующей попытки или проверка связи"""
+        state, retry_in = API_CLIENT.health()
+        if state == BREAKER_OPEN:
+            retry_at = (datetime.now() + timedelta(seconds=retry_in)).strftime('%H:%M:%S')
+            self.server_status_label.setText(f"🔴 Сервер недоступен, повтор в {retry_at}")
+            self.server_status_label.setStyleSheet("font-size: 16px; font-weight: bold; color: #F44336;")
+        elif state == BREAKER_HALF_OPEN:
+            self.server_status_label.setText("🟡 Сервер: проверка связи")
+            self.server_status_label.setStyleSheet("font-size: 16px; font-weight: bold; color: #FFC107;")
+        else:
+            self.server_status_label.setText("🟢 Сервер доступен")
+            self.server_status_label.setStyleSheet("font-size: 16px; font-weight: bold; color: #4CAF50;")
     def handle_photo_taken(self, original_image, detection_image, analysis):
         """Обрабатывает сигнал о сделанном фото и анализе"""
         height, width, channel = original_image.shape
@@ -1313,21 +1078,49 @@ class FarmControlApp(QMainWindow):
             QMessageBox.warning(self, "Предупреждение", "API токен не может быть пустым!")
             return
         API_TOKEN = token
+        API_CLIENT.token = token
         self.api_token = token
         self.log("API токен сохранен")
         self.save_settings()
         QMessageBox.information(self, "API Токен", "API токен успешно сохранен!")
+    def start_hardware_probe(self):
+        """Вызывается после показа окна: поиск портов и загрузка OpenCV идут в фоновом потоке и не задерживают первую отрисовку"""
+        threading.Thread(target=self.probe_hardware, name="HardwareProbe", daemon=True).start()
+    def probe_hardware(self):
+        log = self.network_bridge.log_signal.emit
+        try:
+            from serial.tools import list_ports
+            self.network_bridge.ports_found_signal.emit([(port.device, port.description) for port in sorted(list_ports.comports())])
+        except Exception as e:
+            log(f"❌ Ошибка поиска последовательных портов: {str(e)}")
+        try:
+            importlib.import_module("plant_analysis")
+        except Exception as e:
+            log(f"❌ Ошибка загрузки OpenCV: {str(e)}")
+    def handle_ports_found(self, ports):
+        """Заменяет стандартный список COM-портов найденными портами; введенный вручную порт сохраняется"""
+        if not ports:
+            return
+        current = self.port_combo.currentText()
+        self.port_combo.clear()
+        for index, (device, description) in enumerate(ports):
+            self.port_combo.addItem(device)
+            self.port_combo.setItemData(index, description, Qt.ItemDataRole.ToolTipRole)
+        self.port_combo.setCurrentText(current)
+        self.log(f"🔌 Найдены последовательные порты: {', '.join(device for device, _ in ports)}")
     def connect_to_arduino(self):
         global SERIAL_PORT, BAUD_RATE
         SERIAL_PORT = self.port_combo.currentText()
         BAUD_RATE = int(self.baud_combo.currentText())
         self.serial_port = SERIAL_PORT
         self.baud_rate = BAUD_RATE
+        self.protocol_mode = "binary" if self.protocol_combo.currentIndex() == 1 else "text"
+        self.binary_baud_rate = int(self.binary_baud_combo.currentText())
         try:
             if self.serial_connection and self.serial_connection.is_open:
-                self.serial_connection.close()
+                self.close_serial_connection()
                 self.log("Соединение с Arduino закрыто")
-            self.serial_connection = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
+            self.open_serial_connection(SERIAL_PORT, BAUD_RATE)
             self.log(f"✅ Подключено к Arduino на порту {SERIAL_PORT}")
             self.save_settings()
             QMessageBox.information(self, "Подключение", f"Успешное подключение к Arduino на порту {SERIAL_PORT}")
@@ -1340,6 +1133,7 @@ class FarmControlApp(QMainWindow):
         old_photo_time1 = self.photo_time1
         old_photo_time2 = self.photo_time2
         self.sensor_interval = self.sensor_interval_spin.value()
+        self.upload_mode = UPLOAD_MODES[self.upload_mode_combo.currentIndex()]
         self.photo_mode = self.photo_interval_combo.currentText()
         if self.photo_mode == "Каждые 10 минут (тест)":
             self.photo_interval = 600  
@@ -1360,7 +1154,7 @@ class FarmControlApp(QMainWindow):
         )
         self.save_settings()
         self.calculate_next_photo_time()
-        message = f"✅ Интервалы обновлены: датчики = {self.sensor_interval} сек."
+        message = f"✅ Интервалы обновлены: датчики = {self.sensor_interval} сек. ({self.upload_mode_combo.currentText().lower()})"
         if self.photo_mode == "Каждые 10 минут (тест)":
             message += f", фото = {self.photo_mode}"
         elif self.photo_mode == "Раз в день":
@@ -1368,13 +1162,11 @@ class FarmControlApp(QMainWindow):
         else:  
             message += f", фото = {self.photo_mode} в {self.photo_time1} и {self.photo_time2}"
         self.log(message)
-        if hasattr(self, 'photo_thread_active') and self.photo_thread_active and photo_settings_changed:
-            self.log("Перезапуск потока фотографирования с новыми настройками...")
-            self.photo_thread_active = False
-            time.sleep(1)
-            self.photo_thread_active = True
-            self.photo_thread_runner = threading.Thread(target=self.photo_thread_function, daemon=True)
-            self.photo_thread_runner.start()
+        if self.network_engine.is_running and photo_settings_changed:
+            self.log("Перезапуск задачи фотографирования с новыми настройками...")
+            self.photo_schedule = PhotoSchedule(self.network_bridge.photo_requested_signal.emit, self.photo_mode, self.photo_interval,
+                                            self.photo_time1, self.photo_time2, log=self.network_bridge.log_signal.emit)
+            self.network_engine.spawn("photos", self.photo_schedule.run)
         QMessageBox.information(self, "Интервалы", "Интервалы успешно обновлены!")
     def is_valid_time_format(self, time_str):
         """Проверяет валидность формата времени ЧЧ:ММ"""
@@ -1411,103 +1203,84 @@ class FarmControlApp(QMainWindow):
                 return
         self.next_photo_time = seconds_per_time[0]
     def clear_log(self):
-        self.log_text.clear()
+        self.journal_model.clear()
     def save_log(self):
         filename, _ = QFileDialog.getSaveFileName(self, "Сохранить журнал", "", "Текстовые файлы (*.txt);;Все файлы (*)")
         if filename:
             try:
                 with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(self.log_text.toPlainText())
+                    f.write(self.journal.text())
                 QMessageBox.information(self, "Сохранение журнала", "Журнал успешно сохранен!")
             except Exception as e:
                 QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить журнал: {str(e)}")
-    def analyze_plant(self):
-        self.photo_thread = PlantPhotoThread(CAMERA_INDEX)
-        self.photo_thread.photo_taken_signal.connect(self.handle_photo_taken)
-        self.photo_thread.log_signal.connect(self.log)
-        self.photo_thread.start()
-    def control_led(self, state):
-        if not self.serial_connection or not self.serial_connection.is_open:
-            QMessageBox.warning(self, "Предупреждение", "Arduino не подключен!")
+    def export_sensor_history(self):
+        """Выгружает локальную историю показаний в CSV без обращения к серверу"""
+        filename, _ = QFileDialog.getSaveFileName(self, "Экспорт показаний", "", "CSV файлы (*.csv);;Все файлы (*)")
+        if not filename:
             return
+        store = self.sensor_store if self.sensor_store is not None and self.sensor_store.running else SensorStore(SENSOR_DB_FILE)
         try:
-            global last_led_state
-            command = f"LED:{1 if state == 1 else 0}\n"
-            self.serial_connection.write(command.encode())
-            status_text = "включена" if state == 1 else "выключена"
-            self.log(f"💡 Лампа: {status_text}")
-            last_led_state = state
-            self.update_sensor_display()
-            QMessageBox.information(self, "Лампа", f"Лампа успешно {status_text}!")
+            if not store.running:
+                store.open()
+            else:
+                store.flush()
+            count = store.export_csv(filename)
+            QMessageBox.information(self, "Экспорт показаний", f"Выгружено записей: {count}")
         except Exception as e:
-            self.log(f"❌ Ошибка при управлении лампой: {str(e)}")
-            QMessageBox.critical(self, "Ошибка", f"Не удалось управлять лампой: {str(e)}")
+            QMessageBox.critical(self, "Ошибка", f"Не удалось выгрузить показания: {str(e)}")
+        finally:
+            if store is not self.sensor_store:
+                store.close()
+    def analyze_plant(self):
+        self.photo_pipeline.request(PHOTO_MANUAL)
+    def sensor_thread_running(self):
+        return hasattr(self, 'sensor_thread') and self.sensor_thread.isRunning()
+    def release_idle_camera(self):
+        """Закрывает камеру после ручного анализа, если система не запущена и кадры больше не нужны"""
+        if not self.sensor_thread_running():
+            self.camera.release()
+    def emit_photo_result(self, job):
+        self.network_bridge.photo_taken_signal.emit(job.frame, job.detection_image, job.analysis)
+    def control_led(self, state):
+        self.control_device("LED", state)
     def control_curtains(self, state):
-        if not self.serial_connection or not self.serial_connection.is_open:
+        self.control_device("CURTAINS", state)
+    def control_device(self, device, state):
+        """Ручная команда лампе или шторам; итог показывается после подтверждения Arduino или по таймауту"""
+        name = DEVICE_LABELS[device][1]
+        if not self.check_connection():
             QMessageBox.warning(self, "Предупреждение", "Arduino не подключен!")
             return
         try:
-            global last_curtains_state
-            command = f"CURTAINS:{1 if state == 1 else 0}\n"
-            self.serial_connection.write(command.encode())
-            status_text = "закрыты" if state == 1 else "открыты"
-            self.log(f"🪟 Шторы: {status_text}")
-            last_curtains_state = state
-            self.update_sensor_display()
-            QMessageBox.information(self, "Шторы", f"Шторы успешно {status_text}!")
+            future = self.serial_actor.send_command(device, state)
+            future.add_done_callback(lambda done: self.network_bridge.command_result_signal.emit(
+                device, state, None if done.cancelled() or done.exception() is not None else done.result()))
         except Exception as e:
-            self.log(f"❌ Ошибка при управлении шторами: {str(e)}")
-            QMessageBox.critical(self, "Ошибка", f"Не удалось управлять шторами: {str(e)}")
-    def apply_thresholds(self):
-        pass
-    def should_log_message(self, message):
-        """Проверяет, нужно ли записывать сообщение в журнал"""
-        if message.startswith("❌") or "ошибка" in message.lower() or "ERROR" in message.upper():
-            return True
-        important_messages = [
-            "API токен сохранен",
-            "Подключено к Arduino",
-            "Камера с индексом",
-            "Интервалы обновлены",
-            "Система запущена",
-            "Система остановлена",
-            "ID записи:",
-            "Температура воздуха:",
-            "Влажность воздуха:",
-            "Влажность почвы:",
-            "Уровень освещенности:",
-            "CO₂ уровень:",
-            "Атм. давление:",
-            "Лампа:",
-            "Шторы:",
-            "Делаем фото с камеры",
-            "Анализируем изображение",
-            "Фото успешно загружено",
-            "Анализ растения успешно",
-            "Настройки успешно",
-            "Используются настройки"
-        ]
-        for important_msg in important_messages:
-            if important_msg in message:
-                return True
-        if "────────────────────────────────────" in message:
-            return True
-        return False
+            self.log(f"❌ Ошибка при управлении {name}: {str(e)}")
+            QMessageBox.critical(self, "Ошибка", f"Не удалось управлять {name}: {str(e)}")
+    def handle_command_result(self, device, state, response):
+        """Итог ручной команды в потоке интерфейса: состояние меняется только после подтверждения Arduino"""
+        title, name, statuses = DEVICE_LABELS[device]
+        status_text = statuses[1 if state == 1 else 0]
+        if not response:
+            self.log(f"❌ Arduino не подтвердил команду {device}:{state}")
+            QMessageBox.critical(self, "Ошибка", f"Не удалось управлять {name}: Arduino не подтвердил команду")
+            return
+        self.devices.confirmed(device, state)
+        self.log(f"💡 Лампа: {status_text}" if device == "LED" else f"🪟 Шторы: {status_text}")
+        QMessageBox.information(self, title, f"{title} успешно {status_text}!")
     def log(self, message):
-        """Добавляет сообщение в журнал"""
-        if not hasattr(self, 'log_text') or self.log_text is None:
+        """Добавляет сообщение в журнал; на экран новые строки выводятся пачкой по таймеру"""
+        if not hasattr(self, 'log_view') or self.log_view is None:
             print(f"[LOG] {message}")
             return
-        if hasattr(self, 'should_log_message'):
-            if not self.should_log_message(message):
-                return
-        if message.startswith("📅"):
-            formatted_message = message
-        else:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            formatted_message = f"{timestamp} - {message}"
-        self.log_text.append(formatted_message)
-        self.log_text.verticalScrollBar().setValue(self.log_text.verticalScrollBar().maximum())
+        self.journal.add(message)
+    def flush_log(self):
+        """Выводит накопленные строки журнала; прокрутка следует за концом, если пользователь не листает журнал выше"""
+        scroll_bar = self.log_view.verticalScrollBar()
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum()
+        if self.journal_model.flush() and at_bottom:
+            self.log_view.scrollToBottom()
     def start_arduino_reading(self):
         """Запускает чтение данных с Arduino"""
         self.update_timer = QTimer()
@@ -1515,9 +1288,36 @@ class FarmControlApp(QMainWindow):
         self.update_timer.start(1000)  
     def check_connection(self):
         """Проверяет наличие подключения к Arduino"""
-        if not hasattr(self, 'serial_connection') or not self.serial_connection or not self.serial_connection.is_open:
+        if not hasattr(self, 'serial_actor') or not self.serial_actor or not self.serial_actor.is_open:
             return False
         return True
+    def open_serial_connection(self, port, baud_rate):
+        """Открывает порт и запускает единственного владельца порта"""
+        self.serial_connection = serial.serial_for_url(port, baud_rate, timeout=1)
+        self.serial_actor = SerialPortActor(self.serial_connection)
+        self.serial_actor.start()
+        if self.protocol_mode == "binary":
+            threading.Thread(target=self.negotiate_binary, args=(self.serial_actor, self.binary_baud_rate), name="BinaryHandshake",
+                             daemon=True).start()
+    def negotiate_binary(self, actor, baud_rate):
+        """Согласование бинарного протокола в фоновом потоке: ожидание подтверждения Arduino не блокирует интерфейс"""
+        def log(message):
+            if actor.is_open:
+                self.network_bridge.log_signal.emit(message)
+        self.network_bridge.binary_mode_signal.emit(actor, actor.enable_binary(baud_rate, log=log))
+    def handle_binary_mode(self, actor, enabled):
+        """Показывает итог согласования протокола; ответ для уже закрытого порта не учитывается"""
+        if actor is not self.serial_actor:
+            return
+        self.protocol_combo.setToolTip(f"Бинарный протокол включен, скорость {self.binary_baud_rate}" if enabled
+                                       else "Arduino не подтвердил бинарный протокол, используется текстовый")
+    def close_serial_connection(self):
+        """Останавливает владельца порта и закрывает соединение"""
+        if self.serial_actor is not None:
+            self.serial_actor.close()
+            self.serial_actor = None
+        elif self.serial_connection and self.serial_connection.is_open:
+            self.serial_connection.close()
     def open_token_site(self):
         """Открывает сайт для получения API токена"""
         import webbrowser
@@ -1540,17 +1340,34 @@ class FarmControlApp(QMainWindow):
                 if 'api_token' in settings:
                     self.api_token = settings['api_token']
                     API_TOKEN = settings['api_token']
+                    API_CLIENT.token = API_TOKEN
                 if 'serial_port' in settings:
                     self.serial_port = settings['serial_port']
                     SERIAL_PORT = settings['serial_port']
                 if 'baud_rate' in settings:
                     self.baud_rate = settings['baud_rate']
                     BAUD_RATE = settings['baud_rate']
+                if 'protocol_mode' in settings:
+                    self.protocol_mode = settings['protocol_mode']
+                if 'binary_baud_rate' in settings:
+                    self.binary_baud_rate = settings['binary_baud_rate']
                 if 'camera_index' in settings:
                     self.camera_index = settings['camera_index']
                     CAMERA_INDEX = settings['camera_index']
+                if 'camera_warmup_frames' in settings:
+                    self.camera_warmup_frames = settings['camera_warmup_frames']
+                if 'analysis_max_side' in settings and settings['analysis_max_side'] in ANALYSIS_SIZES:
+                    self.analysis_max_side = settings['analysis_max_side']
+                if 'analysis_roi' in settings:
+                    self.analysis_roi = settings['analysis_roi']
+                if 'jpeg_quality' in settings:
+                    self.jpeg_quality = settings['jpeg_quality']
+                if 'photo_archive' in settings:
+                    self.photo_archive = settings['photo_archive']
                 if 'sensor_interval' in settings:
                     self.sensor_interval = settings['sensor_interval']
+                if 'upload_mode' in settings and settings['upload_mode'] in UPLOAD_MODES:
+                    self.upload_mode = settings['upload_mode']
                 if 'photo_interval' in settings:
                     self.photo_interval = settings['photo_interval']
                 if 'photo_mode' in settings:
@@ -1561,6 +1378,8 @@ class FarmControlApp(QMainWindow):
                     self.photo_time2 = settings['photo_time2']
                 if 'auto_connect' in settings:
                     self.auto_connect = settings['auto_connect']
+                if 'automation_enabled' in settings:
+                    self.automation_enabled = settings['automation_enabled']
                 print("[LOG] Настройки успешно загружены")
         except Exception as e:
             print(f"[LOG] Ошибка при загрузке настроек: {str(e)}")
@@ -1572,10 +1391,19 @@ class FarmControlApp(QMainWindow):
                 'api_token': self.api_token,
                 'serial_port': self.serial_port,
                 'baud_rate': self.baud_rate,
+                'protocol_mode': self.protocol_mode,
+                'binary_baud_rate': self.binary_baud_rate,
                 'camera_index': self.camera_index,
+                'camera_warmup_frames': self.camera_warmup_frames,
+                'analysis_max_side': self.analysis_max_side,
+                'analysis_roi': self.analysis_roi,
+                'jpeg_quality': self.jpeg_quality,
+                'photo_archive': self.photo_archive,
                 'sensor_interval': self.sensor_interval,
+                'upload_mode': self.upload_mode,
                 'photo_mode': self.photo_mode,
-                'auto_connect': self.auto_connect
+                'auto_connect': self.auto_connect,
+                'automation_enabled': self.automation_enabled
             }
             if self.photo_mode == "Каждые 10 минут (тест)":
                 settings['photo_interval'] = 600  
@@ -0,0 +1,187 @@
+import time
+import threading
+from collections import namedtuple
+AutomationRule = namedtuple("AutomationRule", "device field bound active_when hysteresis min_on min_off")
+DEFAULT_RULES = (
+    AutomationRule("LED", "light_level", "min", "below", 50.0, 300.0, 120.0),
+    AutomationRule("CURTAINS", "light_level", "max", "above", 100.0, 600.0, 300.0),
+)
+THRESHOLD_ALIASES = {
+    "temperature": "temperature", "temp": "temperature",
+    "humidity": "humidity", "air_humidity": "humidity",
+    "soil_moisture": "soil_moisture", "soil": "soil_moisture",
+    "light_level": "light_level", "light": "light_level", "illumination": "light_level",
+    "co2": "co2", "pressure": "pressure",
+}
+BOUND_ALIASES = {"min": "min", "min_value": "min", "minimum": "min", "low": "min",
+                 "max": "max", "max_value": "max", "maximum": "max", "high": "max"}
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+def parse_thresholds(data):
+    """Приводит ответ get-thresholds к виду {поле: {'min': x, 'max': y}}; неизвестные поля и нечисловые значения пропускаются"""
+    if isinstance(data, dict) and isinstance(data.get('thresholds'), (dict, list)):
+        data = data['thresholds']
+    rows = []
+    if isinstance(data, list):
+        for row in data:
+            if isinstance(row, dict):
+                name = row.get('parameter') or row.get('name') or row.get('sensor') or row.get('type')
+                rows.append((name, row))
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            if isinstance(value, dict):
+                rows.append((key, value))
+            elif isinstance(key, str) and "_" in key:
+                name, _, bound = key.rpartition("_")
+                rows.append((name, {bound: value}))
+    thresholds = {}
+    for name, values in rows:
+        field = THRESHOLD_ALIASES.get(str(name).lower())
+        if field is None:
+            continue
+        for key, value in values.items():
+            bound = BOUND_ALIASES.get(str(key).lower())
+            number = to_float(value)
+            if bound is not None and number is not None:
+                thresholds.setdefault(field, {})[bound] = number
+    return thresholds
+class AutomationEngine:
+    """Локальные правила по порогам сервера с гистерезисом и минимальным временем состояний; часы передаются снаружи"""
+    def __init__(self, rules=DEFAULT_RULES, actuate=None, clock=time.monotonic, enabled=True, log=None):
+        self.rules = tuple(rules)
+        self.actuate = actuate or (lambda device, state: True)
+        self.clock = clock
+        self.enabled = enabled
+        self.log = log or (lambda message: print(f"[LOG] {message}"))
+        self.lock = threading.RLock()
+        self.thresholds = {}
+        self.states = {}
+        self.changed_at = {}
+    def set_thresholds(self, data):
+        """Принимает пороги с сервера; при пустом или нераспознанном ответе оставляет прежние"""
+        thresholds = parse_thresholds(data)
+        if thresholds:
+            with self.lock:
+                self.thresholds = thresholds
+        return thresholds
+    def apply_thresholds(self, data):
+        """Принимает пороги с сервера и сообщает в журнал, если они изменились или не распознаны"""
+        previous = self.thresholds
+        thresholds = self.set_thresholds(data)
+        if not thresholds:
+            self.log("⚠️ Пороги с сервера не распознаны, автоматика использует прежние значения")
+        elif thresholds != previous:
+            light = thresholds.get('light_level', {})
+            self.log(f"📊 Пороги автоматики обновлены: освещенность {light.get('min', '?')}-{light.get('max', '?')} lx")
+        return thresholds
+    def set_state(self, device, state):
+        """Учитывает переключение извне (вручную или с сервера): от него отсчитывается минимальное время"""
+        with self.lock:
+            if self.states.get(device) != state:
+                self.states[device] = state
+                self.changed_at[device] = self.clock()
+    def desired(self, rule, value, current):
+        """Целевое состояние устройства; внутри полосы гистерезиса сохраняется текущее"""
+        limit = self.thresholds.get(rule.field, {}).get(rule.bound)
+        if limit is None:
+            return None
+        if rule.active_when == "below":
+            if value < limit:
+                return 1
+            if value > limit + rule.hysteresis:
+                return 0
+        else:
+            if value > limit:
+                return 1
+            if value < limit - rule.hysteresis:
+                return 0
+        return current
+    def evaluate(self, reading):
+        """Проверяет показание по всем правилам и переключает устройства; возвращает список (устройство, состояние)"""
+        if not self.enabled:
+            return []
+        commands = []
+        with self.lock:
+            now = self.clock()
+            for rule in self.rules:
+                value = getattr(reading, rule.field, None)
+                if value is None:
+                    continue
+                current = self.states.get(rule.device)
+                target = self.desired(rule, value, current)
+                if target is None or target == current:
+                    continue
+                since = self.changed_at.get(rule.device)
+                if current is not None and since is not None and now - since < (rule.min_on if current == 1 else rule.min_off):
+                    continue
+                if self.actuate(rule.device, target) is False:
+                    continue
+                self.states[rule.device] = target
+                if current is not None:
+                    self.changed_at[rule.device] = now
+                commands.append((rule.device, target))
+        for device, state in commands:
+            self.log(f"🤖 Автоматика: {device}:{state} по порогам сервера")
+        return commands
+class DeviceStates:
+    """Состояние лампы и штор для приложения и режима без интерфейса: изменения с сервера, команды автоматики и подтвержденные ручные команды.
+    Порт и контроллер устройств передаются функциями, потому что приложение создает их заново при переподключении"""
+    def __init__(self, automation=None, serial_actor=None, device_controller=None, on_update=None, log=None):
+        self.automation = automation
+        self.serial_actor = serial_actor or (lambda: None)
+        self.device_controller = device_controller or (lambda: None)
+        self.on_update = on_update or (lambda: None)
+        self.log = log or (lambda message: print(f"[LOG] {message}"))
+        self.led = None
+        self.curtains = None
+        self.thresholds = None
+    def snapshot(self):
+        """(лампа, шторы) для записи показаний; None - состояние еще неизвестно"""
+        return self.led, self.curtains
+    def reset(self):
+        self.led = None
+        self.curtains = None
+    def record(self, device, state):
+        if device == "LED":
+            self.led = state
+        else:
+            self.curtains = state
+    def handle_device_change(self, name, value):
+        """Вызывается из сетевого движка: состояние лампы и штор с сервера и пороги для автоматики"""
+        if name in ("LED", "CURTAINS"):
+            self.record(name, value)
+            if self.automation is not None:
+                self.automation.set_state(name, value)
+        elif name == "thresholds":
+            self.thresholds = value
+            if self.automation is not None:
+                self.automation.apply_thresholds(value)
+        self.on_update()
+    def actuate(self, device, state):
+        """Исполнитель автоматики, вызывается из потока датчиков: команда уходит в порт сразу, подтверждение проверяется асинхронно"""
+        serial_actor = self.serial_actor()
+        if serial_actor is None or not serial_actor.is_open:
+            return False
+        future = serial_actor.send_command(device, state)
+        def check_ack(done):
+            if done.cancelled() or done.exception() is not None or not done.result():
+                self.log(f"❌ Arduino не подтвердил команду автоматики {device}:{state}")
+        future.add_done_callback(check_ack)
+        device_controller = self.device_controller()
+        if device_controller is not None:
+            device_controller.note_state(device, state)
+        self.record(device, state)
+        self.on_update()
+        return True
+    def confirmed(self, device, state):
+        """Ручная команда подтверждена Arduino: опрос сервера и автоматика сравнивают дальше с этим состоянием"""
+        device_controller = self.device_controller()
+        if device_controller is not None:
+            device_controller.note_state(device, state)
+        if self.automation is not None:
+            self.automation.set_state(device, state)
+        self.record(device, state)
+        self.on_update()
@@ -0,0 +1,217 @@
+import os
+import re
+import sys
+import time
+import random
+import socket
+import argparse
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sensor_protocol import (SensorReading, FRAME_SENSOR, FRAME_ACK, FRAME_TEXT,
+                             encode_frame, encode_sensor_body, encode_ack_body)
+MONITOR_TIMESTAMP = re.compile(r"^\d{2}:\d{2}:\d{2}\.\d{3} -> ")
+def load_recording(filename):
+    """Строки записанного вывода скетча; метки времени монитора порта Arduino IDE ("12:00:01.250 -> ") отбрасываются"""
+    with open(filename, encoding='utf-8', errors='replace') as f:
+        lines = [MONITOR_TIMESTAMP.sub("", line.rstrip("\r\n")) for line in f]
+    return [line for line in lines if line.strip()]
+class SimulatedArduino:
+    """Имитация скетча temp_humidity_light.ino на pty, TCP (socket://) или порту pyserial: показания или запись, команды LED/CURTAINS и MODE:BIN"""
+    def __init__(self, fd=None, interval=0.5, seed=429, replay=None, line_rate=0.0, repeat=True, timestamps=False, sock=None, port=None):
+        self.fd = fd
+        self.sock = sock
+        self.port = port
+        self.listener = None
+        self.interval = interval
+        self.replay = replay
+        self.line_rate = line_rate
+        self.repeat = repeat
+        self.random = random.Random(seed)
+        self.write_lock = threading.Lock()
+        self.running = False
+        self.threads = []
+        self.binary_mode = False
+        self.baud_rate = 9600
+        self.seq = 0
+        self.led_state = 0
+        self.curtains_state = 0
+        self.readings_sent = 0
+        self.lines_sent = 0
+        self.sent_times = [] if timestamps else None
+        self.connected = threading.Event()
+    @classmethod
+    def open_pty(cls, **kwargs):
+        """Создает пару pty; возвращает (симулятор, путь к порту для pyserial)"""
+        master, slave = os.openpty()
+        simulator = cls(master, **kwargs)
+        simulator.slave_fd = slave
+        return simulator, os.ttyname(slave)
+    @classmethod
+    def open_socket(cls, **kwargs):
+        """Слушает TCP на localhost; возвращает (симулятор, адрес socket://host:port для serial.serial_for_url), работает и в Windows"""
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(1)
+        simulator = cls(**kwargs)
+        simulator.listener = listener
+        return simulator, f"socket://127.0.0.1:{listener.getsockname()[1]}"
+    @classmethod
+    def on_port(cls, port, **kwargs):
+        """Выдача показаний в открытый порт pyserial, например loop://; команды в петле возвращаются читателю, поэтому не обрабатываются"""
+        return cls(port=port, **kwargs)
+    def start(self):
+        self.running = True
+        targets = [self.emit_loop] if self.port is not None else [self.command_loop, self.emit_loop]
+        for target in targets:
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+    def stop(self):
+        self.running = False
+        for fd in (getattr(self, 'slave_fd', None), self.fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        for sock in (self.sock, self.listener):
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                sock.close()
+        self.connected.set()
+    def accept(self):
+        """Ждет подключения программы к socket:// в потоке выдачи; для pty и порта pyserial соединение уже есть"""
+        if self.listener is not None and self.sock is None:
+            try:
+                self.sock, _ = self.listener.accept()
+                self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError:
+                self.running = False
+        self.connected.set()
+    def write(self, data):
+        self.connected.wait()
+        with self.write_lock:
+            try:
+                if self.sock is not None:
+                    self.sock.sendall(data)
+                elif self.port is not None:
+                    self.port.write(data)
+                else:
+                    os.write(self.fd, data)
+            except (OSError, ValueError):
+                self.running = False
+    def read(self):
+        self.connected.wait()
+        if self.sock is not None:
+            return self.sock.recv(256)
+        return os.read(self.fd, 256)
+    def println(self, text):
+        if self.sent_times is not None:
+            self.sent_times.append(time.perf_counter())
+        self.lines_sent += 1
+        self.write(text.encode('utf-8') + b"\r\n")
+    def next_seq(self):
+        seq = self.seq
+        self.seq = (self.seq + 1) & 0xFFFF
+        return seq
+    def current_reading(self):
+        return SensorReading(
+            temperature=round(self.random.uniform(21.0, 26.0), 2),
+            humidity=round(self.random.uniform(35.0, 60.0), 2),
+            soil_moisture=float(self.random.randint(30, 70)),
+            light_level=round(self.random.uniform(100.0, 900.0), 2)
+        )
+    def emit_reading(self, reading=None):
+        reading = reading or self.current_reading()
+        if self.binary_mode:
+            self.write(encode_frame(FRAME_SENSOR, self.next_seq(), encode_sensor_body(reading, self.led_state, self.curtains_state)))
+        else:
+            self.println(f"Soil moisture: {int(reading.soil_moisture)}%")
+            self.println(f"Humidity: {reading.humidity:.2f}% Temperature: {reading.temperature:.2f}°C")
+            self.println(f"Light level: {reading.light_level:.2f} lx")
+        self.readings_sent += 1
+        return reading
+    def emit_replay_line(self, line):
+        if self.binary_mode:
+            self.send_error(line)
+        else:
+            self.println(line)
+    def emit_loop(self):
+        """Выдача с постоянным темпом по расписанию, а не паузой после каждой записи: темп не падает на высоких частотах"""
+        self.accept()
+        period = self.interval if self.replay is None else (1.0 / self.line_rate if self.line_rate else 0.0)
+        started = time.perf_counter()
+        count = 0
+        while self.running:
+            if self.replay is None:
+                self.emit_reading()
+            else:
+                if count >= len(self.replay) and not self.repeat:
+                    return
+                self.emit_replay_line(self.replay[count % len(self.replay)])
+            count += 1
+            if period:
+                delay = started + count * period - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+    def command_loop(self):
+        buffer = b""
+        while self.running:
+            try:
+                data = self.read()
+            except OSError:
+                return
+            if not data:
+                return
+            buffer += data
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                self.handle_command(line.decode('utf-8', errors='replace').strip())
+    def handle_command(self, command):
+        if command.startswith("LED:"):
+            self.led_state = 1 if command[4:].strip() == "1" else 0
+            self.send_ack(1, self.led_state, f"LED state changed to: {'ON' if self.led_state else 'OFF'}")
+        elif command.startswith("CURTAINS:"):
+            self.curtains_state = 1 if command[9:].strip() == "1" else 0
+            self.send_ack(2, self.curtains_state, f"Curtains state changed to: {'CLOSED' if self.curtains_state else 'OPEN'}")
+        elif command.startswith("MODE:BIN:") and not self.binary_mode:
+            baud_rate = int(command[9:] or 0)
+            if baud_rate > 0:
+                self.println(f"MODE:BIN:{baud_rate} OK")
+                self.baud_rate = baud_rate
+                self.binary_mode = True
+    def send_ack(self, device, state, text):
+        if self.binary_mode:
+            self.write(encode_frame(FRAME_ACK, self.next_seq(), encode_ack_body({1: "LED", 2: "CURTAINS"}[device], state)))
+        else:
+            self.println(text)
+    def send_error(self, text):
+        if self.binary_mode:
+            self.write(encode_frame(FRAME_TEXT, self.next_seq(), text.encode('utf-8')))
+        else:
+            self.println(text)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Имитатор Arduino с прошивкой temp_humidity_light.ino для запуска программы без платы")
+    parser.add_argument("--socket", action="store_true", help="слушать socket://127.0.0.1 вместо pty (для Windows)")
+    parser.add_argument("--interval", type=float, default=2.0, help="пауза между показаниями, с")
+    parser.add_argument("--replay", help="файл с записанным выводом скетча вместо синтетических показаний")
+    parser.add_argument("--line-rate", type=float, default=5.0, help="строк записи в секунду (0 - без пауз)")
+    parser.add_argument("--once", action="store_true", help="проиграть запись один раз")
+    args = parser.parse_args()
+    options = {'interval': args.interval, 'line_rate': args.line_rate, 'repeat': not args.once,
+               'replay': load_recording(args.replay) if args.replay else None}
+    simulator, port_name = SimulatedArduino.open_socket(**options) if args.socket else SimulatedArduino.open_pty(**options)
+    simulator.start()
+    print(f"Порт имитатора: {port_name} (Ctrl+C - выход)")
+    try:
+        while simulator.running:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+        print(f"Отправлено строк: {simulator.lines_sent}, лампа {simulator.led_state}, шторы {simulator.curtains_state}")
@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from urllib.parse import urlencode
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sensor_protocol import SensorReading, ReadingAggregator
+def make_readings(seconds, period, seed=429):
+    """Показания за seconds секунд с шагом period, с суточным трендом и шумом"""
+    rng = random.Random(seed)
+    readings = []
+    start = 1700000000.0
+    for i in range(int(seconds / period)):
+        t = start + i * period
+        readings.append(SensorReading(temperature=22.0 + 3.0 * (i % 600) / 600 + rng.gauss(0, 0.2),
+                                      humidity=50.0 + rng.gauss(0, 2.0), soil_moisture=float(rng.randint(40, 45)),
+                                      light_level=300.0 + rng.gauss(0, 30.0), timestamp=t))
+    return readings
+def base_payload(reading):
+    return {'id': 1, 'user_id': 1, 'temperature': reading.temperature, 'humidity': reading.humidity,
+            'soil_moisture': reading.soil_moisture, 'light_level': reading.light_level, 'co2': 400,
+            'pressure': 1013.25, 'lamp_state': 0, 'curtains_state': 0}
+def simulate(readings, interval, mode):
+    """Возвращает (число запросов, байт в телах, показаний, попавших на сервер)"""
+    aggregator = ReadingAggregator(keep_points=mode == "batch")
+    requests_count = body_bytes = delivered = 0
+    window_start = readings[0].timestamp
+    for reading in readings:
+        aggregator.add(reading)
+        if reading.timestamp - window_start >= interval:
+            payload = base_payload(reading)
+            if mode == "summary":
+                payload.update(aggregator.summary_fields())
+                delivered += aggregator.samples
+            elif mode == "batch":
+                payload['readings'] = json.dumps(aggregator.point_rows())
+                delivered += len(aggregator.points)
+            else:
+                delivered += 1
+            body_bytes += len(urlencode(payload))
+            requests_count += 1
+            aggregator.reset()
+            window_start = reading.timestamp
+    return requests_count, body_bytes, delivered
+def bench_add(readings, repeat):
+    aggregator = ReadingAggregator()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for reading in readings:
+            aggregator.add(reading)
+        aggregator.reset()
+    elapsed = time.perf_counter() - start
+    return elapsed * 1e6 / (repeat * len(readings))
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Выгрузка показаний: снимок против сводки и пакета за интервал")
+    parser.add_argument("--hours", type=float, default=1.0)
+    parser.add_argument("--period", type=float, default=2.0, help="период поступления показаний от Arduino, с")
+    args = parser.parse_args()
+    readings = make_readings(args.hours * 3600, args.period)
+    print(f"Показаний за {args.hours:g} ч: {len(readings)} (каждые {args.period:g} с)")
+    for mode, interval in (("snapshot", 60), ("summary", 60), ("summary", 300), ("batch", 300)):
+        count, size, delivered = simulate(readings, interval, mode)
+        print(f"{mode:8} интервал {interval:3} с: запросов {count:3}, {size / 1024:7.1f} КБ, "
+              f"учтено показаний {delivered:5} ({delivered * 100 / len(readings):5.1f}%), {delivered / count:6.1f} показаний на запрос")
+    print(f"ReadingAggregator.add: {bench_add(readings, 20):.2f} мкс на показание")
@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+import cv2
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from plant_analysis import detect_plant, parse_roi, ANALYSIS_SIZES
+from synthetic_plants import RESOLUTIONS, synthetic_plant
+def measure(image, repeat, **options):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = detect_plant(image, **options)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, result
+def report(resolutions, seeds, repeat, roi_text):
+    """Точность долей цветов и площади растения при уменьшенном разрешении и области анализа относительно полного кадра"""
+    roi = parse_roi(roi_text)
+    variants = [("полное", {})] + [(f"до {size}", {'max_side': size}) for size in ANALYSIS_SIZES if size]
+    variants += [(f"область {roi_text} %", {'roi': roi}), ("область, до 640", {'roi': roi, 'max_side': 640})]
+    for name in resolutions:
+        width, height = RESOLUTIONS[name]
+        images = [synthetic_plant(width, height, seed=seed) for seed in range(seeds)]
+        full = [measure(image, repeat) for image in images]
+        print(f"{name} ({width}x{height}), {seeds} кадров:")
+        print(f"  {'режим':<24}{'время, мс':>10}{'ускорение':>11}{'ошибка долей, п.п.':>20}{'площадь':>10}")
+        for label, options in variants:
+            if options.get('max_side') and options['max_side'] >= max(width, height):
+                continue
+            runs = [measure(image, repeat, **options) for image in images] if options else full
+            elapsed = statistics.median(run[0] for run in runs)
+            errors = [abs(run[1][2].get(key, 0.0) - value) for run, reference in zip(runs, full) for key, value in reference[1][2].items()]
+            areas = [cv2.countNonZero(run[1][1]) / max(1, cv2.countNonZero(reference[1][1])) for run, reference in zip(runs, full)]
+            print(f"  {label:<24}{elapsed:>10.1f}{statistics.median(item[0] for item in full) / elapsed:>10.2f}x"
+                  f"{max(errors):>11.2f} (ср. {statistics.mean(errors):.2f}){statistics.mean(areas) * 100:>8.1f}%")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Анализ растения в уменьшенном разрешении и в области кадра: точность против скорости")
+    parser.add_argument("--resolutions", nargs="+", default=["1080p", "4k"], choices=sorted(RESOLUTIONS))
+    parser.add_argument("--seeds", type=int, default=4, help="число синтетических кадров на разрешение")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--roi", default="20, 10, 60, 90", help="область x, y, ширина, высота в процентах кадра")
+    parser.add_argument("--threads", type=int, default=1, help="потоков OpenCV")
+    args = parser.parse_args()
+    cv2.setNumThreads(args.threads)
+    report(args.resolutions, args.seeds, args.repeat, args.roi)
@@ -0,0 +1,82 @@
+import os
+import sys
+import math
+import time
+import random
+import argparse
+import serial
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sensor_protocol import SensorReading
+from automation import AutomationEngine, AutomationRule
+from serial_io import SerialPortActor
+from arduino_sim import SimulatedArduino
+THRESHOLDS = {"success": True, "thresholds": {"light_level": {"min": 200, "max": 2000}}}
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+def engine_with_clock(rules=None):
+    clock = FakeClock()
+    switches = []
+    engine = AutomationEngine(actuate=lambda device, state: switches.append((clock.now, device, state)), clock=clock, log=lambda message: None,
+                              **({'rules': rules} if rules else {}))
+    engine.set_thresholds(THRESHOLDS)
+    return engine, clock, switches
+def feed(engine, clock, values, step=2.0):
+    for value in values:
+        engine.evaluate(SensorReading(light_level=value))
+        clock.now += step
+def chatter(hours, seed):
+    """Число переключений на зашумленном освещении около порога: голое сравнение против гистерезиса и минимального времени"""
+    rng = random.Random(seed)
+    values = [200 + 60 * math.sin(i / 300) + rng.gauss(0, 25) for i in range(int(hours * 3600 / 2))]
+    naive_rules = (AutomationRule("LED", "light_level", "min", "below", 0.0, 0.0, 0.0),)
+    naive, naive_clock, naive_switches = engine_with_clock(naive_rules)
+    feed(naive, naive_clock, values)
+    engine, clock, switches = engine_with_clock()
+    feed(engine, clock, values)
+    print(f"Шумное освещение около порога, {hours:g} ч: без гистерезиса {len(naive_switches)} переключений лампы, "
+          f"с гистерезисом и минимальным временем {len(switches)}")
+def bench_evaluate(repeat):
+    engine, clock, _ = engine_with_clock()
+    readings = [SensorReading(temperature=23.0, light_level=200 + (i % 7)) for i in range(1000)]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for reading in readings:
+            engine.evaluate(reading)
+    return (time.perf_counter() - start) * 1e6 / (repeat * len(readings))
+def loopback(switches):
+    """Время от поступления показания до переключения реле в имитации Arduino"""
+    simulator, port_name = SimulatedArduino.open_pty(interval=60)
+    port = serial.Serial(port_name, 9600, timeout=0.2)
+    actor = SerialPortActor(port, log=print)
+    actor.start()
+    simulator.start()
+    rules = (AutomationRule("LED", "light_level", "min", "below", 50.0, 0.0, 0.0),)
+    engine = AutomationEngine(rules, actuate=lambda device, state: actor.send_command(device, state) and True, log=lambda message: None)
+    engine.set_thresholds(THRESHOLDS)
+    latencies = []
+    try:
+        for i in range(switches):
+            target = 1 if i % 2 == 0 else 0
+            start = time.perf_counter()
+            engine.evaluate(SensorReading(light_level=100 if target else 400))
+            while simulator.led_state != target:
+                if time.perf_counter() - start > 2:
+                    raise AssertionError("Команда автоматики не дошла до Arduino")
+                time.sleep(0.0002)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        actor.close()
+        simulator.stop()
+    latencies.sort()
+    print(f"От показания до реле (через pty): p50 {latencies[len(latencies) // 2] * 1000:.2f} мс, max {latencies[-1] * 1000:.2f} мс")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Локальная автоматика: дребезг и задержка реакции; сценарии правил проверяет tests/test_automation.py")
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--switches", type=int, default=20)
+    args = parser.parse_args()
+    chatter(args.hours, 429)
+    print(f"AutomationEngine.evaluate: {bench_evaluate(20):.2f} мкс на показание")
+    loopback(args.switches)
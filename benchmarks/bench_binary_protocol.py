@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import argparse
+import serial
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sensor_protocol import (SensorLineParser, SensorReading, FRAME_SENSOR, encode_frame,
+                             encode_sensor_body, decode_frame, decode_sensor_body)
+from serial_io import SerialPortActor
+from arduino_sim import SimulatedArduino
+TEXT_CYCLE = [
+    b"Soil moisture: 47%\r\n",
+    b"Humidity: 41.30% Temperature: 23.80\xc2\xb0C\r\n",
+    b"Light level: 312.50 lx\r\n",
+]
+def bench_decoders(repeat):
+    """Сравнивает стоимость получения одного полного набора показаний: текст против кадра"""
+    parser = SensorLineParser()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for raw in TEXT_CYCLE:
+            parser.parse(raw.decode('utf-8', errors='replace').strip())
+    text_time = time.perf_counter() - start
+    reading = SensorReading(temperature=23.8, humidity=41.3, soil_moisture=47.0, light_level=312.5)
+    frame = encode_frame(FRAME_SENSOR, 1, encode_sensor_body(reading, 1, 0))[:-1]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        _, _, body = decode_frame(frame)
+        decode_sensor_body(body)
+    frame_time = time.perf_counter() - start
+    text_bytes = sum(len(raw) for raw in TEXT_CYCLE)
+    print(f"Текст:  {text_time * 1e6 / repeat:.2f} мкс на набор показаний, {text_bytes} байт")
+    print(f"Кадр:   {frame_time * 1e6 / repeat:.2f} мкс на набор показаний, {len(frame) + 1} байт")
+    print(f"Ускорение декодирования: {text_time / frame_time:.2f}x, объем меньше в {text_bytes / (len(frame) + 1):.1f} раза")
+def loopback(readings, baud_rate, commands=20):
+    """Время подтверждения команды и прием кадров на имитации Arduino; поведение проверяют tests/test_serial_io.py"""
+    simulator, port_name = SimulatedArduino.open_pty(interval=0.01)
+    port = serial.Serial(port_name, 9600, timeout=0.2)
+    actor = SerialPortActor(port, log=print)
+    actor.start()
+    simulator.start()
+    try:
+        if not actor.enable_binary(baud_rate, log=print):
+            return
+        latencies = []
+        for i in range(commands):
+            start = time.perf_counter()
+            actor.send_command("LED", 1 - i % 2).result(timeout=3)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        print(f"Подтверждение команды: p50 {latencies[len(latencies) // 2] * 1000:.2f} мс, max {latencies[-1] * 1000:.2f} мс")
+        received = 0
+        start = time.perf_counter()
+        deadline = time.monotonic() + 10
+        while received < readings and time.monotonic() < deadline:
+            if isinstance(actor.get(timeout=0.5), SensorReading):
+                received += 1
+        print(f"Петля: {received} кадров показаний за {time.perf_counter() - start:.2f} с; {actor.format_stats()}")
+    finally:
+        actor.close()
+        simulator.stop()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бинарный протокол: бенчмарк декодера и время обмена с имитацией Arduino")
+    parser.add_argument("--repeat", type=int, default=100000)
+    parser.add_argument("--readings", type=int, default=200)
+    parser.add_argument("--baud", type=int, default=115200)
+    args = parser.parse_args()
+    bench_decoders(args.repeat)
+    loopback(args.readings, args.baud)
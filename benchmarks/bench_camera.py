@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from camera import CameraManager
+class FakeCapture:
+    """Имитация cv2.VideoCapture: медленное открытие, кадры с частотой fps и автоэкспозиция, выходящая на режим за несколько кадров"""
+    def __init__(self, index, open_delay=0.5, fps=30, settle_frames=4, size=(480, 640)):
+        time.sleep(open_delay)
+        self.index = index
+        self.opened = index == 0
+        self.frame_interval = 1.0 / fps
+        self.settle_frames = settle_frames
+        self.size = size
+        self.produced = 0
+    def isOpened(self):
+        return self.opened
+    def set(self, prop, value):
+        return True
+    def grab(self):
+        if not self.opened:
+            return False
+        time.sleep(self.frame_interval)
+        self.produced += 1
+        return True
+    def read(self):
+        if not self.grab():
+            return False, None
+        brightness = int(128 * (1 - 0.5 ** (self.produced * 4 / self.settle_frames)))
+        return True, np.full(self.size + (3,), brightness, dtype=np.uint8)
+    def release(self):
+        self.opened = False
+def per_photo_capture(factory, index):
+    """Прежний способ: открыть камеру, взять один кадр и закрыть"""
+    capture = factory(index)
+    if not capture.isOpened():
+        return None
+    ok, frame = capture.read()
+    capture.release()
+    return frame if ok else None
+def run(photos, open_delay, warmup, fps):
+    factory = lambda index: FakeCapture(index, open_delay=open_delay, fps=fps)
+    start = time.perf_counter()
+    old_frames = [per_photo_capture(factory, 0) for _ in range(photos)]
+    old_time = (time.perf_counter() - start) / photos
+    camera = CameraManager(0, warmup_frames=warmup, source_factory=factory)
+    timings = []
+    new_frames = []
+    for _ in range(photos):
+        start = time.perf_counter()
+        new_frames.append(camera.read())
+        timings.append(time.perf_counter() - start)
+    print(f"Открытие на каждое фото: {old_time * 1000:.0f} мс на кадр, яркость кадра {old_frames[0].mean():.0f} из 128")
+    print(f"Общее подключение: первый кадр {timings[0] * 1000:.0f} мс (открытие и прогрев {warmup} кадров), "
+          f"следующие {np.median(timings[1:]) * 1000:.0f} мс, яркость {new_frames[0].mean():.0f} из 128; открытий {camera.stats()['opens']}")
+    camera.release()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Общее подключение к камере против открытия VideoCapture на каждое фото (на имитации камеры); поведение CameraManager проверяет tests/test_camera.py")
+    parser.add_argument("--photos", type=int, default=10)
+    parser.add_argument("--open-delay", type=float, default=0.5, help="время открытия камеры, с")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--fps", type=int, default=30)
+    args = parser.parse_args()
+    run(args.photos, args.open_delay, args.warmup, args.fps)
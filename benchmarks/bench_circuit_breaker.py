@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from farm_api import FarmApiClient, ResponseCache
+from network_engine import NetworkEngine
+from device_control import DeviceController
+from mock_farm_server import MockFarmServer
+def outage(breaker, check_interval, outage_time, latency):
+    """Задача устройств во время отказа сервера в масштабе времени check_interval/5: паузы предохранителя - как у приложения"""
+    server = MockFarmServer().start()
+    server.state.latency = latency
+    messages = []
+    options = {} if breaker else {'failure_threshold': 10 ** 9}
+    scale = check_interval / 5
+    client = FarmApiClient(base_url=server.base_url, retries=0, log=messages.append, cache=ResponseCache(ttls={}),
+                           breaker_base_delay=2.0 * scale, breaker_max_delay=120.0 * scale, **options)
+    engine = NetworkEngine(workers=4, log=print).start()
+    controller = DeviceController(client, None, engine, check_interval=check_interval, thresholds_interval=10 ** 9, push=False,
+                                  log=messages.append)
+    controller.follow_server = False
+    try:
+        engine.spawn("devices", controller.run)
+        time.sleep(check_interval * 3)
+        server.set_failing(503)
+        before = sum(server.state.requests.values())
+        stats_before = client.stats()
+        time.sleep(latency * 5)
+        server.set_device_state(lamp=1)
+        time.sleep(outage_time)
+        server.recover()
+        recovered_at = time.perf_counter()
+        outage_requests = sum(server.state.requests.values()) - before
+        stats = client.stats()
+        logged = len(messages)
+        while controller.server_states["LED"] != 1 and time.perf_counter() - recovered_at < 60:
+            time.sleep(0.005)
+        recovery = time.perf_counter() - recovered_at
+    finally:
+        engine.stop()
+        client.close()
+        server.stop()
+    busy = (stats['avg_ms'] * stats['requests'] - stats_before['avg_ms'] * stats_before['requests']) / 1000
+    print(f"{'С предохранителем' if breaker else 'Без предохранителя'}: за {outage_time:g} с отказа {outage_requests} запросов к серверу, "
+          f"{busy:.1f} с в ожидании ответов, {logged} сообщений в журнале; "
+          f"первый успешный опрос через {recovery:.2f} с после восстановления")
+    return outage_requests
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Предохранитель API: поведение задачи устройств во время отказа сервера")
+    parser.add_argument("--interval", type=float, default=0.1, help="check_interval задачи устройств, с (в приложении 5 с)")
+    parser.add_argument("--outage", type=float, default=6.0, help="длительность отказа сервера, с (6 с при интервале 0.1 - 5 минут)")
+    parser.add_argument("--latency", type=float, default=0.02, help="задержка ответа сервера, с (0.02 при интервале 0.1 - 1 с)")
+    args = parser.parse_args()
+    plain = outage(False, args.interval, args.outage, args.latency)
+    guarded = outage(True, args.interval, args.outage, args.latency)
+    print(f"Запросов во время отказа меньше в {plain / max(1, guarded):.1f} раза")
@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import tempfile
+import subprocess
+from arduino_sim import SimulatedArduino
+from mock_farm_server import MockFarmServer
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEADLESS_READY = "🚀 Система запущена без интерфейса"
+GUI_READY = "READY"
+GUI_DRIVER = f"""
+import sys
+sys.path.insert(0, {ROOT!r})
+from PyQt6.QtWidgets import QApplication, QMessageBox
+QMessageBox.information = QMessageBox.warning = lambda *args, **kwargs: None
+app = QApplication(sys.argv)
+import FitoDomik
+FitoDomik.API_CLIENT.base_url = sys.argv[1]
+window = FitoDomik.FarmControlApp()
+window.show()
+window.start_system()
+app.processEvents()
+print({GUI_READY!r}, flush=True)
+sys.exit(app.exec())
+"""
+def process_memory(pid):
+    """VmRSS и VmHWM процесса в МБ и загружен ли в него Qt (Linux, /proc)"""
+    with open(f"/proc/{pid}/status") as f:
+        status = dict(line.split(":", 1) for line in f if ":" in line)
+    with open(f"/proc/{pid}/maps") as f:
+        qt_loaded = any("Qt6" in line for line in f)
+    return int(status['VmRSS'].split()[0]) / 1024, int(status['VmHWM'].split()[0]) / 1024, qt_loaded
+def run_process(name, command, ready, home, server, settle):
+    """Запускает процесс, ждет строки готовности, через settle с снимает память и останавливает SIGTERM"""
+    simulator, port_name = SimulatedArduino.open_pty(interval=0.2)
+    simulator.start()
+    with open(os.path.join(home, "fitodomik_config.json"), 'w', encoding='utf-8') as f:
+        json.dump({'serial_port': port_name, 'baud_rate': 9600, 'sensor_interval': 1}, f)
+    environment = dict(os.environ, HOME=home, QT_QPA_PLATFORM="offscreen", PYTHONUNBUFFERED="1")
+    records_before = len(server.state.sensor_records)
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, env=environment, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True, encoding='utf-8')
+    output = []
+    startup = None
+    for line in process.stdout:
+        output.append(line)
+        if ready in line:
+            startup = time.perf_counter() - started
+            break
+    if startup is None:
+        process.wait()
+        simulator.stop()
+        raise RuntimeError(f"{name}: процесс завершился до готовности:\n{''.join(output)}")
+    time.sleep(settle)
+    rss, peak, qt_loaded = process_memory(process.pid)
+    stopping = time.perf_counter()
+    process.send_signal(signal.SIGTERM)
+    try:
+        output += process.communicate(timeout=30)[0].splitlines(keepends=True)
+        code = process.returncode
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+        code = None
+    shutdown = time.perf_counter() - stopping
+    simulator.stop()
+    return {
+        'startup': startup,
+        'rss': rss,
+        'peak': peak,
+        'qt': qt_loaded,
+        'records': len(server.state.sensor_records) - records_before,
+        'shutdown': shutdown,
+        'code': code,
+        'clean': any("Система остановлена" in line for line in output)
+    }
+def run(settle, modes):
+    server = MockFarmServer().start()
+    commands = {
+        "без интерфейса": ([sys.executable, "FitoDomik.py", "--headless", "--server", server.base_url], HEADLESS_READY),
+        "интерфейс Qt": ([sys.executable, "-c", GUI_DRIVER, server.base_url], GUI_READY)
+    }
+    print(f"{'режим':<16}{'запуск, с':>10}{'RSS, МБ':>9}{'пик, МБ':>9}{'Qt':>5}{'записей':>9}{'остановка, с':>14}{'код':>5}  штатно")
+    try:
+        for name in modes:
+            command, ready = commands[name]
+            with tempfile.TemporaryDirectory() as home:
+                result = run_process(name, command, ready, home, server, settle)
+            code = "-" if result['code'] is None else result['code']
+            print(f"{name:<16}{result['startup']:>10.2f}{result['rss']:>9.1f}{result['peak']:>9.1f}{'да' if result['qt'] else 'нет':>5}"
+                  f"{result['records']:>9}{result['shutdown']:>14.2f}{code:>5}  {'да' if result['clean'] else 'нет'}")
+    finally:
+        server.stop()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Запуск, память и остановка по SIGTERM: режим без интерфейса против приложения Qt")
+    parser.add_argument("--settle", type=float, default=5.0, help="секунд работы перед замером памяти")
+    parser.add_argument("--modes", nargs="+", default=["без интерфейса", "интерфейс Qt"])
+    args = parser.parse_args()
+    run(args.settle, args.modes)
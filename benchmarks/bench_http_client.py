@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+import requests
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from farm_api import FarmApiClient, ResponseCache, LED_ENDPOINT, CURTAINS_ENDPOINT, THRESHOLDS_ENDPOINT
+from mock_farm_server import MockFarmServer
+ENDPOINTS = [LED_ENDPOINT, CURTAINS_ENDPOINT, THRESHOLDS_ENDPOINT]
+def run_requests(get, count, workers):
+    """Выполняет count GET-запросов из workers потоков; возвращает задержки в секундах"""
+    def one(i):
+        start = time.perf_counter()
+        response = get(ENDPOINTS[i % len(ENDPOINTS)])
+        assert response.status_code == 200, response.status_code
+        return time.perf_counter() - start
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(one, range(count)))
+def report(name, timings, connections):
+    timings = sorted(timings)
+    p50 = statistics.median(timings) * 1000
+    p95 = timings[int(len(timings) * 0.95) - 1] * 1000
+    print(f"{name}: p50 {p50:.2f} мс, p95 {p95:.2f} мс, новых TCP-соединений {connections} на {len(timings)} запросов")
+    return p50
+def run(count, workers, token):
+    server = MockFarmServer(token).start()
+    try:
+        def bare_get(endpoint):
+            return requests.get(server.url(endpoint), headers={'X-Auth-Token': token}, timeout=5)
+        bare = run_requests(bare_get, count, workers)
+        bare_connections = server.state.connections
+        bare_p50 = report("requests.get  ", bare, bare_connections)
+        client = FarmApiClient(token, base_url=server.base_url, pool_size=workers, cache=ResponseCache(ttls={}))
+        server.state.connections = 0
+        pooled = run_requests(client.get, count, workers)
+        pooled_connections = server.state.connections
+        pooled_p50 = report("FarmApiClient ", pooled, pooled_connections)
+        client.close()
+        assert pooled_connections <= workers, f"Пул открыл {pooled_connections} соединений при {workers} потоках"
+        server.set_failing(503)
+        client = FarmApiClient(token, base_url=server.base_url, retries=2, backoff=0.01, cache=ResponseCache(ttls={}))
+        before = server.state.requests.get(LED_ENDPOINT, 0)
+        response = client.get(LED_ENDPOINT)
+        retried = server.state.requests.get(LED_ENDPOINT, 0) - before
+        client.close()
+        assert response.status_code == 503 and retried == 3, (response.status_code, retried)
+        print(f"Повторы: GET при 503 выполнен {retried} раза, затем возвращен ответ сервера")
+        print(f"Задержка меньше в {bare_p50 / pooled_p50:.2f} раза, соединений меньше в {bare_connections / max(1, pooled_connections):.0f} раз")
+    finally:
+        server.stop()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Общий пул HTTP-соединений против отдельного соединения на каждый запрос")
+    parser.add_argument("--count", type=int, default=600)
+    parser.add_argument("--workers", type=int, default=3, help="число потоков, как у потоков датчиков, устройств и фото")
+    parser.add_argument("--token", default="bench-token")
+    args = parser.parse_args()
+    run(args.count, args.workers, args.token)
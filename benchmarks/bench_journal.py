@@ -0,0 +1,129 @@
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PyQt6.QtWidgets import QApplication, QTextEdit
+from journal import Journal, JournalFilter, IMPORTANT_MESSAGES, REPORT_SEPARATOR
+from FitoDomik import JournalModel, JournalView
+MINUTES_PER_DAY = 24 * 60
+def linear_filter(message):
+    """Прежний отбор: перебор подстрок списком на каждое сообщение"""
+    if message.startswith("❌") or "ошибка" in message.lower() or "ERROR" in message.upper():
+        return True
+    for important_msg in IMPORTANT_MESSAGES:
+        if important_msg in message:
+            return True
+    return REPORT_SEPARATOR in message
+def report(record_id, moment, rng):
+    return (f"📅 {moment.strftime('%Y-%m-%d %H:%M:%S')}\n{REPORT_SEPARATOR}\n"
+            f"🆔 ID записи:              {record_id}\n"
+            f"🌡️ Температура воздуха:    {rng.uniform(18, 28):.1f}°C\n"
+            f"💧 Влажность воздуха:      {rng.uniform(40, 70):.1f}%\n"
+            f"🌱 Влажность почвы:        {rng.uniform(30, 80):.1f}%\n"
+            f"🔆 Уровень освещенности:   {rng.uniform(100, 900):.2f} lx\n"
+            f"🫧 CO₂ уровень:            400 ppm\n"
+            f"🌬️ Атм. давление:          1013.25 hPa\n"
+            f"💡 Лампа:                  выключена\n"
+            f"🪟 Шторы:                  открыты\n"
+            f"📦 Показаний за интервал:  30\n{REPORT_SEPARATOR}")
+def minute_messages(minute, start, rng):
+    """Сообщения одной минуты работы: показания каждые 2 с (в журнал не попадают), отчет об отправке, раз в час - фото и сбой сети"""
+    moment = start + timedelta(minutes=minute)
+    messages = [f"📊 Получены данные: Temperature: {rng.uniform(18, 28):.1f} C, Humidity: {rng.uniform(40, 70):.1f} %" for _ in range(30)]
+    messages.append(f"Используем ID {minute + 1} для новой записи")
+    messages.append(report(minute + 1, moment, rng))
+    if minute % 60 == 0:
+        messages += ["📸 Делаем фото с камеры...", "🔍 Анализируем изображение растения...", "✅ Фото успешно загружено для пользователя с ID: 1",
+                     "❌ Ошибка получения состояния лампы: HTTP 503"]
+    return moment, messages
+def process_memory():
+    try:
+        with open("/proc/self/status") as f:
+            status = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(status['VmRSS'].split()[0]) / 1024
+    except OSError:
+        return float('nan')
+class TextEditJournal:
+    """Прежний журнал: каждое сообщение сразу дописывается в QTextEdit и прокручивается вниз"""
+    def __init__(self):
+        self.widget = QTextEdit()
+        self.widget.setReadOnly(True)
+        self.widget.resize(900, 600)
+        self.widget.show()
+    def log(self, message, moment):
+        if not linear_filter(message):
+            return
+        if not message.startswith("📅"):
+            message = f"{moment.strftime('%Y-%m-%d %H:%M:%S')} - {message}"
+        self.widget.append(message)
+        self.widget.verticalScrollBar().setValue(self.widget.verticalScrollBar().maximum())
+    def flush(self):
+        pass
+    def lines(self):
+        return self.widget.document().blockCount()
+class RingJournal:
+    """Новый журнал: кольцевой буфер, модель и вид журнала приложения с выводом пачками"""
+    def __init__(self, capacity):
+        self.journal = Journal(capacity)
+        self.model = JournalModel(self.journal)
+        self.widget = JournalView(self.model)
+        self.widget.resize(900, 600)
+        self.widget.show()
+    def log(self, message, moment):
+        self.journal.add(message, moment)
+    def flush(self):
+        if self.model.flush():
+            self.widget.scrollToBottom()
+    def lines(self):
+        return len(self.journal)
+def soak(app, journal, days, seed):
+    """Прогоняет days суток сообщений; вывод на экран - раз в минуту моделируемого времени; печатает по суткам"""
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    print(f"{'сутки':>6}{'сообщений':>11}{'строк':>9}{'мкс/сообщ.':>12}{'RSS, МБ':>9}")
+    for day in range(days):
+        count = 0
+        began = time.perf_counter()
+        for minute in range(day * MINUTES_PER_DAY, (day + 1) * MINUTES_PER_DAY):
+            moment, messages = minute_messages(minute, start, rng)
+            for message in messages:
+                journal.log(message, moment)
+            count += len(messages)
+            journal.flush()
+            app.processEvents()
+        elapsed = time.perf_counter() - began
+        print(f"{day + 1:>6}{count:>11}{journal.lines():>9}{elapsed / count * 1e6:>12.1f}{process_memory():>9.1f}")
+def filter_speed(seed, rounds=3):
+    rng = random.Random(seed)
+    messages = []
+    for minute in range(200):
+        messages += minute_messages(minute, datetime(2026, 1, 1), rng)[1]
+    compiled = JournalFilter()
+    for name, accept in (("перебор списка", linear_filter), ("скомпилированное выражение", compiled)):
+        best = min(timed(accept, messages) for _ in range(rounds))
+        print(f"  {name:<28}{best / len(messages) * 1e6:>8.2f} мкс/сообщение")
+    assert [linear_filter(message) for message in messages] == [compiled(message) for message in messages], "Фильтры разошлись"
+def timed(accept, messages):
+    began = time.perf_counter()
+    for message in messages:
+        accept(message)
+    return time.perf_counter() - began
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Журнал: отбор сообщений, время вывода и память за многодневную работу")
+    parser.add_argument("--days", type=int, default=7, help="суток для кольцевого журнала")
+    parser.add_argument("--old-days", type=int, default=1, help="суток для прежнего QTextEdit (0 - пропустить)")
+    parser.add_argument("--capacity", type=int, default=20000, help="строк в кольцевом буфере")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    app = QApplication(sys.argv)
+    print("Отбор сообщений:")
+    filter_speed(args.seed)
+    print(f"\nКольцевой буфер на {args.capacity} строк, вывод пачками:")
+    soak(app, RingJournal(args.capacity), args.days, args.seed)
+    if args.old_days:
+        print("\nПрежний QTextEdit, вывод каждого сообщения:")
+        soak(app, TextEditJournal(), args.old_days, args.seed)
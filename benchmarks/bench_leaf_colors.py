@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+import cv2
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from plant_analysis import LEAF_COLORS, detect_plant
+from synthetic_plants import RESOLUTIONS, synthetic_plant
+def detect_plant_reference(image):
+    """Прежняя реализация PlantPhotoThread.detect_plant: inRange по каждому классу дважды, морфология по каждому классу"""
+    height, width = image.shape[:2]
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    detection_image = image.copy()
+    total_mask = np.zeros((height, width), dtype=np.uint8)
+    for color_name, color_range in LEAF_COLORS.items():
+        mask = cv2.inRange(hsv, color_range["lower"], color_range["upper"])
+        kernel = np.ones((3,3), np.uint8)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+        total_mask = cv2.bitwise_or(total_mask, mask)
+    contours, _ = cv2.findContours(total_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    filtered_contours = [contour for contour in contours if cv2.contourArea(contour) > 100]
+    cv2.drawContours(detection_image, filtered_contours, -1, (0, 255, 0), 2)
+    plant_mask = np.zeros_like(total_mask)
+    cv2.drawContours(plant_mask, filtered_contours, -1, 255, -1)
+    color_percentages = {}
+    plant_pixels = np.count_nonzero(plant_mask)
+    if plant_pixels > 0:
+        for color_name, color_range in LEAF_COLORS.items():
+            mask = cv2.inRange(hsv, color_range["lower"], color_range["upper"])
+            color_pixels = cv2.countNonZero(cv2.bitwise_and(mask, plant_mask))
+            color_percentages[color_name] = (color_pixels / plant_pixels) * 100
+    return detection_image, plant_mask, color_percentages
+def timed(func, image, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(image)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+def run(resolutions, repeat, threads):
+    cv2.setNumThreads(threads)
+    for name in resolutions:
+        width, height = RESOLUTIONS[name]
+        image = synthetic_plant(width, height)
+        percentages = detect_plant(image)[2]
+        reference = timed(detect_plant_reference, image, repeat)
+        single_pass = timed(detect_plant, image, repeat)
+        shares = ", ".join(f"{key} {value:.1f}%" for key, value in percentages.items())
+        print(f"{name} ({width}x{height}): прежний {reference:.1f} мс, один проход {single_pass:.1f} мс ({reference / single_pass:.2f}x); "
+              f"доли цветов: {shares}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Классификация цветов листьев: таблица LUT и гистограмма меток против inRange по каждому классу")
+    parser.add_argument("--resolutions", nargs="+", default=["1080p", "4k"], choices=sorted(RESOLUTIONS))
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--threads", type=int, default=1, help="потоков OpenCV (1 - как на Raspberry Pi под нагрузкой)")
+    args = parser.parse_args()
+    run(args.resolutions, args.repeat, args.threads)
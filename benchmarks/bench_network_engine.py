@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from farm_api import FarmApiClient
+from network_engine import NetworkEngine
+from device_control import DeviceController
+from sensor_store import SensorOutbox, OUTBOX_SENT, OUTBOX_RETRY
+from mock_farm_server import MockFarmServer
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+def run(repeat, latency, records):
+    server = MockFarmServer().start()
+    server.state.latency = latency
+    client = FarmApiClient(base_url=server.base_url)
+    engine = NetworkEngine(workers=4, log=print).start()
+    controller = DeviceController(client, None, engine, push=False, log=lambda message: None)
+    controller.states = {"LED": 0, "CURTAINS": 0}
+    try:
+        sequential = measure(lambda: (controller.fetch_state("LED"), controller.fetch_state("CURTAINS")), repeat)
+        concurrent = measure(lambda: engine.submit(controller.poll_once()).result(), repeat)
+        print(f"Опрос лампы и штор при задержке сервера {latency * 1000:.0f} мс: последовательно {sequential:.1f} мс, "
+              f"в движке {concurrent:.1f} мс ({sequential / concurrent:.2f}x)")
+        with tempfile.TemporaryDirectory() as directory:
+            def send(payload, key):
+                response = client.post("save-sensor-data.php", data=payload, headers={'Idempotency-Key': key})
+                return OUTBOX_SENT if response.status_code == 200 else OUTBOX_RETRY
+            outbox = SensorOutbox(os.path.join(directory, "outbox.db"), send, log=print)
+            outbox.open()
+            for i in range(records):
+                outbox.enqueue({'id': i + 1, 'temperature': 21.5})
+            start = time.perf_counter()
+            engine.spawn("sensor_outbox", outbox.run_async, engine.call)
+            deadline = time.monotonic() + 30
+            while len(server.state.sensor_records) < records and time.monotonic() < deadline:
+                time.sleep(0.01)
+            elapsed = time.perf_counter() - start
+            engine.spawn("devices", controller.run)
+            time.sleep(0.2)
+            engine_threads = engine.thread_count()
+            engine.cancel("sensor_outbox")
+            engine.cancel("devices")
+            outbox.stop()
+            assert len(server.state.sensor_records) == records, f"Доставлено {len(server.state.sensor_records)} из {records}"
+            print(f"Очередь выгрузки в движке: {records} записей за {elapsed:.2f} с")
+        print(f"Сетевых потоков: движок {engine_threads} (цикл + пул), было до 8 "
+              f"(управление устройствами, отправка очереди + 4 потока пула, расписание фото, загрузка в потоке фото)")
+    finally:
+        engine.stop()
+        client.close()
+        server.stop()
+    leftover = [thread.name for thread in threading.enumerate() if thread.name.startswith("NetworkEngine")]
+    assert not leftover, f"После остановки остались потоки: {leftover}"
+    print("Остановка движка: все задачи отменены, потоки завершены")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сетевой движок asyncio: параллельный опрос устройств и число потоков")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.08, help="искусственная задержка сервера на запрос, с")
+    parser.add_argument("--records", type=int, default=100)
+    args = parser.parse_args()
+    run(args.repeat, args.latency, args.records)
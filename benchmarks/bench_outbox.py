@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import requests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sensor_store import SensorOutbox, OUTBOX_SENT, OUTBOX_RETRY, OUTBOX_REJECTED
+from mock_farm_server import MockFarmServer
+def make_sender(url):
+    def send(payload, key):
+        response = requests.post(url, data=payload, headers={'Idempotency-Key': key}, timeout=5)
+        if response.status_code == 200:
+            return OUTBOX_SENT if response.json().get('success') else OUTBOX_REJECTED
+        return OUTBOX_RETRY
+    return send
+def wait_until(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+def run(count):
+    """Сценарий: сервер лежит, приложение перезапускается, сервер поднимается, часть ответов теряется"""
+    server = MockFarmServer().start()
+    send = make_sender(server.url("save-sensor-data.php"))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "outbox.db")
+        server.set_failing(503)
+        outbox = SensorOutbox(path, send, retry_interval=0.2, max_retry_interval=1.0, log=print)
+        outbox.start()
+        for i in range(count):
+            outbox.enqueue({'id': i + 1, 'temperature': 20.0 + i % 5})
+        time.sleep(0.5)
+        assert not server.state.sensor_records, "Сервер недоступен, но записи дошли"
+        outbox.stop()
+        outbox = SensorOutbox(path, send, retry_interval=0.2, max_retry_interval=1.0, log=print)
+        outbox.open()
+        pending = outbox.pending_count()
+        assert pending == count, f"После перезапуска в очереди {pending} вместо {count}"
+        print(f"После перезапуска в очереди: {pending} записей")
+        server.state.drop_responses = count // 4
+        server.recover()
+        start = time.perf_counter()
+        outbox.start()
+        assert wait_until(lambda: outbox.pending_count() == 0, 30), "Очередь не опустела"
+        elapsed = time.perf_counter() - start
+        outbox.stop()
+    server.stop()
+    ids = [int(record['id']) for record in server.state.sensor_records]
+    assert len(ids) == count and len(set(ids)) == count, f"Дубликаты или потери: {len(ids)} записей, {len(set(ids))} уникальных"
+    print(f"Доставлено {count} записей за {elapsed:.2f} с ({count / elapsed:.0f} записей/с)")
+    print(f"Повторов, отсеянных по ключу идемпотентности: {server.state.duplicates}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Очередь выгрузки показаний: отказ сервера, перезапуск и повторная отправка")
+    parser.add_argument("--count", type=int, default=200)
+    args = parser.parse_args()
+    run(args.count)
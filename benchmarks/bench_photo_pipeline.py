@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+import argparse
+import threading
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from farm_api import FarmApiClient, UPLOAD_ENDPOINT
+from plant_analysis import detect_plant, analyze_health, format_report, encode_jpeg
+from photo_pipeline import PhotoPipeline, PHOTO_SCHEDULED
+from synthetic_plants import synthetic_plant
+from mock_farm_server import MockFarmServer
+class Photographer:
+    """Стадии фото как в приложении: кадр с камеры, анализ и JPEG в памяти, загрузка multipart на заглушку сервера"""
+    def __init__(self, client, frame, capture_time):
+        self.client = client
+        self.frame = frame
+        self.capture_time = capture_time
+    def capture(self):
+        time.sleep(self.capture_time)
+        return self.frame.copy()
+    def analyze(self, job):
+        job.detection_image, _, color_percentages = detect_plant(job.frame, max_side=960)
+        job.analysis = analyze_health(color_percentages)
+        data = {'text': format_report(job.analysis, datetime.now()), 'has_analysis': 'true'}
+        files = {'image': ('original.jpg', encode_jpeg(job.frame), 'image/jpeg'),
+                 'analysis_image': ('analysis.jpg', encode_jpeg(job.detection_image), 'image/jpeg')}
+        return data, files
+    def upload(self, job):
+        data, files = job.payload
+        try:
+            return self.client.post_multipart(UPLOAD_ENDPOINT, data, files, timeout=60).status_code == 200
+        except Exception:
+            return False
+def blocking(photographer, ticks, interval):
+    """Прежняя схема: планировщик ждет съемку, анализ и загрузку; возвращает задержки срабатываний расписания"""
+    lateness = []
+    start = time.perf_counter()
+    for tick in range(ticks):
+        due = start + tick * interval
+        time.sleep(max(0.0, due - time.perf_counter()))
+        lateness.append(time.perf_counter() - due)
+        job = type("Job", (), {})()
+        job.frame = photographer.capture()
+        job.payload = photographer.analyze(job)
+        photographer.upload(job)
+    return lateness
+def pipelined(photographer, ticks, interval, drain):
+    """Конвейер: планировщик только ставит запрос; возвращает задержки срабатываний и наибольшую длину очереди загрузки"""
+    pipeline = PhotoPipeline(photographer.capture, photographer.analyze, photographer.upload, retry_interval=interval, log=lambda message: None)
+    depth = [0]
+    watching = threading.Event()
+    def watch():
+        while not watching.wait(0.01):
+            depth[0] = max(depth[0], pipeline.stats()['queued'])
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    lateness = []
+    request_times = []
+    start = time.perf_counter()
+    for tick in range(ticks):
+        due = start + tick * interval
+        time.sleep(max(0.0, due - time.perf_counter()))
+        lateness.append(time.perf_counter() - due)
+        began = time.perf_counter()
+        pipeline.request(PHOTO_SCHEDULED)
+        request_times.append(time.perf_counter() - began)
+    deadline = time.perf_counter() + drain
+    while pipeline.stats()['queued'] and time.perf_counter() < deadline:
+        time.sleep(0.05)
+    watching.set()
+    pipeline.stop()
+    return lateness, max(request_times), depth[0], pipeline.stats()
+def run(ticks, interval, latency, capture_time, fail_ticks):
+    server = MockFarmServer().start()
+    client = FarmApiClient(base_url=server.base_url, retries=0, failure_threshold=10 ** 9)
+    photographer = Photographer(client, synthetic_plant(1920, 1080), capture_time)
+    try:
+        for scenario, failing in (("медленный сервер", False), ("медленный сервер и отказ", True)):
+            server.state.latency = latency
+            if failing:
+                server.set_failing(503)
+                threading.Timer(fail_ticks * interval, server.recover).start()
+            before = len(server.state.uploads)
+            old_lateness = blocking(photographer, ticks, interval)
+            old_uploads = len(server.state.uploads) - before
+            server.recover()
+            if failing:
+                server.set_failing(503)
+                threading.Timer(fail_ticks * interval, server.recover).start()
+            before = len(server.state.uploads)
+            new_lateness, request_time, depth, stats = pipelined(photographer, ticks, interval, drain=latency * 4 + interval * 8)
+            new_uploads = len(server.state.uploads) - before
+            server.recover()
+            print(f"{scenario} ({latency:g} с на загрузку), {ticks} снимков каждые {interval:g} с:")
+            print(f"  ожидание в планировщике: опоздание срабатывания до {max(old_lateness):.2f} с, "
+                  f"загружено {old_uploads}")
+            print(f"  конвейер:                опоздание до {max(new_lateness) * 1000:.1f} мс, запрос {request_time * 1000:.2f} мс, "
+                  f"очередь загрузки до {depth}, загружено {new_uploads}, пропущено съемок {stats['dropped_requests']}, "
+                  f"отброшено {stats['dropped_uploads']}")
+    finally:
+        client.close()
+        server.stop()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Фото по расписанию: конвейер с очередями против съемки, анализа и загрузки в планировщике")
+    parser.add_argument("--ticks", type=int, default=8)
+    parser.add_argument("--interval", type=float, default=0.5, help="период съемки, с (в приложении - час или сутки)")
+    parser.add_argument("--latency", type=float, default=1.2, help="время ответа сервера на загрузку, с")
+    parser.add_argument("--capture-time", type=float, default=0.05)
+    parser.add_argument("--fail-ticks", type=int, default=3, help="сколько периодов сервер отвечает 503")
+    args = parser.parse_args()
+    run(args.ticks, args.interval, args.latency, args.capture_time, args.fail_ticks)
@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+import multiprocessing
+import cv2
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from farm_api import FarmApiClient, UPLOAD_ENDPOINT
+from plant_analysis import detect_plant, encode_jpeg, JPEG_QUALITY
+from synthetic_plants import RESOLUTIONS, synthetic_plant
+from mock_farm_server import MockFarmServer
+DATA = {'text': "Анализ состояния растений", 'timestamp': "2024-01-01 12:00:00", 'has_analysis': 'true'}
+def upload_via_files(client, original, analysis, quality, directory):
+    """Прежний способ: imwrite во временные файлы, чтение обратно в bytes, сборка multipart целиком, удаление файлов"""
+    orig_filename = os.path.join(directory, "farm_photo.jpg")
+    analysis_filename = os.path.join(directory, "farm_analysis.jpg")
+    cv2.imwrite(orig_filename, original, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    cv2.imwrite(analysis_filename, analysis, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    try:
+        with open(orig_filename, 'rb') as orig_file, open(analysis_filename, 'rb') as analysis_file:
+            files = {
+                'image': ('original.jpg', orig_file.read(), 'image/jpeg'),
+                'analysis_image': ('analysis.jpg', analysis_file.read(), 'image/jpeg')
+            }
+            return client.post(UPLOAD_ENDPOINT, data=DATA, files=files).status_code
+    finally:
+        os.remove(orig_filename)
+        os.remove(analysis_filename)
+def upload_in_memory(client, original, analysis, quality, directory):
+    """Новый способ: imencode в память и потоковая отправка multipart из буферов"""
+    files = {
+        'image': ('original.jpg', encode_jpeg(original, quality), 'image/jpeg'),
+        'analysis_image': ('analysis.jpg', encode_jpeg(analysis, quality), 'image/jpeg')
+    }
+    return client.post_multipart(UPLOAD_ENDPOINT, DATA, files).status_code
+def measure(upload, client, original, analysis, quality, directory, repeat):
+    timings = []
+    peaks = []
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        assert upload(client, original, analysis, quality, directory) == 200
+        timings.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return statistics.median(timings) * 1000, max(peaks) / 1024 / 1024
+def serve(connection):
+    """Заглушка сервера в отдельном процессе, чтобы разбор multipart не попадал в замер памяти клиента"""
+    server = MockFarmServer().start()
+    connection.send(server.base_url)
+    connection.recv()
+    server.stop()
+def run(resolutions, quality, repeat):
+    connection, child_connection = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=serve, args=(child_connection,), daemon=True)
+    process.start()
+    client = FarmApiClient(base_url=connection.recv())
+    try:
+        for name in resolutions:
+            width, height = RESOLUTIONS[name]
+            original = synthetic_plant(width, height)
+            analysis = detect_plant(original)[0]
+            sizes = len(encode_jpeg(original, quality)), len(encode_jpeg(analysis, quality))
+            with tempfile.TemporaryDirectory() as directory:
+                old_time, old_peak = measure(upload_via_files, client, original, analysis, quality, directory, repeat)
+                new_time, new_peak = measure(upload_in_memory, client, original, analysis, quality, directory, repeat)
+            print(f"{name} ({width}x{height}), JPEG {quality}, файлы {sizes[0] // 1024} + {sizes[1] // 1024} КБ:")
+            print(f"  временные файлы: {old_time:.1f} мс, пик памяти Python {old_peak:.2f} МБ")
+            print(f"  в памяти:        {new_time:.1f} мс, пик памяти Python {new_peak:.2f} МБ "
+                  f"({old_time / new_time:.2f}x по времени, {old_peak / new_peak:.2f}x по памяти)")
+    finally:
+        client.close()
+        connection.send("stop")
+        process.join(5)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Загрузка фото: JPEG в памяти и потоковый multipart против временных файлов")
+    parser.add_argument("--resolutions", nargs="+", default=["1080p", "4k"], choices=sorted(RESOLUTIONS))
+    parser.add_argument("--quality", type=int, default=JPEG_QUALITY)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.resolutions, args.quality, args.repeat)
@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+import cv2
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from plant_analysis import DEFAULT_CLASSIFIER, MIN_CONTOUR_AREA, detect_plant, analyze_health
+from synthetic_plants import RESOLUTIONS, synthetic_plant
+MIXES = {
+    "здоровое": {'yellow': 0.0, 'brown': 0.0},
+    "пожелтение": {'yellow': 0.3, 'brown': 0.02},
+    "пятна": {'yellow': 0.05, 'brown': 0.3},
+    "смешанное": {'yellow': 0.15, 'brown': 0.08}
+}
+STAGES = ("hsv", "masking", "morphology", "contours", "percentages", "health")
+def run_stages(image, classifier=DEFAULT_CLASSIFIER):
+    """Те же шаги, что detect_plant и analyze_health, с отметкой времени после каждого; возвращает ({этап: с}, доли цветов)"""
+    marks = [time.perf_counter()]
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    marks.append(time.perf_counter())
+    labels = classifier.label(hsv)
+    marks.append(time.perf_counter())
+    leaf_mask = classifier.leaf_mask(labels)
+    marks.append(time.perf_counter())
+    contours, _ = cv2.findContours(leaf_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    filtered_contours = [contour for contour in contours if cv2.contourArea(contour) > MIN_CONTOUR_AREA]
+    plant_mask = np.zeros(labels.shape, dtype=np.uint8)
+    cv2.drawContours(plant_mask, filtered_contours, -1, 255, -1)
+    marks.append(time.perf_counter())
+    color_percentages = classifier.percentages(labels, plant_mask)
+    marks.append(time.perf_counter())
+    analyze_health(color_percentages)
+    marks.append(time.perf_counter())
+    return {stage: marks[i + 1] - marks[i] for i, stage in enumerate(STAGES)}, color_percentages
+def peak_memory(image):
+    """Пик памяти, выделенной за один полный анализ кадра (буферы numpy и OpenCV учитываются tracemalloc)"""
+    tracemalloc.start()
+    detect_plant(image)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+def measure(image, repeat):
+    timings = {stage: [] for stage in STAGES}
+    totals = []
+    for _ in range(repeat):
+        stages, color_percentages = run_stages(image)
+        for stage, elapsed in stages.items():
+            timings[stage].append(elapsed)
+        start = time.perf_counter()
+        expected = detect_plant(image)[2]
+        totals.append(time.perf_counter() - start)
+        assert expected == color_percentages, "Этапы разошлись с detect_plant"
+    total = statistics.median(totals)
+    height, width = image.shape[:2]
+    return {
+        'stages_ms': {stage: round(statistics.median(values) * 1000, 3) for stage, values in timings.items()},
+        'detect_plant_ms': round(total * 1000, 3),
+        'frames_per_s': round(1 / total, 2),
+        'megapixels_per_s': round(width * height / 1e6 / total, 1),
+        'peak_mb': round(peak_memory(image) / 1024 / 1024, 2),
+        'shares': {name: round(value, 2) for name, value in color_percentages.items()}
+    }
+def environment(threads):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        'commit': commit,
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'opencv_threads': threads
+    }
+def compare(results, baseline_file, tolerance):
+    """Сравнивает время detect_plant с прежним отчетом; возвращает число замедлений больше tolerance"""
+    with open(baseline_file, encoding='utf-8') as f:
+        baseline = {(item['resolution'], item['mix']): item for item in json.load(f)['results']}
+    regressions = 0
+    for item in results:
+        previous = baseline.get((item['resolution'], item['mix']))
+        if previous is None:
+            continue
+        ratio = item['detect_plant_ms'] / previous['detect_plant_ms']
+        slower = ratio > 1 + tolerance
+        regressions += slower
+        print(f"  {item['resolution']:<6} {item['mix']:<11} {previous['detect_plant_ms']:>9.1f} -> {item['detect_plant_ms']:>9.1f} мс "
+              f"({ratio:.2f}x){' - ЗАМЕДЛЕНИЕ' if slower else ''}", file=sys.stderr)
+    return regressions
+def run(resolutions, mixes, repeat, threads, seed):
+    cv2.setNumThreads(threads)
+    results = []
+    for name in resolutions:
+        width, height = RESOLUTIONS[name]
+        for mix in mixes:
+            image = synthetic_plant(width, height, seed=seed, **MIXES[mix])
+            result = dict(resolution=name, width=width, height=height, mix=mix, **measure(image, repeat))
+            results.append(result)
+            stages = ", ".join(f"{stage} {value:.1f}" for stage, value in result['stages_ms'].items())
+            print(f"{name:<6} {mix:<11} {result['detect_plant_ms']:>8.1f} мс, {result['frames_per_s']:>6.1f} кадр/с, "
+                  f"пик {result['peak_mb']:>6.1f} МБ | {stages}", file=sys.stderr)
+    return results
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Время этапов анализа растения, пропускная способность и пик памяти в JSON")
+    parser.add_argument("--resolutions", nargs="+", default=["720p", "1080p", "4k"], choices=sorted(RESOLUTIONS))
+    parser.add_argument("--mixes", nargs="+", default=list(MIXES), choices=list(MIXES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=1, help="потоков OpenCV")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="файл JSON-отчета (по умолчанию - stdout)")
+    parser.add_argument("--compare", help="прежний JSON-отчет для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="допустимое замедление при сравнении")
+    args = parser.parse_args()
+    report = {'environment': environment(args.threads), 'repeat': args.repeat,
+              'results': run(args.resolutions, args.mixes, args.repeat, args.threads, args.seed)}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    if args.compare:
+        print(f"Сравнение с {args.compare}:", file=sys.stderr)
+        sys.exit(1 if compare(report['results'], args.compare, args.tolerance) else 0)
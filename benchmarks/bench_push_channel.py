@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+import serial
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from farm_api import FarmApiClient
+from network_engine import NetworkEngine
+from device_control import DeviceController
+from serial_io import SerialPortActor
+from arduino_sim import SimulatedArduino
+from mock_farm_server import MockFarmServer
+def wait_for(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.001)
+    return False
+def session(server, actor, simulator, push, toggles, idle, messages):
+    """Запускает контроллер и измеряет время от изменения на сервере до переключения лампы в Arduino"""
+    client = FarmApiClient(base_url=server.base_url)
+    engine = NetworkEngine(log=print).start()
+    controller = DeviceController(client, actor, engine, push=push, log=messages.append)
+    engine.spawn("devices", controller.run)
+    rng = random.Random(429)
+    latencies = []
+    try:
+        if not wait_for(lambda: controller.states["LED"] is not None, 10):
+            raise AssertionError("Контроллер не получил начальное состояние")
+        time.sleep(0.5)
+        for _ in range(toggles):
+            time.sleep(rng.uniform(0.5, 3.0))
+            target = 1 - simulator.led_state
+            start = time.perf_counter()
+            server.set_device_state(lamp=target)
+            if not wait_for(lambda: simulator.led_state == target, 15):
+                raise AssertionError("Лампа не переключилась")
+            latencies.append(time.perf_counter() - start)
+        before = sum(server.state.requests.values())
+        time.sleep(idle)
+        idle_requests = sum(server.state.requests.values()) - before
+    finally:
+        engine.stop()
+        client.close()
+    return latencies, idle_requests * 60 / idle
+def report(name, latencies, per_minute):
+    print(f"{name}: задержка включения p50 {statistics.median(latencies) * 1000:7.1f} мс, "
+          f"max {max(latencies) * 1000:7.1f} мс; запросов в минуту без изменений {per_minute:5.1f}")
+def run(toggles, idle):
+    server = MockFarmServer().start()
+    simulator, port_name = SimulatedArduino.open_pty(interval=1.0)
+    port = serial.Serial(port_name, 9600, timeout=0.2)
+    actor = SerialPortActor(port, log=print)
+    actor.start()
+    simulator.start()
+    try:
+        messages = []
+        report("Опрос каждые 5 с ", *session(server, actor, simulator, False, toggles, idle, messages))
+        messages = []
+        report("Долгий опрос     ", *session(server, actor, simulator, True, toggles, idle, messages))
+        assert any("каналу долгого опроса" in message for message in messages), messages
+        server.state.supports_push = False
+        messages = []
+        latencies, _ = session(server, actor, simulator, True, 1, 0.1, messages)
+        assert any("не поддерживает канал" in message for message in messages), messages
+        print(f"Сервер без долгого опроса: переход на опрос, лампа переключилась через {latencies[0] * 1000:.0f} мс")
+    finally:
+        actor.close()
+        simulator.stop()
+        server.stop()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Доставка состояний лампы: опрос против долгого опроса на локальной заглушке")
+    parser.add_argument("--toggles", type=int, default=4)
+    parser.add_argument("--idle", type=float, default=30.0, help="длительность простоя для подсчета запросов, с")
+    args = parser.parse_args()
+    run(args.toggles, args.idle)
@@ -0,0 +1,39 @@
+import os
+import sys
+import time
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from farm_api import FarmApiClient, ResponseCache, LED_ENDPOINT, CURTAINS_ENDPOINT, THRESHOLDS_ENDPOINT
+from mock_farm_server import MockFarmServer
+def device_cycles(client, cycles):
+    """Цикл задачи устройств: лампа, шторы и пороги, как при опросе каждые check_interval секунд"""
+    start = time.perf_counter()
+    for _ in range(cycles):
+        for endpoint in (LED_ENDPOINT, CURTAINS_ENDPOINT, THRESHOLDS_ENDPOINT):
+            client.get(endpoint).json()
+    return time.perf_counter() - start
+def run(cycles, latency):
+    server = MockFarmServer().start()
+    server.state.latency = latency
+    try:
+        plain = FarmApiClient(base_url=server.base_url, cache=ResponseCache(ttls={}), log=print)
+        elapsed = device_cycles(plain, cycles)
+        plain_requests, plain_bytes = sum(server.state.requests.values()), server.state.bytes_sent
+        print(f"Без кэша: {plain_requests} запросов, {plain_bytes} байт тел ответов, {elapsed:.2f} с")
+        server.state.requests.clear()
+        server.state.bytes_sent = 0
+        cached = FarmApiClient(base_url=server.base_url, log=print)
+        elapsed = device_cycles(cached, cycles)
+        cached_requests, cached_bytes = sum(server.state.requests.values()), server.state.bytes_sent
+        print(f"С кэшем:  {cached_requests} запросов ({server.state.not_modified} ответов 304), {cached_bytes} байт тел ответов, {elapsed:.2f} с")
+        print(f"Кэш: {cached.cache.stats()}; сэкономлено {plain_requests - cached_requests} запросов и {plain_bytes - cached_bytes} байт")
+        plain.close()
+        cached.close()
+    finally:
+        server.stop()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Кэш ответов с ETag и TTL для лампы, штор и порогов")
+    parser.add_argument("--cycles", type=int, default=120, help="число циклов опроса (120 циклов по 5 с - 10 минут)")
+    parser.add_argument("--latency", type=float, default=0.02, help="искусственная задержка сервера на запрос, с")
+    args = parser.parse_args()
+    run(args.cycles, args.latency)
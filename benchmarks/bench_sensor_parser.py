@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sensor_protocol import SensorLineParser
+RECORDED_LINES = [
+    "Initializing BH1750 sensor...",
+    "BH1750 sensor initialized successfully!",
+    "Dry soil value: 1000",
+    "Wet soil value: 200",
+    "Soil moisture: 47%",
+    "Humidity: 41.30% Temperature: 23.80°C",
+    "Light level: 312.50 lx",
+    "Lamp: OFF",
+    "Curtains: OPEN",
+    "Soil moisture: 46%",
+    "Humidity: 41.10% Temperature: 23.90°C",
+    "Light level: 309.17 lx",
+    "LED state changed to: ON",
+    "Lamp: ON",
+    "Curtains: OPEN",
+    "Failed to read from DHT sensor!",
+    "Light level: 0.00 lx",
+]
+def legacy_parse(line, state):
+    """Исходный путь: шесть re.search и import re на каждую строку"""
+    import re
+    temp_match = re.search(r'[Tt]emp(?:erature)?\s*:\s*(\d+\.?\d*)', line)
+    if temp_match:
+        state["temperature"] = float(temp_match.group(1))
+    humidity_match = re.search(r'[Hh]umidity\s*:\s*(\d+\.?\d*)', line)
+    if humidity_match:
+        state["humidity"] = float(humidity_match.group(1))
+    soil_match = re.search(r'[Ss]oil\s*moisture\s*:\s*(\d+\.?\d*)', line)
+    if soil_match:
+        state["soil_moisture"] = float(soil_match.group(1))
+    light_match = re.search(r'[Ll]ight\s*level\s*:\s*(\d+\.?\d*)', line)
+    if light_match:
+        state["light_level"] = float(light_match.group(1))
+    co2_match = re.search(r'[Cc][Oo]2\s*:\s*(\d+\.?\d*)', line)
+    if co2_match:
+        state["co2"] = float(co2_match.group(1))
+    pressure_match = re.search(r'[Pp]ressure\s*:\s*(\d+\.?\d*)', line)
+    if pressure_match:
+        state["pressure"] = float(pressure_match.group(1))
+def parser_parse(parser, line, state):
+    reading = parser.parse(line)
+    if reading is not None:
+        for name, value in reading._asdict().items():
+            if value is not None and name != "timestamp":
+                state[name] = value
+def load_lines(path):
+    if not path:
+        return RECORDED_LINES
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return [line.strip() for line in f if line.strip()]
+def run(lines, repeat):
+    parser = SensorLineParser()
+    state = {}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            legacy_parse(line, state)
+    legacy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            parser_parse(parser, line, state)
+    parser_time = time.perf_counter() - start
+    total = repeat * len(lines)
+    print(f"Строк: {total}")
+    print(f"re.search x6:       {legacy_time * 1e6 / total:.2f} мкс/строка ({total / legacy_time:.0f} строк/с)")
+    print(f"SensorLineParser:   {parser_time * 1e6 / total:.2f} мкс/строка ({total / parser_time:.0f} строк/с)")
+    print(f"Ускорение:          {legacy_time / parser_time:.2f}x")
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Сравнение SensorLineParser с исходным разбором через re.search")
+    arg_parser.add_argument("--input", help="файл с записанным выводом Arduino (по строке на сообщение)")
+    arg_parser.add_argument("--repeat", type=int, default=20000)
+    args = arg_parser.parse_args()
+    run(load_lines(args.input), args.repeat)
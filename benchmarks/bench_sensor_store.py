@@ -0,0 +1,36 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sensor_protocol import SensorReading
+from sensor_store import SensorStore
+def run(count, batch_size):
+    with tempfile.TemporaryDirectory() as directory:
+        store = SensorStore(os.path.join(directory, "sensors.db"), batch_size=batch_size, maxsize=count, log=print)
+        store.open()
+        base = time.time() - count
+        start = time.perf_counter()
+        for i in range(count):
+            store.add(SensorReading(temperature=20 + i % 5, humidity=40.0, soil_moisture=50.0, light_level=float(i % 1000), timestamp=base + i), i % 2, 0)
+        enqueue_time = time.perf_counter() - start
+        store.flush()
+        write_time = time.perf_counter() - start
+        start = time.perf_counter()
+        rows = store.query(base + count * 0.25, base + count * 0.5)
+        query_time = time.perf_counter() - start
+        start = time.perf_counter()
+        buckets = store.query_buckets(base, base + count, 3600)
+        bucket_time = time.perf_counter() - start
+        store.close()
+        print(f"Постановка в очередь: {enqueue_time * 1e6 / count:.2f} мкс/показание (поток чтения порта)")
+        print(f"Запись: {count / write_time:.0f} показаний/с, пакет {batch_size}, отброшено {store.rows_dropped}")
+        print(f"Выборка интервала: {len(rows)} строк за {query_time * 1000:.2f} мс")
+        print(f"Часовые средние: {len(buckets)} интервалов за {bucket_time * 1000:.2f} мс")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пропускная способность локального хранилища показаний")
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=200)
+    args = parser.parse_args()
+    run(args.count, args.batch)
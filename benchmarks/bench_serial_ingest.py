@@ -0,0 +1,122 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import serial
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from farm_api import FarmApiClient
+from serial_io import SerialPortActor
+from sensor_store import SensorStore
+from sensor_ingest import SensorIngest
+from sensor_protocol import SensorLineParser, UPLOAD_SUMMARY
+from arduino_sim import SimulatedArduino, load_recording
+from mock_farm_server import MockFarmServer
+LINES_PER_READING = 3
+class CountingArduino(SimulatedArduino):
+    """Синтетические показания с номером показания в освещенности: по нему строка находится после разбора и на сервере"""
+    def current_reading(self):
+        return super().current_reading()._replace(light_level=float(self.readings_sent))
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))] * 1000 if values else float('nan')
+def run_rate(rate, seconds, use_socket, upload_interval, client, server, directory):
+    """Одна частота: имитатор -> порт -> SerialPortActor -> SensorIngest -> очередь отправки -> заглушка сервера"""
+    options = {'interval': 1.0 / rate if rate else 0.0, 'timestamps': True}
+    simulator, port_name = CountingArduino.open_socket(**options) if use_socket else CountingArduino.open_pty(**options)
+    port = serial.serial_for_url(port_name, 9600, timeout=1)
+    actor = SerialPortActor(port, log=lambda message: None)
+    store = SensorStore(os.path.join(directory, f"readings_{rate:g}.db"), log=print)
+    store.open()
+    monitor = SensorIngest(actor, client, os.path.join(directory, f"ingest_{rate:g}.db"), upload_interval, store, UPLOAD_SUMMARY,
+                           log=lambda message: None)
+    parsed = {}
+    parse_reading = monitor.update_sensor_values
+    def traced(line):
+        result = parse_reading(line)
+        reading = monitor.last_reading
+        if reading is not None and reading.light_level is not None:
+            parsed[int(reading.light_level)] = time.perf_counter()
+        return result
+    monitor.update_sensor_values = traced
+    records_before = len(server.state.sensor_records)
+    actor.start()
+    monitor.start()
+    simulator.start()
+    started = time.perf_counter()
+    time.sleep(seconds)
+    simulator.running = False
+    elapsed = time.perf_counter() - started
+    time.sleep(upload_interval + 0.5)
+    monitor.stop()
+    stats = actor.stats()
+    actor.close()
+    simulator.stop()
+    store.close()
+    light_sent = simulator.sent_times[LINES_PER_READING - 1::LINES_PER_READING]
+    parse_latency = [parsed[index] - light_sent[index] for index in parsed if index < len(light_sent)]
+    with server.state.lock:
+        records = list(zip(server.state.sensor_records[records_before:], server.state.sensor_received[records_before:]))
+    upload_latency = [received - light_sent[int(float(form['light_level']))] for form, received in records
+                      if int(float(form['light_level'])) < len(light_sent)]
+    return {
+        'offered': simulator.readings_sent / elapsed,
+        'lines_per_s': len(parsed) * LINES_PER_READING / elapsed,
+        'readings': simulator.readings_sent,
+        'parsed': len(parsed),
+        'dropped': stats['dropped'],
+        'parse_p50': percentile(parse_latency, 0.5),
+        'parse_p99': percentile(parse_latency, 0.99),
+        'upload_p50': percentile(upload_latency, 0.5),
+        'records': len(records)
+    }
+def replay(filename, line_rate, seconds, use_socket):
+    """Проигрывает записанный вывод скетча через SerialPortActor и разбор показаний и печатает, сколько строк дошло"""
+    lines = load_recording(filename)
+    options = {'replay': lines, 'line_rate': line_rate, 'repeat': False}
+    simulator, port_name = SimulatedArduino.open_socket(**options) if use_socket else SimulatedArduino.open_pty(**options)
+    port = serial.serial_for_url(port_name, 9600, timeout=1)
+    actor = SerialPortActor(port, log=lambda message: None)
+    parser = SensorLineParser()
+    actor.start()
+    simulator.start()
+    received = readings = 0
+    deadline = time.perf_counter() + seconds
+    while received < len(lines) and time.perf_counter() < deadline:
+        line = actor.get(timeout=0.5)
+        if line:
+            received += 1
+            readings += parser.parse(line) is not None
+    actor.close()
+    simulator.stop()
+    print(f"Запись {filename}: отправлено {len(lines)} строк, в очередь показаний попало {received}, из них разобрано показаний {readings}")
+def run(rates, seconds, use_socket, upload_interval):
+    server = MockFarmServer().start()
+    client = FarmApiClient(base_url=server.base_url, log=lambda message: None)
+    print(f"Транспорт: {'socket://' if use_socket else 'pty'}; отправка на сервер каждые {upload_interval:g} с; "
+          f"для сравнения: 9600 бод - около 10 показаний/с, 115200 бод - около 120")
+    print(f"{'задано, пок./с':>15}{'отправлено':>12}{'строк/с':>10}{'разобрано':>11}{'отброшено':>11}"
+          f"{'разбор p50/p99, мс':>21}{'до сервера p50, мс':>20}{'записей':>9}")
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for rate in rates:
+                result = run_rate(rate, seconds, use_socket, upload_interval, client, server, directory)
+                offered = f"{rate:g}" if rate else "макс."
+                print(f"{offered:>15}{result['offered']:>12.0f}{result['lines_per_s']:>10.0f}{result['parsed']:>11}{result['dropped']:>11}"
+                      f"{result['parse_p50']:>11.2f} / {result['parse_p99']:<7.2f}{result['upload_p50']:>20.1f}{result['records']:>9}")
+    finally:
+        client.close()
+        server.stop()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Прием показаний с имитатора Arduino: строк в секунду, задержка разбора и доставки на сервер")
+    parser.add_argument("--rates", nargs="+", type=float, default=[10, 100, 1000, 0], help="показаний в секунду (0 - без пауз)")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--upload-interval", type=float, default=1.0, help="период отправки на сервер, с (в приложении - минуты)")
+    parser.add_argument("--socket", action="store_true", help="socket:// вместо pty")
+    parser.add_argument("--replay", help="файл с записанным выводом скетча: проверить разбор записи")
+    parser.add_argument("--line-rate", type=float, default=0.0, help="строк записи в секунду при --replay")
+    args = parser.parse_args()
+    if args.replay:
+        replay(args.replay, args.line_rate, args.seconds * 10, args.socket)
+    else:
+        run(args.rates, args.seconds, args.socket, args.upload_interval)
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import argparse
+import threading
+import serial
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from serial_io import SerialLineReader
+def open_port_pair(use_pty):
+    """Возвращает (порт для записи, порт для чтения): loop:// или пара pty"""
+    if not use_pty:
+        port = serial.serial_for_url('loop://', timeout=1)
+        return port, port
+    master, slave = os.openpty()
+    reader = serial.Serial(os.ttyname(slave), timeout=1)
+    class MasterWriter:
+        def write(self, data):
+            return os.write(master, data)
+        def close(self):
+            os.close(master)
+    return MasterWriter(), reader
+def produce(port, count, rate):
+    period = 1.0 / rate if rate else 0
+    for i in range(count):
+        port.write(f"Light level: {i}.00 lx t={time.perf_counter():.6f}\n".encode())
+        if period:
+            time.sleep(period)
+def sent_at(line):
+    return float(line.rsplit("t=", 1)[1])
+def consume_polling(port, count):
+    """Исходная схема: in_waiting + sleep(0.1)"""
+    latencies = []
+    while len(latencies) < count:
+        if port.in_waiting:
+            line = port.readline().decode('utf-8', errors='replace').strip()
+            if line:
+                latencies.append(time.perf_counter() - sent_at(line))
+        time.sleep(0.1)
+    return latencies
+def consume_reader(port, count):
+    reader = SerialLineReader(port, log=lambda message: None)
+    reader.start()
+    latencies = []
+    try:
+        while len(latencies) < count:
+            line = reader.get(timeout=1)
+            if line:
+                latencies.append(time.perf_counter() - sent_at(line))
+    finally:
+        reader.stop()
+    return latencies, reader.format_stats()
+def report(name, latencies, elapsed):
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{name:10s} строк: {len(latencies)}, {len(latencies) / elapsed:.1f} строк/с, задержка p50 {p50:.2f} мс, p99 {p99:.2f} мс, макс. {latencies[-1] * 1000:.2f} мс")
+def run(mode, count, rate, use_pty):
+    writer, reader_port = open_port_pair(use_pty)
+    producer = threading.Thread(target=produce, args=(writer, count, rate), daemon=True)
+    start = time.perf_counter()
+    producer.start()
+    if mode == "poll":
+        latencies = consume_polling(reader_port, count)
+        report("poll", latencies, time.perf_counter() - start)
+    else:
+        latencies, stats = consume_reader(reader_port, count)
+        report("reader", latencies, time.perf_counter() - start)
+        print(f"           {stats}")
+    producer.join()
+    reader_port.close()
+    if writer is not reader_port:
+        writer.close()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Задержка доставки строк: опрос in_waiting против SerialLineReader")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=20, help="строк в секунду (0 - без пауз)")
+    parser.add_argument("--pty", action="store_true", help="использовать пару pty вместо loop://")
+    args = parser.parse_args()
+    for mode in ("poll", "reader"):
+        run(mode, args.count, args.rate, args.pty)
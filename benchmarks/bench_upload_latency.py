@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import requests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sensor_store import SensorIdAllocator
+from mock_farm_server import MockFarmServer
+def fetch_max_id(server):
+    response = requests.get(server.url("get-max-sensor-id.php"), timeout=5)
+    return int(response.json()['max_id'])
+def post(server, payload):
+    response = requests.post(server.url("save-sensor-data.php"), data=payload, timeout=5)
+    assert response.json().get('success'), response.text
+def upload_legacy(server, count):
+    """Старая схема: GET max_id перед каждой записью"""
+    timings = []
+    for i in range(count):
+        start = time.perf_counter()
+        post(server, {'id': fetch_max_id(server) + 1, 'temperature': 20.0 + i % 5})
+        timings.append(time.perf_counter() - start)
+    return timings
+def upload_allocated(server, count, path):
+    """Новая схема: ID выдает локальный аллокатор, на запись уходит один POST"""
+    allocator = SensorIdAllocator(path, lambda: fetch_max_id(server))
+    timings = []
+    try:
+        for i in range(count):
+            start = time.perf_counter()
+            post(server, {'id': allocator.allocate(), 'temperature': 20.0 + i % 5})
+            timings.append(time.perf_counter() - start)
+    finally:
+        allocator.close()
+    return timings
+def report(name, timings, requests_made):
+    timings = sorted(timings)
+    p50 = statistics.median(timings) * 1000
+    p95 = timings[int(len(timings) * 0.95) - 1] * 1000
+    print(f"{name}: p50 {p50:.1f} мс, p95 {p95:.1f} мс, HTTP-запросов {requests_made}")
+    return p50
+def run(count, latency):
+    server = MockFarmServer().start()
+    server.state.latency = latency
+    try:
+        legacy = upload_legacy(server, count)
+        legacy_requests = sum(server.state.requests.values())
+        legacy_p50 = report("GET+POST", legacy, legacy_requests)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sensors.db")
+            server.state.requests.clear()
+            allocated = upload_allocated(server, count, path)
+            allocated_p50 = report("POST   ", allocated, sum(server.state.requests.values()))
+            assert server.state.requests.get("get-max-sensor-id.php") == 1, server.state.requests
+            before_restart = server.state.max_id
+            allocator = SensorIdAllocator(path, lambda: fetch_max_id(server))
+            resumed = allocator.allocate()
+            allocator.close()
+            assert resumed > before_restart, f"ID после перезапуска {resumed} не больше {before_restart}"
+            assert server.state.requests.get("get-max-sensor-id.php") == 2, "После перезапуска max_id должен сверяться с сервером один раз"
+        ids = [int(record['id']) for record in server.state.sensor_records]
+        assert len(set(ids)) == len(ids), "Повторяющиеся ID"
+        print(f"Задержка загрузки меньше в {legacy_p50 / allocated_p50:.2f} раза; после перезапуска ID продолжаются с {resumed}")
+    finally:
+        server.stop()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Задержка выгрузки показаний: GET max_id + POST против локального аллокатора ID")
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="искусственная задержка сервера на запрос, с")
+    args = parser.parse_args()
+    run(args.count, args.latency)
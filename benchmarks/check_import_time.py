@@ -0,0 +1,55 @@
+import os
+import sys
+import argparse
+import subprocess
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGETS = {
+    "FitoDomik": {'budget_ms': 400, 'forbidden': ("cv2", "numpy", "plant_analysis")},
+    "farm_daemon": {'budget_ms': 300, 'forbidden': ("PyQt6", "cv2", "numpy", "plant_analysis")}
+}
+def import_profile(module):
+    """Один запуск python -X importtime в чистом процессе: {модуль: (собственное мкс, суммарное мкс, глубина)}"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT, capture_output=True, text=True,
+                            env=dict(os.environ, QT_QPA_PLATFORM="offscreen"))
+    if result.returncode:
+        raise RuntimeError(f"import {module} завершился с ошибкой:\n{result.stderr}")
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        own, total, name = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        profile[name.strip()] = (int(own), int(total), depth)
+    return profile
+def check(module, budget_ms, forbidden, repeat, top):
+    """Лучшее из repeat время импорта против бюджета и отсутствие запрещенных модулей; возвращает список нарушений"""
+    profiles = [import_profile(module) for _ in range(repeat)]
+    best = min(profiles, key=lambda profile: profile[module][1])
+    total_ms = best[module][1] / 1000
+    print(f"{module}: {total_ms:.1f} мс (бюджет {budget_ms:g} мс, лучший из {repeat})")
+    children = sorted((item for item in best.items() if item[1][2] == 1), key=lambda item: -item[1][1])
+    for name, (own, total, depth) in children[:top]:
+        print(f"  {name:<28}{total / 1000:>8.1f} мс")
+    problems = []
+    if total_ms > budget_ms:
+        problems.append(f"{module}: импорт {total_ms:.1f} мс больше бюджета {budget_ms:g} мс")
+    loaded = sorted(name for name in best if name.split(".")[0] in forbidden)
+    if loaded:
+        problems.append(f"{module}: при запуске загружаются {', '.join(loaded[:5])}{' ...' if len(loaded) > 5 else ''}")
+    return problems
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Проверка времени импорта по -X importtime: бюджет и модули, которые должны загружаться лениво")
+    parser.add_argument("--modules", nargs="+", default=list(BUDGETS), choices=list(BUDGETS))
+    parser.add_argument("--repeat", type=int, default=3, help="запусков на модуль, берется лучший")
+    parser.add_argument("--scale", type=float, default=1.0, help="множитель бюджетов для медленных машин")
+    parser.add_argument("--top", type=int, default=8, help="сколько самых долгих прямых импортов показать")
+    args = parser.parse_args()
+    problems = []
+    for module in args.modules:
+        budget = BUDGETS[module]
+        problems += check(module, budget['budget_ms'] * args.scale, budget['forbidden'], args.repeat, args.top)
+    for problem in problems:
+        print(f"ПРЕВЫШЕНИЕ: {problem}")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,201 @@
+import json
+import time
+import hashlib
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+class MockFarmState:
+    """Состояние локальной заглушки farm429: записи, устройства и управляемые сбои"""
+    def __init__(self, token=""):
+        self.token = token
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.supports_push = True
+        self.supports_etag = True
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self.fail_status = None
+        self.drop_responses = 0
+        self.latency = 0.0
+        self.sensor_records = []
+        self.sensor_received = []
+        self.idempotency_keys = set()
+        self.duplicates = 0
+        self.dedupe_by_key = True
+        self.unique_ids = True
+        self.record_ids = set()
+        self.id_conflicts = 0
+        self.max_id = 0
+        self.lamp_state = 0
+        self.curtains_state = 0
+        self.thresholds = {"success": True, "thresholds": {"temperature": {"min": 18, "max": 28}, "humidity": {"min": 40, "max": 70},
+                                                           "soil_moisture": {"min": 30, "max": 80}, "light_level": {"min": 200, "max": 2000}}}
+        self.photos = 0
+        self.uploads = []
+        self.requests = {}
+        self.connections = 0
+class MockFarmHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    def log_message(self, format, *args):
+        pass
+    def setup(self):
+        super().setup()
+        with self.server.state.lock:
+            self.server.state.connections += 1
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.state.lock:
+            self.server.state.bytes_sent += len(body)
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+    def prepare(self):
+        """Общая обработка: учет запроса, задержка, сбои и проверка токена; возвращает путь или None"""
+        state = self.server.state
+        path = urlparse(self.path).path.rsplit("/", 1)[-1]
+        with state.lock:
+            state.requests[path] = state.requests.get(path, 0) + 1
+            fail_status = state.fail_status
+            latency = state.latency
+        if latency:
+            time.sleep(latency)
+        if fail_status:
+            self.read_body()
+            self.send_json(fail_status, {"success": False, "message": "Сервис недоступен"})
+            return None
+        if state.token and self.headers.get("X-Auth-Token") != state.token:
+            self.read_body()
+            self.send_json(401, {"success": False, "message": "Unauthorized"})
+            return None
+        return path
+    def do_GET(self):
+        path = self.prepare()
+        if path is None:
+            return
+        state = self.server.state
+        if path == "wait-device-state.php" and state.supports_push:
+            self.wait_device_state(state)
+            return
+        with state.lock:
+            if path == "get-max-sensor-id.php":
+                data = {"success": True, "max_id": state.max_id}
+            elif path == "get-lamp-state.php":
+                data = {"success": True, "state": state.lamp_state}
+            elif path == "get-curtains-state.php":
+                data = {"success": True, "state": state.curtains_state}
+            elif path == "get-thresholds.php":
+                data = state.thresholds
+            else:
+                data = None
+        if data is None:
+            self.send_json(404, {"success": False, "message": "Not found"})
+        elif state.supports_etag and path != "get-max-sensor-id.php":
+            etag = '"' + hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                with state.lock:
+                    state.not_modified += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+            else:
+                self.send_json(200, data, {"ETag": etag})
+        else:
+            self.send_json(200, data)
+    def wait_device_state(self, state):
+        """Долгий опрос: ответ при отличии состояния от переданного клиентом или по истечении timeout"""
+        query = parse_qs(urlparse(self.path).query)
+        known = (query.get("lamp", [""])[0], query.get("curtains", [""])[0])
+        deadline = time.monotonic() + min(float(query.get("timeout", ["25"])[0]), 60)
+        with state.changed:
+            while (str(state.lamp_state), str(state.curtains_state)) == known and time.monotonic() < deadline:
+                state.changed.wait(deadline - time.monotonic())
+            data = {"success": True, "changed": (str(state.lamp_state), str(state.curtains_state)) != known,
+                    "lamp_state": state.lamp_state, "curtains_state": state.curtains_state}
+        self.send_json(200, data)
+    def do_POST(self):
+        path = self.prepare()
+        if path is None:
+            return
+        state = self.server.state
+        body = self.read_body()
+        if path == "save-sensor-data.php":
+            form = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+            key = form.get("idempotency_key") or self.headers.get("Idempotency-Key")
+            record_id = form.get("id", "")
+            with state.lock:
+                conflict = False
+                if state.dedupe_by_key and key and key in state.idempotency_keys:
+                    state.duplicates += 1
+                elif state.unique_ids and record_id in state.record_ids:
+                    state.id_conflicts += 1
+                    conflict = True
+                else:
+                    if key:
+                        state.idempotency_keys.add(key)
+                    state.sensor_records.append(form)
+                    state.sensor_received.append(time.perf_counter())
+                    if record_id.isdigit():
+                        state.record_ids.add(record_id)
+                        state.max_id = max(state.max_id, int(record_id))
+                drop = not conflict and state.drop_responses > 0
+                if drop:
+                    state.drop_responses -= 1
+            if conflict:
+                self.send_json(409, {"success": False, "message": f"Duplicate entry '{record_id}' for key 'PRIMARY'"})
+            elif drop:
+                self.send_json(502, {"success": False, "message": "Bad gateway"})
+            else:
+                self.send_json(200, {"success": True})
+        elif path == "upload-image.php":
+            message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode() + body)
+            parts = {part.get_param("name", header="content-disposition"): part.get_payload(decode=True) for part in message.iter_parts()}
+            with state.lock:
+                state.photos += 1
+                state.uploads.append(parts)
+            self.send_json(200, {"success": True, "user_id": 1})
+        else:
+            self.send_json(404, {"success": False, "message": "Not found"})
+class MockFarmServer:
+    """Локальная заглушка API farm429.online для бенчмарков и сценариев отказа"""
+    def __init__(self, token="", handler=MockFarmHandler):
+        self.state = MockFarmState(token)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = self.state
+        self.thread = None
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/api"
+    def url(self, endpoint):
+        return f"{self.base_url}/{endpoint}"
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    def set_failing(self, status=503):
+        with self.state.lock:
+            self.state.fail_status = status
+    def recover(self):
+        self.set_failing(None)
+    def set_device_state(self, lamp=None, curtains=None):
+        """Меняет состояние устройств, как веб-интерфейс, и будит ожидающих долгого опроса"""
+        with self.state.changed:
+            if lamp is not None:
+                self.state.lamp_state = lamp
+            if curtains is not None:
+                self.state.curtains_state = curtains
+            self.state.changed.notify_all()
@@ -0,0 +1,29 @@
+import cv2
+import numpy as np
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080), "4k": (3840, 2160)}
+def synthetic_plant(width, height, seed=0, yellow=0.15, brown=0.08, noise=6):
+    """Синтетический кадр BGR: фон и горшок, листья-эллипсы разных оттенков зеленого, желтые и коричневые пятна, шум сенсора"""
+    rng = np.random.default_rng(seed)
+    scale = width / 1920
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = (170, 175, 180)
+    cv2.rectangle(image, (int(width * 0.35), int(height * 0.7)), (int(width * 0.65), height), (40, 60, 110), -1)
+    centre = (width // 2, int(height * 0.55))
+    for _ in range(40):
+        angle = rng.uniform(0, 360)
+        distance = rng.uniform(0, 0.3) * height
+        x = int(centre[0] + distance * np.cos(np.radians(angle)))
+        y = int(centre[1] - abs(distance * np.sin(np.radians(angle))))
+        axes = (int(rng.uniform(60, 140) * scale), int(rng.uniform(25, 60) * scale))
+        hue = rng.uniform(40, 80)
+        saturation = rng.uniform(60, 230)
+        value = rng.uniform(70, 220)
+        leaf = cv2.cvtColor(np.uint8([[[hue, saturation, value]]]), cv2.COLOR_HSV2BGR)[0, 0]
+        cv2.ellipse(image, (x, y), axes, angle, 0, 360, tuple(int(c) for c in leaf), -1)
+        for share, hue_range in ((yellow, (22, 33)), (brown, (11, 19))):
+            if rng.random() < share * 3:
+                spot = cv2.cvtColor(np.uint8([[[rng.uniform(*hue_range), rng.uniform(120, 230), rng.uniform(90, 220)]]]), cv2.COLOR_HSV2BGR)[0, 0]
+                cv2.circle(image, (x + int(rng.integers(-axes[0] // 2, axes[0] // 2 + 1)), y), max(3, axes[1] // 2), tuple(int(c) for c in spot), -1)
+    if noise:
+        image = cv2.add(image, rng.integers(0, noise, image.shape, dtype=np.uint8))
+    return image
@@ -0,0 +1,88 @@
+import time
+import threading
+WARMUP_FRAMES = 5
+FLUSH_FRAMES = 4
+STALE_AFTER = 1.0
+def opencv_source(index):
+    """Источник кадров по умолчанию: cv2.VideoCapture с буфером драйвера в один кадр, где бэкенд это поддерживает; OpenCV загружается при первом открытии"""
+    import cv2
+    capture = cv2.VideoCapture(index)
+    if capture.isOpened():
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return capture
+class CameraManager:
+    """Долгоживущее подключение к камере: открывается лениво, отбрасывает кадры прогрева и отдает кадры всем потребителям под одной блокировкой; без Qt"""
+    def __init__(self, index=0, warmup_frames=WARMUP_FRAMES, source_factory=opencv_source, clock=time.monotonic,
+                 flush_frames=FLUSH_FRAMES, stale_after=STALE_AFTER):
+        self.index = index
+        self.warmup_frames = warmup_frames
+        self.source_factory = source_factory
+        self.clock = clock
+        self.flush_frames = flush_frames
+        self.stale_after = stale_after
+        self.lock = threading.RLock()
+        self.capture = None
+        self.last_read = 0.0
+        self.last_error = None
+        self.opens = 0
+        self.frames = 0
+        self.failures = 0
+        self.open_time = 0.0
+    @property
+    def is_open(self):
+        return self.capture is not None
+    def configure(self, index=None, warmup_frames=None):
+        """Меняет индекс камеры или число кадров прогрева; при смене индекса текущее подключение закрывается"""
+        with self.lock:
+            if warmup_frames is not None:
+                self.warmup_frames = warmup_frames
+            if index is not None and index != self.index:
+                self.release()
+                self.index = index
+    def open(self):
+        """Открывает камеру, если она еще не открыта, и пропускает кадры прогрева; возвращает True при успехе"""
+        with self.lock:
+            if self.capture is not None:
+                return True
+            start = time.perf_counter()
+            capture = self.source_factory(self.index)
+            if not capture.isOpened():
+                capture.release()
+                self.failures += 1
+                self.last_error = f"Не удалось подключиться к камере с индексом {self.index}"
+                return False
+            for _ in range(self.warmup_frames):
+                capture.grab()
+            self.capture = capture
+            self.opens += 1
+            self.open_time += time.perf_counter() - start
+            self.last_read = self.clock()
+            return True
+    def read(self):
+        """Возвращает свежий кадр или None (причина - в last_error); при сбое чтения камера переоткрывается один раз"""
+        with self.lock:
+            for attempt in range(2):
+                if not self.open():
+                    return None
+                if self.clock() - self.last_read > self.stale_after:
+                    for _ in range(self.flush_frames):
+                        self.capture.grab()
+                ok, frame = self.capture.read()
+                self.last_read = self.clock()
+                if ok and frame is not None:
+                    self.frames += 1
+                    self.last_error = None
+                    return frame
+                self.release()
+            self.failures += 1
+            self.last_error = "Не удалось получить изображение с камеры"
+            return None
+    def release(self):
+        with self.lock:
+            if self.capture is not None:
+                self.capture.release()
+                self.capture = None
+    def stats(self):
+        with self.lock:
+            return {'opens': self.opens, 'frames': self.frames, 'failures': self.failures,
+                    'avg_open_ms': self.open_time * 1000 / self.opens if self.opens else 0.0}
@@ -0,0 +1,236 @@
+import time
+import json
+import random
+import asyncio
+import requests
+from farm_api import LED_ENDPOINT, CURTAINS_ENDPOINT, THRESHOLDS_ENDPOINT, DEVICE_EVENTS_ENDPOINT, CircuitOpenError, BREAKER_CLOSED
+DEVICE_ENDPOINTS = {"LED": LED_ENDPOINT, "CURTAINS": CURTAINS_ENDPOINT}
+DEVICE_NAMES = {"LED": "лампы", "CURTAINS": "штор"}
+PUSH_UNSUPPORTED_STATUSES = (404, 405, 501)
+class PushUnsupported(Exception):
+    pass
+class DeviceController:
+    """Синхронизация лампы и штор с сервером: параллельный опрос состояний, команды Arduino и пороги; без Qt"""
+    def __init__(self, api, serial_actor, engine, check_interval=5, thresholds_interval=60, on_change=None, log=None,
+                 push=True, push_wait=25, push_retry_interval=600, resync_max_interval=300):
+        self.api = api
+        self.serial_actor = serial_actor
+        self.engine = engine
+        self.check_interval = check_interval
+        self.thresholds_interval = thresholds_interval
+        self.on_change = on_change or (lambda name, value: None)
+        self.log = log or (lambda message: print(f"[LOG] {message}"))
+        self.states = {"LED": None, "CURTAINS": None}
+        self.server_states = {"LED": None, "CURTAINS": None}
+        self.follow_server = True
+        self.thresholds = None
+        self.last_thresholds_time = 0
+        self.push = push
+        self.push_wait = push_wait
+        self.push_retry_interval = push_retry_interval
+        self.push_unsupported_until = 0
+        self.push_active = False
+        self.resync_max_interval = resync_max_interval
+        self.resync_failures = 0
+        self.resync_retry_at = 0
+    def outage_reported(self, endpoint):
+        """Предохранитель эндпоинта уже сообщил об отказе: повторные ошибки не пишутся в журнал"""
+        return self.api.breaker(endpoint).state != BREAKER_CLOSED
+    def fetch_state(self, device):
+        """Запрашивает состояние устройства на сервере; возвращает 0, 1 или None"""
+        name = DEVICE_NAMES[device]
+        endpoint = DEVICE_ENDPOINTS[device]
+        try:
+            response = self.api.get(endpoint, timeout=5)
+            if response.status_code != 200:
+                if response.status_code == 401:
+                    self.log("⛔ ОШИБКА АВТОРИЗАЦИИ ⛔")
+                elif not self.outage_reported(endpoint):
+                    self.log(f"❌ Ошибка получения состояния {name}: HTTP {response.status_code}")
+                return None
+            try:
+                data = response.json()
+                if data.get('success') == True and 'state' in data:
+                    return 1 if int(data.get('state')) == 1 else 0
+                self.log(f"❌ Некорректный формат ответа от API: {data}")
+                return None
+            except json.JSONDecodeError as e:
+                self.log(f"❌ Ошибка разбора JSON в ответе {name}: {str(e)}")
+                return None
+        except CircuitOpenError:
+            return None
+        except requests.exceptions.Timeout:
+            if not self.outage_reported(endpoint):
+                self.log(f"❌ Таймаут при запросе состояния {name}")
+            return None
+        except Exception as e:
+            if not self.outage_reported(endpoint):
+                self.log(f"❌ Ошибка при получении состояния {name}: {str(e)}")
+            return None
+    def fetch_thresholds(self):
+        try:
+            response = self.api.get(THRESHOLDS_ENDPOINT)
+            if response.status_code == 200:
+                return response.json()
+            elif response.status_code == 401:
+                self.log("⛔ ОШИБКА АВТОРИЗАЦИИ ⛔")
+            return None
+        except CircuitOpenError:
+            return None
+        except Exception as e:
+            self.log(f"❌ Ошибка получения порогов: {str(e)}")
+            return None
+    def wait_for_change(self):
+        """Долгий опрос: сервер отвечает сразу при изменении состояния или через push_wait секунд; возвращает (лампа, шторы)"""
+        params = {'lamp': self.server_states["LED"], 'curtains': self.server_states["CURTAINS"], 'timeout': self.push_wait}
+        response = self.api.get(DEVICE_EVENTS_ENDPOINT, params=params, timeout=(3.05, self.push_wait + 10))
+        if response.status_code in PUSH_UNSUPPORTED_STATUSES:
+            raise PushUnsupported(f"HTTP {response.status_code}")
+        if response.status_code == 401:
+            self.log("⛔ ОШИБКА АВТОРИЗАЦИИ ⛔")
+            return None
+        if response.status_code != 200:
+            if not self.outage_reported(DEVICE_EVENTS_ENDPOINT):
+                self.log(f"❌ Ошибка канала состояний устройств: HTTP {response.status_code}")
+            return None
+        try:
+            data = response.json()
+        except ValueError:
+            raise PushUnsupported("ответ не в формате JSON")
+        if not isinstance(data, dict) or not data.get('success') or 'lamp_state' not in data or 'curtains_state' not in data:
+            raise PushUnsupported(f"некорректный ответ {data}")
+        try:
+            return (1 if int(data['lamp_state']) == 1 else 0, 1 if int(data['curtains_state']) == 1 else 0)
+        except (TypeError, ValueError):
+            raise PushUnsupported(f"некорректный ответ {data}")
+    def push_available(self):
+        return self.push and time.time() >= self.push_unsupported_until
+    async def push_once(self):
+        """Один долгий запрос; при неподдержке сервером переключает на периодический опрос"""
+        try:
+            states = await self.engine.call_detached(self.wait_for_change)
+        except PushUnsupported as e:
+            self.push_active = False
+            self.push_unsupported_until = time.time() + self.push_retry_interval
+            self.log(f"⚠️ Сервер не поддерживает канал состояний устройств ({str(e)}), опрос каждые {self.check_interval} с")
+            return False
+        except CircuitOpenError:
+            return False
+        if states is None:
+            return False
+        if not self.push_active:
+            self.push_active = True
+            self.log("✅ Состояния лампы и штор приходят по каналу долгого опроса")
+        await self.sync_device("LED", states[0])
+        await self.sync_device("CURTAINS", states[1])
+        return True
+    def note_state(self, device, state):
+        """Учитывает состояние, установленное вручную, чтобы следующий опрос сравнивал с ним"""
+        self.states[device] = state
+    async def send_command(self, device, state):
+        """Отправляет команду Arduino и ждет подтверждения, не занимая поток"""
+        state_value = 1 if state == 1 else 0
+        if self.serial_actor is None or not self.serial_actor.is_open:
+            self.log("❌ Ошибка: последовательный порт закрыт")
+            return False
+        self.log(f"📡 Отправляем команду: {device}:{state_value}")
+        try:
+            response = await asyncio.wait_for(asyncio.wrap_future(self.serial_actor.send_command(device, state_value)),
+                                              self.serial_actor.command_timeout + 1)
+        except asyncio.TimeoutError:
+            response = None
+        if not response:
+            self.log(f"❌ Arduino не подтвердил команду {device}:{state_value}")
+            return False
+        self.log(f"🔄 Ответ Arduino: {response}")
+        if device == "LED":
+            self.log(f"💡 Лампа: {'✅ включена' if state_value == 1 else '❌ выключена'}")
+        else:
+            self.log(f"🪟 Шторы: {'✅ закрыты' if state_value == 1 else '❌ открыты'}")
+        self.states[device] = state_value
+        self.on_change(device, state_value)
+        return True
+    async def sync_device(self, device, server_state, retry=False):
+        """Приводит устройство к состоянию сервера при его изменении; неподтвержденные команды повторяет resync (retry=True).
+        Если устройствами управляет автоматика, только при изменении на сервере"""
+        previous = self.server_states[device]
+        self.server_states[device] = server_state
+        if not self.follow_server and (previous is None or previous == server_state):
+            return
+        if previous == server_state and not retry:
+            return
+        current = self.states[device]
+        if current is None or current != server_state:
+            self.log(f"🔔 Обнаружено изменение состояния {DEVICE_NAMES[device]}: {current if current is not None else '?'} ➡️ {server_state}")
+            await self.send_command(device, server_state)
+    def out_of_sync(self):
+        return self.follow_server and any(self.server_states[device] is not None and self.states[device] != self.server_states[device]
+                                          for device in self.states)
+    def resync_due(self):
+        return self.out_of_sync() and time.time() >= self.resync_retry_at
+    async def resync(self):
+        """Повторяет команды, которые Arduino не подтвердил или которые были изменены вручную; пока порт не отвечает, паузы между попытками растут"""
+        for device, server_state in self.server_states.items():
+            if server_state is not None:
+                await self.sync_device(device, server_state, retry=True)
+        if self.out_of_sync():
+            self.resync_failures += 1
+            self.resync_retry_at = time.time() + min(self.resync_max_interval, self.check_interval * 2 ** min(self.resync_failures, 16))
+        else:
+            self.resync_failures = 0
+            self.resync_retry_at = 0
+    async def poll_once(self):
+        """Одновременно запрашивает состояние лампы и штор; возвращает True, если сервер ответил хотя бы по одному"""
+        led_state, curtains_state = await asyncio.gather(self.engine.call(self.fetch_state, "LED"),
+                                                         self.engine.call(self.fetch_state, "CURTAINS"))
+        if led_state is not None:
+            await self.sync_device("LED", led_state)
+        if curtains_state is not None:
+            await self.sync_device("CURTAINS", curtains_state)
+        return led_state is not None or curtains_state is not None
+    async def refresh_thresholds(self):
+        now = time.time()
+        if now - self.last_thresholds_time < self.thresholds_interval:
+            return
+        thresholds = await self.engine.call(self.fetch_thresholds)
+        if thresholds is not None:
+            self.last_thresholds_time = now
+            self.thresholds = thresholds
+            self.log("📊 Получены пороговые значения от сервера")
+            self.on_change("thresholds", thresholds)
+    def next_poll_delay(self):
+        """Пауза до следующего опроса: check_interval, но не раньше, чем предохранители эндпоинтов устройств пропустят запрос"""
+        return max([self.check_interval] + [self.api.breaker(endpoint).retry_in() for endpoint in DEVICE_ENDPOINTS.values()])
+    def error_delay(self, error_count):
+        """Экспоненциальная пауза с разбросом после ошибок цикла, не больше 30 секунд"""
+        return min(30, 3 * 2 ** min(error_count - 1, 4)) * random.uniform(0.5, 1)
+    async def run(self):
+        """Цикл синхронизации: долгий опрос, если сервер его поддерживает, иначе опрос каждые check_interval секунд; повтор неподтвержденных команд не останавливает опрос"""
+        self.log("🧵 Запущена задача управления устройствами")
+        error_count = 0
+        synced = False
+        while True:
+            try:
+                pushed = False
+                if synced and self.resync_due():
+                    await self.resync()
+                if synced and self.push_available():
+                    pushed = await self.push_once()
+                    if not pushed:
+                        await self.poll_once()
+                    wait = not pushed
+                else:
+                    synced = await self.poll_once()
+                    wait = not (synced and self.push_available())
+                await self.refresh_thresholds()
+                self.on_change("update", None)
+                error_count = 0
+                if wait:
+                    await asyncio.sleep(self.next_poll_delay())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error_count += 1
+                if error_count == 1:
+                    self.log(f"❌ Ошибка в задаче управления устройствами: {str(e)}")
+                await asyncio.sleep(self.error_delay(error_count))
@@ -0,0 +1,348 @@
+import time
+import uuid
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+API_BASE_URL = "http://farm429.online/api"
+SENSOR_ENDPOINT = "save-sensor-data.php"
+LED_ENDPOINT = "get-lamp-state.php"
+CURTAINS_ENDPOINT = "get-curtains-state.php"
+THRESHOLDS_ENDPOINT = "get-thresholds.php"
+MAX_ID_ENDPOINT = "get-max-sensor-id.php"
+UPLOAD_ENDPOINT = "upload-image.php"
+DEVICE_EVENTS_ENDPOINT = "wait-device-state.php"
+DEFAULT_TIMEOUT = (3.05, 10)
+UPLOAD_TIMEOUT = (3.05, 60)
+RETRY_STATUSES = (502, 503, 504)
+CACHE_TTLS = {LED_ENDPOINT: 0, CURTAINS_ENDPOINT: 0, THRESHOLDS_ENDPOINT: 300}
+STALE_IF_ERROR = 600
+BREAKER_STATUSES = (500, 502, 503, 504)
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Запрос не отправлялся: предохранитель эндпоинта разомкнут после серии ошибок"""
+    def __init__(self, endpoint, retry_in):
+        super().__init__(f"{endpoint}: сервер недоступен, повтор через {retry_in:.0f} с")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+class CircuitBreaker:
+    """Предохранитель эндпоинта: после failure_threshold ошибок подряд запросы не выполняются до паузы с экспоненциальным ростом и разбросом, затем один пробный"""
+    def __init__(self, name, failure_threshold=3, base_delay=2.0, max_delay=120.0, jitter=0.5, clock=time.monotonic, on_change=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.clock = clock
+        self.on_change = on_change or (lambda breaker, previous: None)
+        self.lock = threading.Lock()
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.open_until = 0.0
+        self.probe_started = None
+        self.trips = 0
+        self.rejected = 0
+    def allow(self):
+        """Можно ли выполнить запрос; по истечении паузы пропускает один пробный запрос"""
+        with self.lock:
+            if self.state == BREAKER_CLOSED:
+                return True
+            now = self.clock()
+            if self.state == BREAKER_OPEN and now >= self.open_until:
+                self.state = BREAKER_HALF_OPEN
+            if self.state == BREAKER_HALF_OPEN and (self.probe_started is None or now - self.probe_started > self.max_delay):
+                self.probe_started = now
+                return True
+            self.rejected += 1
+            return False
+    def retry_in(self):
+        with self.lock:
+            return max(0.0, self.open_until - self.clock()) if self.state == BREAKER_OPEN else 0.0
+    def record_success(self):
+        with self.lock:
+            previous = self.state
+            self.state = BREAKER_CLOSED
+            self.failures = 0
+            self.opened = 0
+            self.probe_started = None
+        if previous != BREAKER_CLOSED:
+            self.on_change(self, previous)
+    def record_failure(self):
+        with self.lock:
+            previous = self.state
+            self.failures += 1
+            self.probe_started = None
+            if previous == BREAKER_CLOSED and self.failures < self.failure_threshold:
+                return
+            self.opened += 1
+            self.trips += 1
+            delay = min(self.max_delay, self.base_delay * (2 ** min(self.opened - 1, 16)))
+            self.open_until = self.clock() + delay * random.uniform(1 - self.jitter, 1)
+            self.state = BREAKER_OPEN
+        self.on_change(self, previous)
+    def snapshot(self):
+        with self.lock:
+            return {'state': self.state, 'failures': self.failures, 'trips': self.trips, 'rejected': self.rejected,
+                    'retry_in': max(0.0, self.open_until - self.clock()) if self.state == BREAKER_OPEN else 0.0}
+class CachedResponse(requests.Response):
+    """Ответ из кэша: тело и заголовки последнего ответа 200, JSON разбирается один раз на версию"""
+    def __init__(self, entry):
+        super().__init__()
+        self.status_code = 200
+        self._content = entry['content']
+        self.headers.update(entry['headers'])
+        self.url = entry['url']
+        self.encoding = entry['encoding']
+        self.entry = entry
+    def json(self, **kwargs):
+        if 'data' not in self.entry:
+            self.entry['data'] = super().json(**kwargs)
+        return self.entry['data']
+class ResponseCache:
+    """Кэш GET-ответов по эндпоинтам: TTL, ревалидация по ETag/Last-Modified и устаревшие данные при сбое сети"""
+    def __init__(self, ttls=CACHE_TTLS, stale_if_error=STALE_IF_ERROR):
+        self.ttls = dict(ttls)
+        self.stale_if_error = stale_if_error
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stale = 0
+    def cacheable(self, endpoint):
+        return endpoint in self.ttls
+    def lookup(self, key, endpoint):
+        """Возвращает (свежий ответ или None, заголовки условного запроса)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None, {}
+            if time.monotonic() - entry['stored'] < self.ttls[endpoint]:
+                self.hits += 1
+                return CachedResponse(entry), {}
+            headers = {}
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+            return None, headers
+    def store(self, key, response):
+        """Учитывает ответ сервера; на 304 продлевает запись и возвращает ее вместо пустого ответа"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if response.status_code == 304 and entry is not None:
+                entry['stored'] = time.monotonic()
+                self.revalidated += 1
+                return CachedResponse(entry)
+            self.misses += 1
+            if response.status_code == 200:
+                self.entries[key] = {
+                    'content': response.content,
+                    'headers': dict(response.headers),
+                    'url': response.url,
+                    'encoding': response.encoding,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'stored': time.monotonic()
+                }
+            return response
+    def fallback(self, key, endpoint):
+        """Последний ответ, если сервер недоступен и запись устарела не более чем на stale_if_error секунд"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or time.monotonic() - entry['stored'] > self.ttls[endpoint] + self.stale_if_error:
+                return None
+            self.stale += 1
+            return CachedResponse(entry)
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'revalidated': self.revalidated, 'stale': self.stale}
+class MultipartStream:
+    """Тело multipart/form-data из буферов в памяти: отдается по частям при отправке, без склейки в один bytes и без временных файлов"""
+    def __init__(self, fields, files):
+        self.boundary = uuid.uuid4().hex
+        self.parts = []
+        for name, value in fields.items():
+            self.parts.append(f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+        for name, (filename, data, content_type) in files.items():
+            self.parts.append(f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                              f'Content-Type: {content_type}\r\n\r\n'.encode())
+            self.parts.append(memoryview(data).cast("B"))
+            self.parts.append(b"\r\n")
+        self.parts.append(f"--{self.boundary}--\r\n".encode())
+        self.length = sum(len(part) for part in self.parts)
+        self.position = 0
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+    def __len__(self):
+        return self.length
+    def __iter__(self):
+        self.seek(0)
+        for part in self.parts:
+            yield part
+        self.position = self.length
+    def tell(self):
+        return self.position
+    def seek(self, offset, whence=0):
+        self.position = min(max(0, offset if whence == 0 else (self.position if whence == 1 else self.length) + offset), self.length)
+        return self.position
+    def read(self, size=-1):
+        """Следующие size байт тела; части копируются только в пределах одного блока отправки"""
+        if size is None or size < 0:
+            size = self.length - self.position
+        chunks = []
+        offset = 0
+        for part in self.parts:
+            if size <= 0:
+                break
+            end = offset + len(part)
+            if end > self.position:
+                start = self.position - offset
+                chunk = part[start:start + size]
+                chunks.append(bytes(chunk))
+                self.position += len(chunk)
+                size -= len(chunk)
+            offset = end
+        return b"".join(chunks)
+class FarmApiClient:
+    """Общий клиент API farm429.online: пул keep-alive соединений, таймауты, повторы, предохранители эндпоинтов и заголовок X-Auth-Token"""
+    def __init__(self, token="", base_url=API_BASE_URL, timeout=DEFAULT_TIMEOUT, pool_size=8, retries=2, backoff=0.3, log=None, cache=None,
+                 failure_threshold=3, breaker_base_delay=2.0, breaker_max_delay=120.0):
+        self.token = token
+        self.failure_threshold = failure_threshold
+        self.breaker_base_delay = breaker_base_delay
+        self.breaker_max_delay = breaker_max_delay
+        self.breakers = {}
+        self.cache = cache if cache is not None else ResponseCache()
+        self.stale_keys = set()
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.log = log or (lambda message: print(f"[LOG] {message}"))
+        self.lock = threading.Lock()
+        self.requests_count = 0
+        self.errors_count = 0
+        self.total_time = 0.0
+        retry = Retry(total=retries, connect=retries, read=retries, status=retries, backoff_factor=backoff,
+                      status_forcelist=RETRY_STATUSES, allowed_methods=frozenset(["GET", "HEAD"]), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+    def url(self, endpoint):
+        if endpoint.startswith("http://") or endpoint.startswith("https://"):
+            return endpoint
+        return f"{self.base_url}/{endpoint}"
+    def breaker(self, endpoint):
+        with self.lock:
+            breaker = self.breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(endpoint, self.failure_threshold, self.breaker_base_delay, self.breaker_max_delay,
+                                         on_change=self.breaker_changed)
+                self.breakers[endpoint] = breaker
+            return breaker
+    def breaker_changed(self, breaker, previous):
+        if breaker.state == BREAKER_OPEN and previous == BREAKER_CLOSED:
+            self.log(f"⚠️ {breaker.name}: {breaker.failures} ошибок подряд, запросы приостановлены на {breaker.retry_in():.1f} с")
+        elif breaker.state == BREAKER_CLOSED:
+            self.log(f"✅ {breaker.name}: связь с сервером восстановлена")
+    def request(self, method, endpoint, timeout=None, headers=None, **kwargs):
+        """Выполняет запрос через общий пул; POST повторяется только при ошибке установки соединения, при разомкнутом предохранителе - CircuitOpenError"""
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            raise CircuitOpenError(endpoint, breaker.retry_in())
+        request_headers = {'X-Auth-Token': self.token}
+        request_headers.update(headers or {})
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.url(endpoint), headers=request_headers, timeout=timeout or self.timeout, **kwargs)
+        except Exception:
+            with self.lock:
+                self.errors_count += 1
+            breaker.record_failure()
+            raise
+        finally:
+            with self.lock:
+                self.requests_count += 1
+                self.total_time += time.perf_counter() - start
+        if response.status_code in BREAKER_STATUSES:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+    def get(self, endpoint, **kwargs):
+        """GET; для эндпоинтов из кэша - свежая копия, условный запрос или устаревшая копия при сбое сети"""
+        if not self.cache.cacheable(endpoint) or kwargs.get('params'):
+            return self.request("GET", endpoint, **kwargs)
+        key = (self.token, self.url(endpoint))
+        cached, conditional = self.cache.lookup(key, endpoint)
+        if cached is not None:
+            return cached
+        headers = dict(kwargs.pop('headers', None) or {}, **conditional)
+        try:
+            response = self.request("GET", endpoint, headers=headers, **kwargs)
+        except requests.exceptions.RequestException as e:
+            stale = self.use_stale(key, endpoint, str(e))
+            if stale is None:
+                raise
+            return stale
+        if response.status_code >= 500:
+            stale = self.use_stale(key, endpoint, f"HTTP {response.status_code}")
+            if stale is not None:
+                return stale
+        self.stale_keys.discard(key)
+        return self.cache.store(key, response)
+    def use_stale(self, key, endpoint, reason):
+        stale = self.cache.fallback(key, endpoint)
+        if stale is not None and key not in self.stale_keys:
+            self.stale_keys.add(key)
+            self.log(f"⚠️ Нет ответа от {endpoint} ({reason}), используются последние полученные данные")
+        return stale
+    def post(self, endpoint, **kwargs):
+        return self.request("POST", endpoint, **kwargs)
+    def post_multipart(self, endpoint, fields, files, headers=None, **kwargs):
+        """POST multipart/form-data потоком из памяти; files - {поле: (имя файла, байты или буфер, тип)}"""
+        body = MultipartStream(fields, files)
+        request_headers = {'Content-Type': body.content_type}
+        request_headers.update(headers or {})
+        return self.request("POST", endpoint, data=body, headers=request_headers, **kwargs)
+    def stats(self):
+        with self.lock:
+            breakers = list(self.breakers.values())
+            stats = {
+                'requests': self.requests_count,
+                'errors': self.errors_count,
+                'avg_ms': self.total_time * 1000 / self.requests_count if self.requests_count else 0.0
+            }
+        stats['breaker_trips'] = sum(breaker.trips for breaker in breakers)
+        stats['rejected'] = sum(breaker.rejected for breaker in breakers)
+        return stats
+    def breaker_states(self):
+        """Состояние предохранителя по каждому эндпоинту, к которому были запросы"""
+        with self.lock:
+            breakers = list(self.breakers.values())
+        return {breaker.name: breaker.snapshot() for breaker in breakers}
+    def health(self):
+        """Сводное состояние связи: (худшее состояние предохранителей, секунд до следующей попытки)"""
+        states = self.breaker_states().values()
+        for state in (BREAKER_OPEN, BREAKER_HALF_OPEN):
+            matching = [snapshot['retry_in'] for snapshot in states if snapshot['state'] == state]
+            if matching:
+                return state, min(matching)
+        return BREAKER_CLOSED, 0.0
+    def format_stats(self):
+        stats = self.stats()
+        cache = self.cache.stats()
+        return (f"запросов {stats['requests']}, ошибок {stats['errors']}, среднее время {stats['avg_ms']:.1f} мс; "
+                f"кэш: попаданий {cache['hits']}, не изменилось (304) {cache['revalidated']}, "
+                f"загружено {cache['misses']}, устаревших при сбое {cache['stale']}; "
+                f"предохранитель: срабатываний {stats['breaker_trips']}, не отправлено запросов {stats['rejected']}")
+    def close(self):
+        self.session.close()
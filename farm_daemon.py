@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import signal
+import argparse
+import threading
+import time
+from datetime import datetime
+import serial
+from sensor_protocol import UPLOAD_MODES, UPLOAD_SUMMARY
+from serial_io import SerialPortActor
+from sensor_store import SensorStore
+from sensor_ingest import SensorIngest
+from farm_api import FarmApiClient, API_BASE_URL, UPLOAD_ENDPOINT
+from network_engine import NetworkEngine
+from device_control import DeviceController
+from automation import AutomationEngine, DeviceStates
+from camera import CameraManager, WARMUP_FRAMES
+from photo_pipeline import PhotoPipeline, PHOTO_SCHEDULED
+from farm_photos import PhotoSchedule, FarmPhotographer, PHOTO_MODE_DAILY
+from photo_settings import ANALYSIS_SIZES, JPEG_QUALITY
+CONFIG_FILE = os.path.join(os.path.expanduser("~"), "fitodomik_config.json")
+SENSOR_DB_FILE = os.path.join(os.path.expanduser("~"), "fitodomik_sensors.db")
+LOCAL_PATH = os.path.join(os.path.expanduser("~"), "FitoDomik_photos")
+DEFAULT_SETTINGS = {
+    'api_token': '',
+    'serial_port': 'COM10',
+    'baud_rate': 9600,
+    'protocol_mode': "text",
+    'binary_baud_rate': 115200,
+    'camera_index': 0,
+    'camera_warmup_frames': WARMUP_FRAMES,
+    'analysis_max_side': None,
+    'analysis_roi': None,
+    'jpeg_quality': JPEG_QUALITY,
+    'photo_archive': False,
+    'sensor_interval': 60,
+    'upload_mode': UPLOAD_SUMMARY,
+    'photo_interval': 3600,
+    'photo_mode': PHOTO_MODE_DAILY,
+    'photo_time1': "13:00",
+    'photo_time2': "16:00",
+    'automation_enabled': False
+}
+QUIET_PREFIXES = ("📊 Получены данные:",)
+STOP_POLL_INTERVAL = 0.2
+def load_settings(path=CONFIG_FILE):
+    """Настройки из того же JSON, что сохраняет приложение; отсутствующие и некорректные значения берутся по умолчанию"""
+    settings = dict(DEFAULT_SETTINGS)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            settings.update({key: value for key, value in json.load(f).items() if key in DEFAULT_SETTINGS})
+    if settings['analysis_max_side'] not in ANALYSIS_SIZES:
+        settings['analysis_max_side'] = None
+    if settings['upload_mode'] not in UPLOAD_MODES:
+        settings['upload_mode'] = UPLOAD_SUMMARY
+    return settings
+class DaemonLog:
+    """Журнал без интерфейса: строки с отметкой времени в файл или stdout, из любых потоков"""
+    def __init__(self, stream, verbose=False):
+        self.stream = stream
+        self.verbose = verbose
+        self.lock = threading.Lock()
+    def __call__(self, message):
+        if not self.verbose and message.startswith(QUIET_PREFIXES):
+            return
+        if not message.startswith("📅"):
+            message = f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}"
+        with self.lock:
+            self.stream.write(message + "\n")
+            self.stream.flush()
+class FarmDaemon:
+    """Прием показаний, управление лампой и шторами и фото по расписанию без Qt; те же компоненты, что в приложении"""
+    def __init__(self, settings, db_path=SENSOR_DB_FILE, archive_dir=LOCAL_PATH, base_url=API_BASE_URL, photos=True, log=None):
+        self.settings = settings
+        self.db_path = db_path
+        self.archive_dir = archive_dir
+        self.photos = photos
+        self.log = log or (lambda message: print(f"[LOG] {message}"))
+        self.client = FarmApiClient(settings['api_token'], base_url=base_url, log=self.log)
+        self.engine = NetworkEngine(log=self.log)
+        self.devices = DeviceStates(serial_actor=lambda: self.serial_actor, device_controller=lambda: self.device_controller, log=self.log)
+        self.automation = AutomationEngine(actuate=self.devices.actuate, enabled=settings['automation_enabled'], log=self.log)
+        self.devices.automation = self.automation
+        self.serial_actor = None
+        self.store = None
+        self.ingest = None
+        self.device_controller = None
+        self.camera = None
+        self.photo_pipeline = None
+    def open_serial_connection(self):
+        port, baud_rate = self.settings['serial_port'], self.settings['baud_rate']
+        self.serial_actor = SerialPortActor(serial.serial_for_url(port, baud_rate, timeout=1), log=self.log)
+        self.serial_actor.start()
+        self.log(f"✅ Подключено к Arduino на порту {port}")
+        if self.settings['protocol_mode'] == "binary":
+            self.serial_actor.enable_binary(self.settings['binary_baud_rate'])
+    def start(self):
+        settings = self.settings
+        self.open_serial_connection()
+        self.store = SensorStore(self.db_path, log=self.log)
+        try:
+            self.store.open()
+        except Exception as e:
+            self.log(f"❌ Ошибка открытия локальной базы показаний: {str(e)}")
+            self.store = None
+        self.engine.start()
+        self.ingest = SensorIngest(self.serial_actor, self.client, self.db_path, settings['sensor_interval'], self.store,
+                                   settings['upload_mode'], self.engine, self.automation,
+                                   device_states=self.devices.snapshot, log=self.log)
+        self.ingest.start()
+        self.device_controller = DeviceController(self.client, self.serial_actor, self.engine, on_change=self.devices.handle_device_change, log=self.log)
+        self.device_controller.follow_server = not settings['automation_enabled']
+        self.engine.spawn("devices", self.device_controller.run)
+        if self.photos:
+            self.camera = CameraManager(settings['camera_index'], settings['camera_warmup_frames'])
+            archive_dir = self.archive_dir if settings['photo_archive'] else ""
+            photographer = FarmPhotographer(self.camera, self.client, settings['analysis_max_side'], settings['analysis_roi'],
+                                            settings['jpeg_quality'], archive_dir, log=self.log)
+            self.photo_pipeline = PhotoPipeline(photographer.capture, photographer.analyze, photographer.upload,
+                                                retry_after=self.client.breaker(UPLOAD_ENDPOINT).retry_in, log=self.log)
+            schedule = PhotoSchedule(lambda: self.photo_pipeline.request(PHOTO_SCHEDULED), settings['photo_mode'], settings['photo_interval'],
+                                     settings['photo_time1'], settings['photo_time2'], log=self.log)
+            self.engine.spawn("photos", schedule.run)
+        self.log("🚀 Система запущена без интерфейса")
+    def stop(self):
+        """Останавливает компоненты в обратном порядке; неотправленные показания остаются в очереди отправки"""
+        if self.ingest is not None:
+            self.ingest.stop()
+        self.engine.stop()
+        self.device_controller = None
+        if self.photo_pipeline is not None:
+            self.photo_pipeline.stop()
+            if self.photo_pipeline.captured:
+                self.log(f"📷 Фото: {self.photo_pipeline.format_stats()}")
+        if self.camera is not None:
+            self.camera.release()
+        if self.store is not None:
+            self.store.close()
+        if self.serial_actor is not None:
+            self.serial_actor.close()
+        self.log(f"📊 Запросы к серверу: {self.client.format_stats()}")
+        self.client.close()
+        self.log("Система остановлена!")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ФитоДомик без интерфейса: датчики, лампа и шторы, фото по расписанию")
+    parser.add_argument("--headless", action="store_true", help="принимается для запуска через FitoDomik.py --headless")
+    parser.add_argument("--config", default=CONFIG_FILE, help=f"файл настроек приложения (по умолчанию {CONFIG_FILE})")
+    parser.add_argument("--log-file", help="дописывать журнал в файл вместо stdout")
+    parser.add_argument("--port", help="порт или URL pyserial вместо указанного в настройках")
+    parser.add_argument("--server", default=API_BASE_URL, help="адрес API сервера (например, заглушки из benchmarks)")
+    parser.add_argument("--no-photos", action="store_true", help="не открывать камеру и не снимать по расписанию")
+    parser.add_argument("--verbose", action="store_true", help="писать в журнал каждую строку показаний")
+    args = parser.parse_args(argv)
+    stream = open(args.log_file, 'a', encoding='utf-8') if args.log_file else sys.stdout
+    log = DaemonLog(stream, args.verbose)
+    if not os.path.exists(args.config):
+        log(f"Файл настроек {args.config} не найден, будут использованы значения по умолчанию")
+    try:
+        settings = load_settings(args.config)
+    except (OSError, ValueError) as e:
+        log(f"❌ Ошибка при загрузке настроек {args.config}: {str(e)}")
+        return 1
+    if args.port:
+        settings['serial_port'] = args.port
+    received = []
+    def request_stop(signum, frame):
+        """Только запоминает сигнал: обработчик не должен брать блокировки, которые может держать прерванный основной поток"""
+        received.append(signal.Signals(signum).name)
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    daemon = FarmDaemon(settings, base_url=args.server, photos=not args.no_photos, log=log)
+    try:
+        daemon.start()
+    except Exception as e:
+        log(f"❌ Ошибка запуска: {str(e)}")
+        daemon.stop()
+        return 1
+    while not received:
+        time.sleep(STOP_POLL_INTERVAL)
+    log(f"Получен сигнал {received[0]}, останавливаемся...")
+    daemon.stop()
+    return 0
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import asyncio
+from datetime import datetime
+from farm_api import CircuitOpenError, UPLOAD_ENDPOINT, UPLOAD_TIMEOUT
+from photo_settings import JPEG_QUALITY
+PHOTO_MODE_TEST = "Каждые 10 минут (тест)"
+PHOTO_MODE_DAILY = "Раз в день"
+PHOTO_MODE_TWICE = "Два раза в день"
+class PhotoSchedule:
+    """Расписание фото без Qt: задача сетевого движка, которая в нужное время вызывает request"""
+    def __init__(self, request, mode=PHOTO_MODE_DAILY, interval=3600, time1="13:00", time2="16:00", log=None):
+        self.request = request
+        self.mode = mode
+        self.interval = interval
+        self.time1 = time1
+        self.time2 = time2
+        self.log = log or (lambda message: print(f"[LOG] {message}"))
+    def describe(self):
+        if self.mode == PHOTO_MODE_TEST:
+            return f"режим = {self.mode}"
+        elif self.mode == PHOTO_MODE_DAILY:
+            return f"режим = {self.mode} в {self.time1}"
+        return f"режим = {self.mode} в {self.time1} и {self.time2}"
+    def time_points(self):
+        """Секунды от начала суток для каждого времени съемки: {секунды: "ЧЧ:ММ"}"""
+        times = [self.time1] if self.mode == PHOTO_MODE_DAILY else [self.time1, self.time2]
+        points = {}
+        for idx, time_str in enumerate(times):
+            try:
+                hours, minutes = map(int, time_str.split(':'))
+                points[hours * 3600 + minutes * 60] = time_str
+            except ValueError:
+                self.log(f"❌ Ошибка формата времени {idx+1}: {time_str}")
+        return points
+    async def run(self):
+        self.log(f"🧵 Запущена задача периодического фотографирования: {self.describe()}")
+        last_photo_time = time.time()
+        current_day = datetime.now().day
+        photos_taken_today = {}
+        while True:
+            try:
+                current_time = time.time()
+                now = datetime.now()
+                if now.day != current_day:
+                    current_day = now.day
+                    photos_taken_today = {}
+                    self.log(f"Новый день ({now.strftime('%Y-%m-%d')}). Сбрасываем информацию о сделанных фото.")
+                if self.mode == PHOTO_MODE_TEST:
+                    if current_time - last_photo_time >= self.interval:
+                        self.log(f"Делаем тестовое фото (прошло {int((current_time - last_photo_time))} секунд)")
+                        self.request()
+                        last_photo_time = time.time()
+                else:
+                    current_seconds = now.hour * 3600 + now.minute * 60 + now.second
+                    for seconds, time_key in sorted(self.time_points().items()):
+                        if photos_taken_today.get(time_key):
+                            continue
+                        if abs(current_seconds - seconds) <= 30:
+                            self.log(f"Наступило запланированное время для фото: {time_key}")
+                            self.request()
+                            last_photo_time = time.time()
+                            photos_taken_today[time_key] = True
+                            break
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.log(f"❌ Ошибка в задаче фотографирования: {str(e)}")
+                await asyncio.sleep(10)
+class FarmPhotographer:
+    """Стадии конвейера фото без Qt: кадр с общей камеры, анализ и JPEG в памяти, архив и загрузка на сервер"""
+    def __init__(self, camera, client, max_side=None, roi=None, jpeg_quality=JPEG_QUALITY, archive_dir="", log=None):
+        self.camera = camera
+        self.client = client
+        self.max_side = max_side
+        self.roi = roi
+        self.jpeg_quality = jpeg_quality
+        self.archive_dir = archive_dir
+        self.log = log or (lambda message: print(f"[LOG] {message}"))
+    def configure(self, max_side=None, roi=None, jpeg_quality=JPEG_QUALITY, archive_dir=""):
+        """Настройки анализа и архива; действуют со следующего фото"""
+        self.max_side = max_side
+        self.roi = roi
+        self.jpeg_quality = jpeg_quality
+        self.archive_dir = archive_dir
+    def capture(self):
+        """Съемка для конвейера фото: кадр берется из общего подключения, открытого и прогретого заранее"""
+        self.log("📸 Делаем фото с камеры...")
+        frame = self.camera.read()
+        if frame is None:
+            self.log("❌ Ошибка подключения камеры" if not self.camera.is_open else "❌ Ошибка получения изображения с камеры")
+        return frame
+    def analyze(self, job):
+        """Анализ кадра в потоке конвейера: контуры, оценка здоровья, JPEG в памяти и архив; возвращает данные для загрузки"""
+        from plant_analysis import detect_plant, analyze_health, format_report, encode_jpeg
+        self.log("🔍 Анализируем изображение растения...")
+        job.detection_image, _, color_percentages = detect_plant(job.frame, max_side=self.max_side, roi=self.roi)
+        job.analysis = analyze_health(color_percentages)
+        moment = datetime.now()
+        original_jpeg = encode_jpeg(job.frame, self.jpeg_quality)
+        analysis_jpeg = encode_jpeg(job.detection_image, self.jpeg_quality)
+        if self.archive_dir:
+            self.archive(moment, original_jpeg, analysis_jpeg)
+        data = {
+            'text': format_report(job.analysis, moment),
+            'timestamp': moment.strftime('%Y-%m-%d %H:%M:%S'),
+            'has_analysis': 'true'
+        }
+        files = {
+            'image': ('original.jpg', original_jpeg, 'image/jpeg'),
+            'analysis_image': ('analysis.jpg', analysis_jpeg, 'image/jpeg')
+        }
+        return data, files
+    def archive(self, moment, original_jpeg, analysis_jpeg):
+        """Сохраняет уже закодированные JPEG в архив фото; ошибка архива не мешает загрузке"""
+        try:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            timestamp = moment.strftime('%Y%m%d_%H%M%S')
+            for filename, buffer in ((f"farm_photo_{timestamp}.jpg", original_jpeg), (f"farm_analysis_{timestamp}.jpg", analysis_jpeg)):
+                with open(os.path.join(self.archive_dir, filename), 'wb') as f:
+                    f.write(buffer)
+        except OSError as e:
+            self.log(f"❌ Ошибка сохранения фото в архив: {str(e)}")
+    def upload(self, job):
+        """Загрузка фото в пуле конвейера: JPEG отправляются потоком из памяти; False - попытка будет повторена"""
+        data, files = job.payload
+        try:
+            response = self.client.post_multipart(UPLOAD_ENDPOINT, data, files, timeout=UPLOAD_TIMEOUT)
+        except CircuitOpenError:
+            return False
+        if response.status_code != 200:
+            self.log(f"❌ Ошибка сервера: {response.status_code}")
+            return False
+        try:
+            response_data = response.json()
+        except json.JSONDecodeError:
+            self.log("❌ Ошибка обработки ответа сервера")
+            return False
+        if not response_data.get('success'):
+            self.log(f"❌ Ошибка сервера: {response_data.get('message', 'Неизвестная ошибка')}")
+            return False
+        self.log(f"✅ Фото успешно загружено для пользователя с ID: {response_data.get('user_id')}")
+        self.log("✅ Анализ растения успешно загружен на сервер")
+        return True
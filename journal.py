@@ -0,0 +1,134 @@
+import re
+import threading
+from datetime import datetime
+JOURNAL_CAPACITY = 20000
+REPORT_SEPARATOR = "────────────────────────────────────"
+IMPORTANT_MESSAGES = (
+    "API токен сохранен",
+    "Подключено к Arduino",
+    "Камера с индексом",
+    "Интервалы обновлены",
+    "Система запущена",
+    "Система остановлена",
+    "ID записи:",
+    "Температура воздуха:",
+    "Влажность воздуха:",
+    "Влажность почвы:",
+    "Уровень освещенности:",
+    "CO₂ уровень:",
+    "Атм. давление:",
+    "Лампа:",
+    "Шторы:",
+    "Делаем фото с камеры",
+    "Анализируем изображение",
+    "Фото успешно загружено",
+    "Анализ растения успешно",
+    "Настройки успешно",
+    "Используются настройки",
+    "В очереди отправки",
+    "Сервер недоступен",
+    "Связь с сервером восстановлена",
+    "Запросы к серверу",
+    "каналу долгого опроса",
+    "не поддерживает канал",
+    "используются последние полученные данные",
+    "Автоматика",
+    "Пороги автоматики",
+    "Пороги с сервера не распознаны",
+    "запросы приостановлены",
+    "связь с сервером восстановлена",
+    "Настройки фото",
+    "Фото: снято",
+    "Повтор загрузки фото",
+    "пропущено: предыдущее фото",
+    "Очередь загрузки фото переполнена",
+    "уже занят на сервере",
+    "Найдены последовательные порты"
+)
+class JournalFilter:
+    """Отбор сообщений для журнала одним заранее скомпилированным выражением: ошибки, важные события и отчеты об отправке"""
+    def __init__(self, important=IMPORTANT_MESSAGES):
+        self.important = re.compile("|".join(map(re.escape, tuple(important) + (REPORT_SEPARATOR,))))
+    def __call__(self, message):
+        if message.startswith("❌") or self.important.search(message) is not None:
+            return True
+        lowered = message.lower()
+        return "ошибка" in lowered or "error" in lowered
+class Journal:
+    """Журнал событий фиксированного размера: кольцевой буфер строк и очередь новых строк для пакетного вывода; без Qt"""
+    def __init__(self, capacity=JOURNAL_CAPACITY, message_filter=None):
+        self.capacity = capacity
+        self.filter = message_filter or JournalFilter()
+        self.lock = threading.Lock()
+        self.lines = [None] * capacity
+        self.start = 0
+        self.size = 0
+        self.pending = []
+        self.accepted = 0
+        self.skipped = 0
+        self.evicted = 0
+    def __len__(self):
+        return self.size
+    def line(self, row):
+        """Строка по номеру от самой старой; O(1) для любого номера"""
+        return self.lines[(self.start + row) % self.capacity]
+    def add(self, message, moment=None):
+        """Отбирает и датирует сообщение и ставит его строки в очередь вывода; возвращает False, если сообщение отфильтровано"""
+        if not self.filter(message):
+            self.skipped += 1
+            return False
+        if not message.startswith("📅"):
+            message = f"{(moment or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')} - {message}"
+        with self.lock:
+            self.pending.extend(message.split("\n"))
+            if len(self.pending) > self.capacity:
+                del self.pending[:len(self.pending) - self.capacity]
+            self.accepted += 1
+        return True
+    def take_pending(self):
+        """Забирает накопленные строки; их не больше capacity"""
+        with self.lock:
+            pending, self.pending = self.pending, []
+        return pending
+    def overflow(self, count):
+        """Сколько старых строк нужно вытеснить, чтобы поместились count новых"""
+        return max(0, self.size + min(count, self.capacity) - self.capacity)
+    def evict(self, count):
+        count = min(count, self.size)
+        for offset in range(count):
+            self.lines[(self.start + offset) % self.capacity] = None
+        self.start = (self.start + count) % self.capacity
+        self.size -= count
+        self.evicted += count
+    def extend(self, lines):
+        """Дописывает строки в конец; место под них освобождается заранее через evict"""
+        for line in lines[-self.capacity:]:
+            if self.size == self.capacity:
+                self.evict(1)
+            self.lines[(self.start + self.size) % self.capacity] = line
+            self.size += 1
+    def flush(self):
+        """Переносит очередь в буфер без модели Qt; возвращает число добавленных строк"""
+        pending = self.take_pending()
+        self.evict(self.overflow(len(pending)))
+        self.extend(pending)
+        return len(pending)
+    def clear(self):
+        with self.lock:
+            self.pending = []
+        self.lines = [None] * self.capacity
+        self.start = 0
+        self.size = 0
+    def text(self):
+        """Весь журнал одной строкой, как toPlainText прежнего поля журнала; еще не выведенные строки тоже включаются"""
+        with self.lock:
+            pending = list(self.pending)
+        return "\n".join([self.line(row) for row in range(self.size)] + pending)
+    def stats(self):
+        return {
+            'lines': self.size,
+            'capacity': self.capacity,
+            'accepted': self.accepted,
+            'skipped': self.skipped,
+            'evicted': self.evicted
+        }
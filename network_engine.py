@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+class NetworkEngine:
+    """Единый цикл asyncio в отдельном потоке для всех сетевых задач; блокирующие HTTP-вызовы идут через ограниченный пул"""
+    def __init__(self, workers=4, log=None):
+        self.workers = workers
+        self.log = log or (lambda message: print(f"[LOG] {message}"))
+        self.loop = None
+        self.thread = None
+        self.executor = None
+        self.tasks = {}
+        self.ready = threading.Event()
+    @property
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+    def start(self):
+        if self.is_running:
+            return self
+        self.ready.clear()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="NetworkEngineIO")
+        self.thread = threading.Thread(target=self.run, name="NetworkEngine", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        return self
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self.ready.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+    def stop(self, timeout=10):
+        """Отменяет все задачи, дожидается их завершения и останавливает цикл"""
+        if not self.is_running:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.cancel_all(), self.loop).result(timeout)
+        except Exception as e:
+            self.log(f"❌ Ошибка остановки сетевых задач: {str(e)}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+        self.thread = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = None
+    def submit(self, coroutine):
+        """Запускает корутину в цикле движка из любого потока; возвращает concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+    async def call(self, func, *args, **kwargs):
+        """Выполняет блокирующую функцию в пуле движка, не блокируя цикл"""
+        return await self.loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+    async def call_detached(self, func, *args, **kwargs):
+        """Как call, но в отдельном фоновом потоке: долгий запрос не задерживает остановку движка и выход из программы"""
+        future = self.loop.create_future()
+        def target():
+            try:
+                result, error = func(*args, **kwargs), None
+            except Exception as e:
+                result, error = None, e
+            try:
+                self.loop.call_soon_threadsafe(self.settle, future, result, error)
+            except RuntimeError:
+                pass
+        threading.Thread(target=target, name="NetworkEngineLongCall", daemon=True).start()
+        return await future
+    @staticmethod
+    def settle(future, result, error):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    def spawn(self, name, coroutine_function, *args):
+        """Запускает именованную задачу; задача с тем же именем перед этим отменяется"""
+        return self.submit(self.replace_task(name, coroutine_function, *args))
+    def cancel(self, name, timeout=10):
+        """Отменяет именованную задачу и ждет ее завершения"""
+        if not self.is_running:
+            return
+        try:
+            self.submit(self.cancel_task(name)).result(timeout)
+        except Exception as e:
+            self.log(f"❌ Ошибка отмены задачи {name}: {str(e)}")
+    async def replace_task(self, name, coroutine_function, *args):
+        await self.cancel_task(name)
+        task = self.loop.create_task(self.guard(name, coroutine_function(*args)), name=name)
+        self.tasks[name] = task
+        task.add_done_callback(lambda finished: self.tasks.pop(name, None) if self.tasks.get(name) is finished else None)
+        return task
+    async def cancel_task(self, name):
+        task = self.tasks.pop(name, None)
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    async def cancel_all(self):
+        for name in list(self.tasks):
+            await self.cancel_task(name)
+        pending = [task for task in asyncio.all_tasks(self.loop) if task is not asyncio.current_task()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    async def guard(self, name, coroutine):
+        try:
+            return await coroutine
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.log(f"❌ Сетевая задача {name} завершилась с ошибкой: {str(e)}")
+    def thread_count(self):
+        """Число потоков движка: поток цикла и уже созданные рабочие потоки пула"""
+        return (1 if self.is_running else 0) + (len(self.executor._threads) if self.executor is not None else 0)
@@ -0,0 +1,183 @@
+import time
+import queue
+import random
+import threading
+from collections import deque
+PHOTO_SCHEDULED = "по расписанию"
+PHOTO_MANUAL = "вручную"
+class PhotoJob:
+    """Одно фото на пути через конвейер: кадр, результат анализа, готовые к отправке данные и попытки загрузки"""
+    def __init__(self, source):
+        self.source = source
+        self.requested = time.time()
+        self.frame = None
+        self.detection_image = None
+        self.analysis = None
+        self.payload = None
+        self.attempts = 0
+        self.not_before = 0.0
+class PhotoPipeline:
+    """Конвейер фото: съемка и анализ в одном потоке, загрузка в пуле потоков с повторами; стадии связаны ограниченными очередями"""
+    def __init__(self, capture, analyze, upload, upload_workers=2, capture_queue=1, upload_queue=4, retries=3,
+                 retry_interval=30.0, max_retry_interval=600.0, retry_after=None, on_result=None, on_idle=None, log=None):
+        self.capture = capture
+        self.analyze = analyze
+        self.upload = upload
+        self.upload_workers = upload_workers
+        self.upload_queue = upload_queue
+        self.retries = retries
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.retry_after = retry_after or (lambda: 0.0)
+        self.on_result = on_result or (lambda job: None)
+        self.on_idle = on_idle or (lambda: None)
+        self.log = log or (lambda message: print(f"[LOG] {message}"))
+        self.requests = queue.Queue(maxsize=capture_queue)
+        self.uploads = deque()
+        self.condition = threading.Condition()
+        self.busy = 0
+        self.threads = []
+        self.running = False
+        self.captured = 0
+        self.uploaded = 0
+        self.capture_failures = 0
+        self.upload_failures = 0
+        self.dropped_requests = 0
+        self.dropped_uploads = 0
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.threads = [threading.Thread(target=self.run_analysis, name="PhotoAnalysis", daemon=True)]
+        self.threads += [threading.Thread(target=self.run_uploads, name=f"PhotoUpload{i}", daemon=True) for i in range(self.upload_workers)]
+        for thread in self.threads:
+            thread.start()
+        return self
+    def stop(self, timeout=5):
+        """Останавливает потоки; фото в очереди загрузки остаются и уйдут после следующего start, невзятый сигнал остановки убирается из очереди съемки"""
+        if not self.running:
+            return
+        self.running = False
+        try:
+            self.requests.put_nowait(None)
+        except queue.Full:
+            pass
+        with self.condition:
+            self.condition.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self.threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+        self.threads = []
+        try:
+            job = self.requests.get_nowait()
+        except queue.Empty:
+            return
+        self.requests.task_done()
+        if job is not None:
+            self.requests.put_nowait(job)
+    def request(self, source=PHOTO_MANUAL):
+        """Ставит съемку в очередь и сразу возвращается; если предыдущее фото еще снимается или анализируется, запрос отбрасывается"""
+        self.start()
+        try:
+            self.requests.put_nowait(PhotoJob(source))
+            return True
+        except queue.Full:
+            self.dropped_requests += 1
+            self.log(f"⚠️ Фото {source} пропущено: предыдущее фото еще обрабатывается")
+            return False
+    def run_analysis(self):
+        while self.running:
+            job = self.requests.get()
+            try:
+                if job is not None:
+                    self.process(job)
+            finally:
+                self.requests.task_done()
+            if job is not None and self.requests.unfinished_tasks == 0:
+                self.on_idle()
+    def process(self, job):
+        try:
+            job.frame = self.capture()
+            if job.frame is None:
+                self.capture_failures += 1
+                self.log("❌ Не удалось получить изображение с камеры")
+                return
+            self.captured += 1
+            job.payload = self.analyze(job)
+            self.on_result(job)
+        except Exception as e:
+            self.capture_failures += 1
+            self.log(f"❌ Ошибка при выполнении фотографирования: {str(e)}")
+            return
+        finally:
+            job.frame = None
+            job.detection_image = None
+        if job.payload is not None:
+            self.enqueue_upload(job)
+    def enqueue_upload(self, job):
+        """Ставит фото в очередь загрузки; при переполнении отбрасывается самое старое ожидающее фото"""
+        with self.condition:
+            if len(self.uploads) >= self.upload_queue:
+                dropped = self.uploads.popleft()
+                self.dropped_uploads += 1
+                self.log(f"⚠️ Очередь загрузки фото переполнена, отброшено фото от {time.strftime('%H:%M:%S', time.localtime(dropped.requested))}")
+            self.uploads.append(job)
+            self.condition.notify()
+    def next_upload(self):
+        """Ждет фото, время повтора которого наступило; None - конвейер остановлен"""
+        with self.condition:
+            while self.running:
+                now = time.monotonic()
+                ready = [job for job in self.uploads if job.not_before <= now]
+                if ready:
+                    self.uploads.remove(ready[0])
+                    self.busy += 1
+                    return ready[0]
+                wait = min((job.not_before - now for job in self.uploads), default=None)
+                self.condition.wait(wait)
+            return None
+    def retry_delay(self, attempts):
+        delay = min(self.max_retry_interval, self.retry_interval * (2 ** (attempts - 1))) * random.uniform(0.5, 1.0)
+        return max(delay, self.retry_after())
+    def run_uploads(self):
+        while True:
+            job = self.next_upload()
+            if job is None:
+                return
+            try:
+                ok = self.upload(job)
+            except Exception as e:
+                self.log(f"❌ Ошибка при загрузке на сервер: {str(e)}")
+                ok = False
+            with self.condition:
+                self.busy -= 1
+                if ok:
+                    self.uploaded += 1
+                    continue
+                self.upload_failures += 1
+                job.attempts += 1
+                if job.attempts > self.retries:
+                    self.dropped_uploads += 1
+                    self.log(f"❌ Фото {job.source} не загружено после {job.attempts} попыток и удалено из очереди")
+                    continue
+                delay = self.retry_delay(job.attempts)
+                job.not_before = time.monotonic() + delay
+                self.uploads.appendleft(job)
+                self.condition.notify()
+            self.log(f"⚠️ Повтор загрузки фото через {delay:.0f} с (попытка {job.attempts + 1} из {self.retries + 1})")
+    def stats(self):
+        with self.condition:
+            queued = len(self.uploads) + self.busy
+        return {
+            'captured': self.captured,
+            'uploaded': self.uploaded,
+            'capture_failures': self.capture_failures,
+            'upload_failures': self.upload_failures,
+            'dropped_requests': self.dropped_requests,
+            'dropped_uploads': self.dropped_uploads,
+            'queued': queued
+        }
+    def format_stats(self):
+        stats = self.stats()
+        return (f"снято {stats['captured']}, загружено {stats['uploaded']}, в очереди {stats['queued']}, "
+                f"пропущено съемок {stats['dropped_requests']}, отброшено загрузок {stats['dropped_uploads']}")
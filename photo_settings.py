@@ -0,0 +1,13 @@
+ANALYSIS_SIZES = (None, 1920, 1280, 960, 640)
+JPEG_QUALITY = 95
+def parse_roi(text):
+    """Разбирает область из строки 'x, y, ширина, высота' в процентах кадра; пустая строка - весь кадр"""
+    text = text.strip()
+    if not text:
+        return None
+    values = [float(part) for part in text.replace(";", ",").split(",")]
+    if len(values) != 4 or min(values) < 0 or values[0] + values[2] > 100 or values[1] + values[3] > 100 or values[2] <= 0 or values[3] <= 0:
+        raise ValueError("Область задается четырьмя числами в процентах: x, y, ширина, высота")
+    return [value / 100 for value in values]
+def format_roi(roi):
+    return ", ".join(f"{value * 100:g}" for value in roi) if roi else ""
@@ -0,0 +1,145 @@
+import cv2
+import numpy as np
+from photo_settings import ANALYSIS_SIZES, JPEG_QUALITY, parse_roi, format_roi
+LEAF_COLORS = {
+    "healthy_green": {"lower": np.array([35, 30, 30]), "upper": np.array([85, 255, 255]), "name": "здоровый зеленый"},
+    "yellow": {"lower": np.array([20, 30, 30]), "upper": np.array([35, 255, 255]), "name": "желтый"},
+    "brown": {"lower": np.array([10, 30, 10]), "upper": np.array([20, 255, 255]), "name": "коричневый"},
+    "light_green": {"lower": np.array([35, 30, 30]), "upper": np.array([85, 100, 255]), "name": "светло-зеленый"}
+}
+MIN_CONTOUR_AREA = 100
+CONTOUR_COLOR = (0, 255, 0)
+ROI_COLOR = (255, 128, 0)
+DISEASES_DB = {
+    "yellow_leaves": {"name": "Хлороз", "description": "Пожелтение листьев", "causes": ["Недостаток железа", "Переувлажнение", "Недостаток азота"], "solutions": ["Добавить железосодержащие удобрения", "Уменьшить полив", "Внести азотные удобрения"]},
+    "brown_spots": {"name": "Грибковое заболевание", "description": "Коричневые пятна на листьях", "causes": ["Грибковая инфекция", "Избыточная влажность", "Плохая вентиляция"], "solutions": ["Обработать фунгицидами", "Улучшить вентиляцию", "Удалить пораженные листья"]}
+}
+PESTS_DB = {
+    "aphids": {"name": "Тля", "description": "Мелкие насекомые на листьях и стеблях", "damage": "Высасывают сок из растения, вызывают деформацию листьев", "solutions": ["Обработать инсектицидами", "Использовать мыльный раствор", "Привлечь естественных хищников"]},
+    "thrips": {"name": "Трипсы", "description": "Мелкие удлиненные насекомые", "damage": "Повреждают листья и цветы, переносят вирусы", "solutions": ["Обработать инсектицидами", "Использовать синие липкие ловушки", "Удалять сорняки"]}
+}
+def contains(outer, inner):
+    return bool(np.all(outer["lower"] <= inner["lower"]) and np.all(inner["upper"] <= outer["upper"]))
+class LeafColorClassifier:
+    """Разметка пикселей по классам цвета за один проход: HSV-диапазоны классов сведены в таблицы cv2.LUT по каналам, бит на класс"""
+    def __init__(self, colors=LEAF_COLORS):
+        if len(colors) > 8:
+            raise ValueError("Не более 8 классов цвета: метка пикселя хранится в одном байте")
+        self.colors = colors
+        self.bits = {name: 1 << i for i, name in enumerate(colors)}
+        self.lut = np.zeros((256, 1, 3), dtype=np.uint8)
+        for name, color_range in colors.items():
+            for channel in range(3):
+                self.lut[int(color_range["lower"][channel]):int(color_range["upper"][channel]) + 1, 0, channel] |= self.bits[name]
+        names = list(colors)
+        self.mask_classes = [name for i, name in enumerate(names)
+                             if not any(contains(colors[other], colors[name]) and (j < i or not contains(colors[name], colors[other]))
+                                        for j, other in enumerate(names) if other != name)]
+        self.kernel = np.ones((3, 3), np.uint8)
+    def label(self, hsv):
+        """Битовая маска классов для каждого пикселя HSV-изображения"""
+        h, s, v = cv2.split(cv2.LUT(hsv, self.lut))
+        return cv2.bitwise_and(cv2.bitwise_and(h, s), v)
+    def leaf_mask(self, labels):
+        """Объединение масок классов после открытия и закрытия; классы, вложенные в другие, маску не меняют и пропускаются"""
+        total_mask = np.zeros(labels.shape, dtype=np.uint8)
+        for name in self.mask_classes:
+            mask = cv2.bitwise_and(labels, self.bits[name])
+            mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self.kernel)
+            mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self.kernel)
+            total_mask = cv2.bitwise_or(total_mask, mask)
+        return total_mask
+    def percentages(self, labels, plant_mask):
+        """Доли классов внутри маски растения по гистограмме меток; пустой словарь, если растение не найдено"""
+        plant_pixels = cv2.countNonZero(plant_mask)
+        if plant_pixels == 0:
+            return {}
+        histogram = [int(count) for count in cv2.calcHist([labels], [0], plant_mask, [256], [0, 256]).ravel()]
+        color_percentages = {}
+        for name, bit in self.bits.items():
+            color_pixels = sum(count for value, count in enumerate(histogram) if value & bit)
+            color_percentages[name] = (color_pixels / plant_pixels) * 100
+        return color_percentages
+DEFAULT_CLASSIFIER = LeafColorClassifier()
+def roi_rect(shape, roi):
+    """Область анализа в пикселях (x, y, ширина, высота) по долям кадра (x, y, ширина, высота); None - весь кадр"""
+    height, width = shape[:2]
+    if not roi:
+        return 0, 0, width, height
+    x = min(max(int(round(roi[0] * width)), 0), width - 1)
+    y = min(max(int(round(roi[1] * height)), 0), height - 1)
+    return x, y, max(1, min(int(round(roi[2] * width)), width - x)), max(1, min(int(round(roi[3] * height)), height - y))
+def detect_plant(image, classifier=DEFAULT_CLASSIFIER, max_side=None, roi=None):
+    """Находит растение и доли цветов листьев в области roi, уменьшенной до max_side по большей стороне; возвращает (кадр с контурами, маска растения, color_percentages) в полном разрешении"""
+    x, y, width, height = roi_rect(image.shape, roi)
+    region = image[y:y + height, x:x + width]
+    scale = 1.0
+    if max_side and max(width, height) > max_side:
+        scale = max_side / max(width, height)
+        region = cv2.resize(region, (max(1, int(round(width * scale))), max(1, int(round(height * scale)))), interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(region, cv2.COLOR_BGR2HSV)
+    labels = classifier.label(hsv)
+    contours, _ = cv2.findContours(classifier.leaf_mask(labels), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    filtered_contours = [contour for contour in contours if cv2.contourArea(contour) > MIN_CONTOUR_AREA * scale * scale]
+    plant_mask = np.zeros(labels.shape, dtype=np.uint8)
+    cv2.drawContours(plant_mask, filtered_contours, -1, 255, -1)
+    color_percentages = classifier.percentages(labels, plant_mask)
+    if scale != 1.0:
+        filtered_contours = [np.round((contour + 0.5) / scale - 0.5).astype(np.int32) for contour in filtered_contours]
+    if scale != 1.0 or roi:
+        plant_mask = np.zeros(image.shape[:2], dtype=np.uint8)
+        cv2.drawContours(plant_mask, filtered_contours, -1, 255, -1, offset=(x, y))
+    detection_image = image.copy()
+    cv2.drawContours(detection_image, filtered_contours, -1, CONTOUR_COLOR, 2, offset=(x, y))
+    if roi:
+        cv2.rectangle(detection_image, (x, y), (x + width - 1, y + height - 1), ROI_COLOR, 2)
+    return detection_image, plant_mask, color_percentages
+def encode_jpeg(image, quality=JPEG_QUALITY):
+    """Кодирует кадр в JPEG в памяти; возвращает буфер numpy, который отправляется без копирования в bytes"""
+    ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+    if not ok:
+        raise ValueError("Не удалось закодировать изображение в JPEG")
+    return buffer
+def analyze_health(color_percentages):
+    """Оценка здоровья растения по долям цветов листьев: состояние, распределение цветов, детали и рекомендации"""
+    detected_diseases = []
+    detected_pests = []
+    if color_percentages.get("yellow", 0) > 10:
+        detected_diseases.append(DISEASES_DB["yellow_leaves"])
+    if color_percentages.get("brown", 0) > 5:
+        detected_diseases.append(DISEASES_DB["brown_spots"])
+    if color_percentages.get("brown", 0) > 5:
+        if color_percentages.get("yellow", 0) > 15:
+            detected_pests.append(PESTS_DB["aphids"])
+        elif color_percentages.get("brown", 0) > 10:
+            detected_pests.append(PESTS_DB["thrips"])
+    status = "нормальное"
+    details = []
+    recommendations = []
+    if color_percentages.get("yellow", 0) > 10:
+        status = "требует внимания"
+        details.append("Обнаружено значительное пожелтение листьев")
+        recommendations.append("Проверьте режим полива")
+        recommendations.append("Проверьте уровень освещенности")
+    if color_percentages.get("brown", 0) > 5:
+        status = "требует внимания"
+        details.append("Обнаружены коричневые участки на листьях")
+        recommendations.append("Проверьте на наличие заболеваний")
+        recommendations.append("Удалите поврежденные листья")
+    for disease in detected_diseases:
+        details.append(f"{disease['name']}: {disease['description']}")
+        recommendations.extend(disease['solutions'])
+    for pest in detected_pests:
+        details.append(f"{pest['name']}: {pest['description']}")
+        recommendations.extend(pest['solutions'])
+    if not details:
+        recommendations.append("Поддерживайте текущий режим ухода")
+    return {
+        "состояние": status,
+        "распределение цветов": "; ".join([f"{LEAF_COLORS[k]['name']}: {v:.1f}%" for k, v in color_percentages.items() if v > 1]),
+        "детали": "; ".join(details) if details else "отклонений не выявлено",
+        "рекомендации": "; ".join(recommendations)
+    }
+def format_report(analysis, moment):
+    """Текст отчета об анализе для загрузки на сервер"""
+    return f"АНАЛИЗ СОСТОЯНИЯ РАСТЕНИЯ\nДата анализа: {moment.strftime('%Y-%m-%d %H:%M:%S')}\n\nСОСТОЯНИЕ: {analysis['состояние']}\n\nРАСПРЕДЕЛЕНИЕ ЦВЕТОВ:\n{analysis['распределение цветов']}\n\nДЕТАЛИ АНАЛИЗА:\n{analysis['детали']}\n\nРЕКОМЕНДАЦИИ:\n{analysis['рекомендации']}\n"
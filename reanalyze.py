@@ -0,0 +1,192 @@
+import os
+import csv
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import cv2
+import numpy as np
+from sensor_store import connect
+from plant_analysis import LEAF_COLORS, LeafColorClassifier, detect_plant, analyze_health, parse_roi
+ARCHIVE_DIR = os.path.join(os.path.expanduser("~"), "FitoDomik_photos")
+INDEX_FILE = "analysis_index.db"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+SKIP_PREFIXES = ("farm_analysis_",)
+COLOR_COLUMNS = tuple(LEAF_COLORS)
+INDEX_COLUMNS = ("path", "size", "mtime", "settings", "analyzed", "plant_share") + COLOR_COLUMNS + ("status", "details", "recommendations", "error")
+INDEX_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS photos (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    settings TEXT NOT NULL,
+    analyzed REAL NOT NULL,
+    plant_share REAL,
+    {", ".join(f"{name} REAL" for name in COLOR_COLUMNS)},
+    status TEXT,
+    details TEXT,
+    recommendations TEXT,
+    error TEXT
+);
+"""
+classifier = None
+def load_colors(filename):
+    """Диапазоны HSV классов цвета: LEAF_COLORS, поверх которых накладываются границы из JSON {"yellow": {"lower": [...], "upper": [...]}}"""
+    colors = {name: dict(color_range) for name, color_range in LEAF_COLORS.items()}
+    if filename:
+        with open(filename, encoding='utf-8') as f:
+            for name, bounds in json.load(f).items():
+                if name not in colors:
+                    raise ValueError(f"Неизвестный класс цвета: {name}")
+                for key in ("lower", "upper"):
+                    if key in bounds:
+                        colors[name][key] = np.array(bounds[key])
+    return colors
+def settings_key(colors, max_side, roi):
+    """Отпечаток настроек анализа; файл анализируется заново, если он изменился"""
+    text = json.dumps({
+        'colors': {name: [color_range["lower"].tolist(), color_range["upper"].tolist()] for name, color_range in colors.items()},
+        'max_side': max_side,
+        'roi': roi
+    }, sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+def init_worker(colors):
+    """Инициализация процесса пула: один поток OpenCV на процесс и своя таблица классификатора"""
+    global classifier
+    cv2.setNumThreads(1)
+    classifier = LeafColorClassifier(colors)
+def analyze_file(path, max_side, roi):
+    """Анализ одного снимка в процессе пула; возвращает словарь со столбцами индекса без path, size, mtime и settings"""
+    row = {'analyzed': time.time()}
+    try:
+        image = cv2.imread(path)
+        if image is None:
+            raise ValueError("файл не читается как изображение")
+        _, plant_mask, color_percentages = detect_plant(image, classifier, max_side=max_side, roi=roi)
+        analysis = analyze_health(color_percentages)
+        row['plant_share'] = cv2.countNonZero(plant_mask) / plant_mask.size * 100
+        row.update({name: color_percentages.get(name) for name in COLOR_COLUMNS})
+        row.update({'status': analysis['состояние'], 'details': analysis['детали'], 'recommendations': analysis['рекомендации']})
+    except Exception as e:
+        row['error'] = str(e)
+    return row
+def find_photos(directory):
+    """Снимки архива в порядке имен; кадры с нарисованными контурами (farm_analysis_*) пропускаются"""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.lower().endswith(IMAGE_EXTENSIONS) and not filename.startswith(SKIP_PREFIXES):
+                yield os.path.join(root, filename)
+class AnalysisIndex:
+    """Индекс результатов в SQLite: запись пакетами по мере готовности, повторный запуск пропускает уже разобранные файлы"""
+    def __init__(self, path, batch_size=50):
+        self.path = path
+        self.batch_size = batch_size
+        self.connection = connect(path)
+        self.connection.executescript(INDEX_SCHEMA)
+        self.pending = []
+    def done(self, settings):
+        """Файлы, уже разобранные с этими настройками: {путь относительно папки архива: (size, mtime)}"""
+        rows = self.connection.execute("SELECT path, size, mtime FROM photos WHERE settings = ? AND error IS NULL", (settings,))
+        return {path: (size, mtime) for path, size, mtime in rows}
+    def add(self, row):
+        self.pending.append(tuple(row.get(name) for name in INDEX_COLUMNS))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+    def flush(self):
+        if not self.pending:
+            return
+        with self.connection:
+            self.connection.executemany(f"INSERT OR REPLACE INTO photos ({', '.join(INDEX_COLUMNS)}) VALUES ({', '.join('?' * len(INDEX_COLUMNS))})",
+                                        self.pending)
+        self.pending = []
+    def export_csv(self, filename):
+        """Выгружает индекс в CSV; возвращает число строк"""
+        rows = self.connection.execute(f"SELECT {', '.join(INDEX_COLUMNS)} FROM photos ORDER BY path").fetchall()
+        with open(filename, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(INDEX_COLUMNS)
+            writer.writerows(rows)
+        return len(rows)
+    def close(self):
+        self.flush()
+        self.connection.close()
+def reanalyze(directory, index, colors=LEAF_COLORS, max_side=None, roi=None, workers=None, force=False, log=None):
+    """Анализирует снимки архива в пуле процессов, пишет результаты в индекс по мере готовности; возвращает (разобрано, пропущено, ошибок).
+    Файлы хранятся в индексе по пути относительно directory: запуск с photos, ./photos или абсолютным путем находит те же записи"""
+    log = log or (lambda message: print(f"[LOG] {message}"))
+    workers = workers or os.cpu_count() or 1
+    settings = settings_key(colors, max_side, roi)
+    done = {} if force else index.done(settings)
+    jobs = []
+    skipped = 0
+    for path in find_photos(directory):
+        stat = os.stat(path)
+        key = os.path.relpath(path, directory)
+        if done.get(key) == (stat.st_size, stat.st_mtime):
+            skipped += 1
+        else:
+            jobs.append((path, key, stat.st_size, stat.st_mtime))
+    log(f"🔍 Снимков к анализу: {len(jobs)}, уже в индексе: {skipped}, процессов: {workers}")
+    processed = errors = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(colors,)) as executor:
+        running = {}
+        remaining = iter(jobs)
+        while True:
+            for path, key, size, mtime in remaining:
+                running[executor.submit(analyze_file, path, max_side, roi)] = {'path': key, 'size': size, 'mtime': mtime, 'settings': settings}
+                if len(running) >= workers * 4:
+                    break
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                row = running.pop(future)
+                row.update(future.result())
+                index.add(row)
+                processed += 1
+                if row.get('error'):
+                    errors += 1
+                    log(f"❌ {row['path']}: {row['error']}")
+                if processed % 100 == 0:
+                    elapsed = time.perf_counter() - started
+                    log(f"📊 Разобрано {processed} из {len(jobs)}, {processed / elapsed:.1f} снимков/с")
+    index.flush()
+    elapsed = time.perf_counter() - started
+    log(f"✅ Разобрано {processed} снимков за {elapsed:.1f} с ({processed / elapsed if elapsed else 0:.1f} снимков/с), "
+        f"пропущено {skipped}, ошибок {errors}")
+    return processed, skipped, errors
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Повторный анализ архива фото растений в пуле процессов с продолжением после прерывания")
+    parser.add_argument("directory", nargs="?", default=ARCHIVE_DIR, help=f"папка со снимками (по умолчанию {ARCHIVE_DIR})")
+    parser.add_argument("--index", help=f"файл индекса SQLite (по умолчанию {INDEX_FILE} в папке снимков)")
+    parser.add_argument("--csv", help="выгрузить индекс в CSV после анализа")
+    parser.add_argument("--workers", type=int, help="процессов анализа (по умолчанию по числу ядер)")
+    parser.add_argument("--max-side", type=int, help="уменьшать кадр до этой большей стороны перед анализом")
+    parser.add_argument("--roi", default="", help="область x, y, ширина, высота в процентах кадра")
+    parser.add_argument("--colors", help="JSON с границами HSV классов цвета поверх стандартных")
+    parser.add_argument("--force", action="store_true", help="анализировать заново все снимки")
+    args = parser.parse_args(argv)
+    if not os.path.isdir(args.directory):
+        parser.error(f"папка не найдена: {args.directory}")
+    try:
+        roi = parse_roi(args.roi)
+        colors = load_colors(args.colors)
+    except (ValueError, OSError) as e:
+        parser.error(str(e))
+    index = AnalysisIndex(args.index or os.path.join(args.directory, INDEX_FILE))
+    try:
+        processed, skipped, errors = reanalyze(args.directory, index, colors, args.max_side, roi, args.workers, args.force)
+        if args.csv:
+            print(f"[LOG] ✅ Выгружено в {args.csv}: {index.export_csv(args.csv)} записей")
+    except KeyboardInterrupt:
+        print("[LOG] ⚠️ Прервано, разобранные снимки сохранены в индексе")
+        return 130
+    finally:
+        index.close()
+    return 1 if errors else 0
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+import re
+import json
+import time
+import threading
+from datetime import datetime
+from sensor_protocol import SensorLineParser, ReadingAggregator, format_reading, UPLOAD_SUMMARY, UPLOAD_BATCH
+from serial_io import LINE_ERROR
+from sensor_store import SensorOutbox, SensorIdAllocator, OUTBOX_SENT, OUTBOX_RETRY, OUTBOX_REJECTED
+from farm_api import CircuitOpenError, SENSOR_ENDPOINT, MAX_ID_ENDPOINT
+ID_CONFLICT_RETRIES = 3
+ID_CONFLICT_PATTERN = re.compile(r"duplicate|already exists|дублик|уже существует|уже занят", re.IGNORECASE)
+class SensorIngest:
+    """Прием показаний без Qt: разбор строк порта, автоматика, локальная база и очередь отправки на сервер"""
+    def __init__(self, serial_actor, client, db_path, interval=60, store=None, upload_mode=UPLOAD_SUMMARY, engine=None, automation=None,
+                 device_states=None, on_update=None, log=None):
+        self.serial_actor = serial_actor
+        self.client = client
+        self.engine = engine
+        self.automation = automation
+        self.store = store
+        self.upload_mode = upload_mode
+        self.device_states = device_states or (lambda: (None, None))
+        self.on_update = on_update or (lambda: None)
+        self.log = log or (lambda message: print(f"[LOG] {message}"))
+        self.aggregator = ReadingAggregator(keep_points=upload_mode == UPLOAD_BATCH)
+        self.outbox = SensorOutbox(db_path, self.post_sensor_data, log=self.log)
+        self.id_allocator = SensorIdAllocator(db_path, self.get_max_sensor_id)
+        self.last_reading = None
+        self.interval = interval
+        self.running = False
+        self.thread = None
+        self.first_data_collected = False
+        self.last_send_time = 0
+        self.parser = SensorLineParser()
+        self.reset_values()
+    def reset_values(self):
+        self.temperature = -1
+        self.humidity = -1
+        self.soil_moisture = -1
+        self.light_level = -1
+        self.co2 = 400
+        self.pressure = 1013.25
+    def start(self):
+        """Запускает прием в собственном потоке (для режима без интерфейса)"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self.run, name="SensorIngest", daemon=True)
+        self.thread.start()
+    def stop(self, timeout=10):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+    def run(self):
+        self.reset_values()
+        self.running = True
+        self.log("🧵 Запущен поток мониторинга датчиков")
+        self.serial_actor.subscribe(LINE_ERROR, self.log_arduino_error)
+        self.serial_actor.reset_stats()
+        try:
+            self.id_allocator.open()
+            if self.engine is not None:
+                self.outbox.open()
+                self.engine.spawn("sensor_outbox", self.outbox.run_async, self.engine.call)
+            else:
+                self.outbox.start()
+            pending = self.outbox.pending_count()
+            if pending:
+                self.log(f"📤 В очереди отправки {pending} неотправленных записей")
+        except Exception as e:
+            self.log(f"❌ Ошибка открытия очереди отправки: {str(e)}")
+        try:
+            while self.running:
+                try:
+                    line = self.serial_actor.get(timeout=0.5)
+                    if not line:
+                        continue
+                    self.update_sensor_values(line)
+                    if self.last_reading is not None:
+                        if self.automation is not None:
+                            self.automation.evaluate(self.last_reading)
+                        self.aggregator.add(self.last_reading)
+                        if self.store is not None:
+                            self.store.add(self.last_reading, *self.device_states())
+                    if not self.first_data_collected:
+                        if self.check_all_sensors_ready():
+                            self.first_data_collected = True
+                            self.log("✅ Получены первые данные со всех датчиков")
+                    self.on_update()
+                    current_time = time.time()
+                    if self.first_data_collected and (current_time - self.last_send_time >= self.interval):
+                        if self.save_to_server():
+                            self.last_send_time = current_time
+                except Exception as e:
+                    self.log(f"❌ Ошибка в потоке мониторинга: {str(e)}")
+                    time.sleep(1)
+        finally:
+            if self.engine is not None:
+                self.engine.cancel("sensor_outbox")
+            self.outbox.stop()
+            self.id_allocator.close()
+            self.serial_actor.unsubscribe(LINE_ERROR, self.log_arduino_error)
+            self.log(f"📈 Статистика чтения порта: {self.serial_actor.format_stats()}")
+    def log_arduino_error(self, line):
+        self.log(f"❌ Arduino: {line}")
+    def update_sensor_values(self, line):
+        try:
+            if isinstance(line, str):
+                reading = self.parser.parse(line)
+            else:
+                reading, line = line, format_reading(line)
+            self.last_reading = reading
+            if reading is not None:
+                if reading.temperature is not None:
+                    self.temperature = reading.temperature
+                if reading.humidity is not None:
+                    self.humidity = reading.humidity
+                if reading.soil_moisture is not None:
+                    self.soil_moisture = reading.soil_moisture
+                if reading.light_level is not None:
+                    self.light_level = reading.light_level
+                if reading.co2 is not None:
+                    self.co2 = reading.co2
+                if reading.pressure is not None:
+                    self.pressure = reading.pressure
+            self.log(f"📊 Получены данные: {line}")
+            return self.check_all_sensors_ready()
+        except Exception as e:
+            self.log(f"❌ Ошибка при обработке данных датчиков: {str(e)}")
+            return False
+    def check_all_sensors_ready(self):
+        return (self.temperature > 0 and
+                self.humidity > 0 and
+                self.soil_moisture >= 0 and
+                self.light_level >= 0)
+    def save_to_server(self):
+        """Ставит показания в очередь отправки без сетевых запросов; ID записи назначается при отправке из очереди"""
+        try:
+            if self.temperature == 0 or self.humidity == 0:
+                return False
+            led_state, curtains_state = self.device_states()
+            post_data = {
+                'user_id': 1,
+                'temperature': float(self.temperature),
+                'humidity': float(self.humidity),
+                'soil_moisture': float(self.soil_moisture),
+                'light_level': float(self.light_level),
+                'co2': int(self.co2),
+                'pressure': float(self.pressure),
+                'lamp_state': int(led_state) if led_state is not None else 0,
+                'curtains_state': int(curtains_state) if curtains_state is not None else 0
+            }
+            if self.aggregator.samples:
+                if self.upload_mode == UPLOAD_SUMMARY:
+                    post_data.update(self.aggregator.summary_fields())
+                elif self.upload_mode == UPLOAD_BATCH:
+                    post_data['samples'] = self.aggregator.samples
+                    post_data['fields'] = ",".join(self.aggregator.fields)
+                    post_data['readings'] = json.dumps(self.aggregator.point_rows())
+            self.outbox.enqueue(post_data)
+            self.aggregator.reset()
+            return True
+        except Exception as e:
+            self.log(f"❌ Ошибка постановки данных в очередь отправки: {str(e)}")
+        return False
+    def post_sensor_data(self, post_data, idempotency_key):
+        """Отправляет одну запись из очереди; повтор с тем же ключом не создает дубликат, занятый на сервере ID заменяется новым.
+        ID, сохраненный в очереди прошлой попыткой, мог быть записан сервером при потерянном ответе, поэтому конфликт по нему означает доставку"""
+        try:
+            headers = {
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'Idempotency-Key': idempotency_key
+            }
+            for _ in range(ID_CONFLICT_RETRIES):
+                carried_id = 'id' in post_data
+                if not carried_id:
+                    next_id = self.id_allocator.allocate()
+                    if next_id is None:
+                        return OUTBOX_RETRY
+                    post_data['id'] = next_id
+                    self.outbox.update_payload(idempotency_key, post_data)
+                    self.log(f"Используем ID {next_id} для новой записи")
+                response = self.client.post(SENSOR_ENDPOINT, data=post_data, headers=headers)
+                if not self.is_id_conflict(response):
+                    return self.upload_result(response, post_data)
+                if carried_id:
+                    self.log(f"⚠️ ID {post_data['id']} уже есть на сервере после прошлой попытки отправки, запись считается доставленной")
+                    return OUTBOX_SENT
+                self.log(f"⚠️ ID {post_data['id']} уже занят на сервере, запись получит новый ID")
+                self.id_allocator.conflict(int(post_data['id']))
+                del post_data['id']
+        except CircuitOpenError:
+            pass
+        except Exception as e:
+            self.log(f"❌ Ошибка отправки данных: {str(e)}")
+        return OUTBOX_RETRY
+    def is_id_conflict(self, response):
+        """Сервер отклонил запись из-за занятого ID: код 409 или сообщение о дубликате ключа"""
+        if response.status_code == 409:
+            return True
+        if response.status_code != 200:
+            return False
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            return False
+        return isinstance(data, dict) and not data.get('success') and ID_CONFLICT_PATTERN.search(str(data.get('message', ''))) is not None
+    def upload_result(self, response, post_data):
+        """Итог отправки записи для очереди по ответу сервера"""
+        if response.status_code == 200:
+            try:
+                resp_data = response.json()
+                if resp_data.get('success'):
+                    current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    log_message = f"📅 {current_time}\n"
+                    log_message += "────────────────────────────────────\n"
+                    log_message += f"🆔 ID записи:              {post_data['id']}\n"
+                    log_message += f"🌡️ Температура воздуха:    {post_data['temperature']:.1f}°C\n"
+                    log_message += f"💧 Влажность воздуха:      {post_data['humidity']:.1f}%\n"
+                    log_message += f"🌱 Влажность почвы:        {post_data['soil_moisture']:.1f}%\n"
+                    log_message += f"🔆 Уровень освещенности:   {post_data['light_level']:.2f} lx\n"
+                    log_message += f"🫧 CO₂ уровень:            {post_data['co2']} ppm\n"
+                    log_message += f"🌬️ Атм. давление:          {post_data['pressure']:.2f} hPa\n"
+                    log_message += f"💡 Лампа:                  {'включена' if post_data['lamp_state'] == 1 else 'выключена'}\n"
+                    log_message += f"🪟 Шторы:                  {'закрыты' if post_data['curtains_state'] == 1 else 'открыты'}\n"
+                    if 'samples' in post_data:
+                        log_message += f"📦 Показаний за интервал:  {post_data['samples']}\n"
+                    log_message += "────────────────────────────────────"
+                    self.log(log_message)
+                    return OUTBOX_SENT
+                else:
+                    self.log(f"❌ Ошибка при отправке данных: {resp_data.get('message', 'Неизвестная ошибка')}")
+                    return OUTBOX_REJECTED
+            except json.JSONDecodeError:
+                self.log("❌ Ошибка декодирования JSON в ответе")
+                return OUTBOX_RETRY
+        elif response.status_code == 401:
+            self.log("⛔ ОШИБКА АВТОРИЗАЦИИ ⛔")
+            return OUTBOX_RETRY
+        elif 400 <= response.status_code < 500:
+            self.log(f"❌ Сервер отклонил данные с кодом: {response.status_code}")
+            return OUTBOX_REJECTED
+        else:
+            self.log(f"❌ Сервер вернул код: {response.status_code}")
+            return OUTBOX_RETRY
+    def get_max_sensor_id(self):
+        """Запрашивает максимальный ID записи на сервере; вызывается аллокатором один раз"""
+        try:
+            response = self.client.get(MAX_ID_ENDPOINT)
+            if response.status_code == 200:
+                data = response.json()
+                if data.get('success') and 'max_id' in data:
+                    return int(data['max_id'])
+                else:
+                    self.log(f"❌ Ошибка получения max_id: {data.get('message', 'Неизвестная ошибка')}")
+                    return None
+            elif response.status_code == 401:
+                self.log("⛔ ОШИБКА АВТОРИЗАЦИИ ⛔")
+                return None
+            else:
+                self.log(f"❌ Сервер вернул код при запросе max_id: {response.status_code}")
+                return None
+        except CircuitOpenError:
+            return None
+        except Exception as e:
+            self.log(f"❌ Ошибка при запросе max_id: {str(e)}")
+            return None
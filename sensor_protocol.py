@@ -0,0 +1,201 @@
+import re
+import time
+import struct
+import binascii
+from collections import namedtuple, deque
+SENSOR_FIELDS = (
+    ("temperature", r"[Tt]emp(?:erature)?", "°C"),
+    ("humidity", r"[Hh]umidity", "%"),
+    ("soil_moisture", r"[Ss]oil\s*moisture", "%"),
+    ("light_level", r"[Ll]ight\s*level", "lx"),
+    ("co2", r"[Cc][Oo]2", "ppm"),
+    ("pressure", r"[Pp]ressure", "hPa"),
+)
+SENSOR_FIELD_NAMES = tuple(name for name, _, _ in SENSOR_FIELDS)
+SENSOR_UNITS = {name: unit for name, _, unit in SENSOR_FIELDS}
+SensorReading = namedtuple("SensorReading", SENSOR_FIELD_NAMES + ("timestamp",), defaults=(None,) * (len(SENSOR_FIELD_NAMES) + 1))
+def format_reading(reading):
+    """Краткая строка с заполненными полями показаний для журнала"""
+    return ", ".join(f"{name}: {value:g}{SENSOR_UNITS.get(name, '')}" for name, value in zip(reading._fields, reading) if value is not None and name != "timestamp")
+class SensorLineParser:
+    """Однопроходный разбор строк Arduino по декларативной таблице полей"""
+    def __init__(self, fields=SENSOR_FIELDS):
+        self.fields = tuple(fields)
+        self.field_names = tuple(name for name, _, _ in self.fields)
+        if self.field_names == SENSOR_FIELD_NAMES:
+            self.record_type = SensorReading
+        else:
+            self.record_type = namedtuple("SensorReading", self.field_names + ("timestamp",), defaults=(None,) * (len(self.field_names) + 1))
+        alternatives = "|".join(f"(?:{label}\\s*:\\s*(?P<{name}>\\d+\\.?\\d*))" for name, label, _ in self.fields)
+        self.pattern = re.compile(alternatives)
+    def parse(self, line, timestamp=None):
+        """Возвращает SensorReading с найденными полями или None, если в строке нет показаний"""
+        values = {}
+        for match in self.pattern.finditer(line):
+            name = match.lastgroup
+            if name not in values:
+                values[name] = float(match.group(name))
+        if not values:
+            return None
+        values["timestamp"] = time.time() if timestamp is None else timestamp
+        return self.record_type(**values)
+UPLOAD_SNAPSHOT = "snapshot"
+UPLOAD_SUMMARY = "summary"
+UPLOAD_BATCH = "batch"
+UPLOAD_MODES = (UPLOAD_SNAPSHOT, UPLOAD_SUMMARY, UPLOAD_BATCH)
+class ReadingAggregator:
+    """Накопитель показаний за интервал выгрузки: count/min/max/mean/last по каждому полю и при необходимости сырые точки"""
+    def __init__(self, fields=SENSOR_FIELD_NAMES, keep_points=False, max_points=1000):
+        self.fields = tuple(fields)
+        self.keep_points = keep_points
+        self.points = deque(maxlen=max_points)
+        self.reset()
+    def reset(self):
+        size = len(self.fields)
+        self.count = [0] * size
+        self.minimum = [0.0] * size
+        self.maximum = [0.0] * size
+        self.total = [0.0] * size
+        self.last = [None] * size
+        self.samples = 0
+        self.start = None
+        self.end = None
+        self.points.clear()
+    def add(self, reading):
+        """Учитывает одно показание; поля со значением None пропускаются"""
+        timestamp = reading.timestamp if reading.timestamp is not None else time.time()
+        added = False
+        for index, name in enumerate(self.fields):
+            value = getattr(reading, name, None)
+            if value is None:
+                continue
+            if self.count[index] == 0:
+                self.minimum[index] = self.maximum[index] = value
+            elif value < self.minimum[index]:
+                self.minimum[index] = value
+            elif value > self.maximum[index]:
+                self.maximum[index] = value
+            self.count[index] += 1
+            self.total[index] += value
+            self.last[index] = value
+            added = True
+        if not added:
+            return
+        self.samples += 1
+        if self.start is None:
+            self.start = timestamp
+        self.end = timestamp
+        if self.keep_points:
+            self.points.append(reading)
+    def summary(self):
+        """Словарь {поле: {count, min, max, mean, last}} по полям, для которых были значения"""
+        return {name: {'count': self.count[index], 'min': self.minimum[index], 'max': self.maximum[index],
+                       'mean': self.total[index] / self.count[index], 'last': self.last[index]}
+                for index, name in enumerate(self.fields) if self.count[index]}
+    def summary_fields(self):
+        """Плоские поля сводки для формы запроса: temperature_min, temperature_max, temperature_mean, temperature_count..."""
+        fields = {'samples': self.samples, 'period_start': round(self.start or 0, 3), 'period_end': round(self.end or 0, 3)}
+        for name, stats in self.summary().items():
+            fields[f"{name}_min"] = round(stats['min'], 2)
+            fields[f"{name}_max"] = round(stats['max'], 2)
+            fields[f"{name}_mean"] = round(stats['mean'], 2)
+            fields[f"{name}_count"] = stats['count']
+        return fields
+    def point_rows(self):
+        """Сырые точки интервала в компактном виде: [timestamp, значения полей...]"""
+        return [[round(point.timestamp or 0, 3)] + [getattr(point, name, None) for name in self.fields] for point in self.points]
+FRAME_DELIMITER = b"\x00"
+FRAME_SENSOR = 0x01
+FRAME_ACK = 0x02
+FRAME_TEXT = 0x03
+FRAME_HEADER = struct.Struct("<BH")
+FRAME_CRC = struct.Struct("<H")
+SENSOR_FRAME_BODY = struct.Struct("<BffffBB")
+SENSOR_FLAG_AIR = 0x01
+SENSOR_FLAG_SOIL = 0x02
+SENSOR_FLAG_LIGHT = 0x04
+FRAME_DEVICES = {1: "LED", 2: "CURTAINS"}
+FRAME_DEVICE_CODES = {name: code for code, name in FRAME_DEVICES.items()}
+class FrameError(ValueError):
+    pass
+def crc16_ccitt(data):
+    """CRC-16/CCITT-FALSE (полином 0x1021, начальное значение 0xFFFF), как в скетче"""
+    return binascii.crc_hqx(data, 0xFFFF)
+def cobs_encode(data):
+    output = bytearray()
+    start = 0
+    while True:
+        index = data.find(0, start, start + 254)
+        if index == -1:
+            block = data[start:start + 254]
+            if len(block) == 254:
+                output.append(255)
+                output += block
+                start += 254
+                continue
+            output.append(len(block) + 1)
+            output += block
+            return bytes(output)
+        output.append(index - start + 1)
+        output += data[start:index]
+        start = index + 1
+def cobs_decode(data):
+    output = bytearray()
+    index = 0
+    length = len(data)
+    while index < length:
+        code = data[index]
+        end = index + code
+        if code == 0 or end > length:
+            raise FrameError("Некорректный COBS-блок")
+        output += data[index + 1:end]
+        index = end
+        if code < 255 and index < length:
+            output.append(0)
+    return bytes(output)
+def encode_frame(frame_type, seq, body=b""):
+    """Собирает кадр: COBS(тип, номер, тело, CRC16) + 0x00"""
+    payload = FRAME_HEADER.pack(frame_type, seq & 0xFFFF) + body
+    payload += FRAME_CRC.pack(crc16_ccitt(payload))
+    return cobs_encode(payload) + FRAME_DELIMITER
+def decode_frame(data):
+    """Разбирает кадр без завершающего 0x00; возвращает (тип, номер, тело)"""
+    payload = cobs_decode(data)
+    if len(payload) < FRAME_HEADER.size + FRAME_CRC.size:
+        raise FrameError("Слишком короткий кадр")
+    (crc,) = FRAME_CRC.unpack_from(payload, len(payload) - FRAME_CRC.size)
+    if crc != crc16_ccitt(payload[:-FRAME_CRC.size]):
+        raise FrameError("Несовпадение CRC")
+    frame_type, seq = FRAME_HEADER.unpack_from(payload)
+    return frame_type, seq, payload[FRAME_HEADER.size:-FRAME_CRC.size]
+def encode_sensor_body(reading, lamp_state=0, curtains_state=0):
+    flags = 0
+    if reading.temperature is not None and reading.humidity is not None:
+        flags |= SENSOR_FLAG_AIR
+    if reading.soil_moisture is not None:
+        flags |= SENSOR_FLAG_SOIL
+    if reading.light_level is not None:
+        flags |= SENSOR_FLAG_LIGHT
+    return SENSOR_FRAME_BODY.pack(flags, reading.temperature or 0.0, reading.humidity or 0.0,
+                                  reading.soil_moisture or 0.0, reading.light_level or 0.0,
+                                  1 if lamp_state else 0, 1 if curtains_state else 0)
+def decode_sensor_body(body, timestamp=None):
+    """Возвращает (SensorReading, состояние лампы, состояние штор) из тела кадра показаний"""
+    if len(body) != SENSOR_FRAME_BODY.size:
+        raise FrameError("Некорректная длина кадра показаний")
+    flags, temperature, humidity, soil_moisture, light_level, lamp_state, curtains_state = SENSOR_FRAME_BODY.unpack(body)
+    air = flags & SENSOR_FLAG_AIR
+    reading = SensorReading(
+        temperature=temperature if air else None,
+        humidity=humidity if air else None,
+        soil_moisture=soil_moisture if flags & SENSOR_FLAG_SOIL else None,
+        light_level=light_level if flags & SENSOR_FLAG_LIGHT else None,
+        timestamp=time.time() if timestamp is None else timestamp
+    )
+    return reading, lamp_state, curtains_state
+def encode_ack_body(device, state):
+    return bytes((FRAME_DEVICE_CODES[device], 1 if state else 0))
+def decode_ack_body(body):
+    if len(body) != 2 or body[0] not in FRAME_DEVICES:
+        raise FrameError("Некорректный кадр подтверждения")
+    return FRAME_DEVICES[body[0]], body[1]
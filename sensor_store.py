@@ -0,0 +1,419 @@
+import os
+import csv
+import json
+import time
+import uuid
+import queue
+import random
+import asyncio
+import sqlite3
+import threading
+from sensor_protocol import SENSOR_FIELD_NAMES
+READING_COLUMNS = ("ts",) + SENSOR_FIELD_NAMES + ("lamp_state", "curtains_state")
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS readings (
+    ts REAL NOT NULL,
+    {", ".join(f"{name} REAL" for name in SENSOR_FIELD_NAMES)},
+    lamp_state INTEGER,
+    curtains_state INTEGER
+);
+CREATE INDEX IF NOT EXISTS readings_ts ON readings (ts);
+"""
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+"""
+META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+OUTBOX_SENT = "sent"
+OUTBOX_RETRY = "retry"
+OUTBOX_REJECTED = "rejected"
+def connect(path):
+    """Открывает базу в режиме WAL: запись не блокирует чтение истории"""
+    connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+class SensorStore:
+    """Локальный журнал показаний в SQLite с пакетной записью в отдельном потоке"""
+    def __init__(self, path, batch_size=200, flush_interval=1.0, maxsize=10000, log=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = queue.Queue(maxsize=maxsize)
+        self.log = log or (lambda message: print(f"[LOG] {message}"))
+        self.running = False
+        self.thread = None
+        self.read_lock = threading.Lock()
+        self.read_connection = None
+        self.rows_written = 0
+        self.rows_dropped = 0
+    def open(self):
+        if self.running:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = connect(self.path)
+        connection.executescript(SCHEMA)
+        connection.close()
+        self.read_connection = connect(self.path)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="SensorStoreWriter", daemon=True)
+        self.thread.start()
+    def close(self, timeout=5):
+        if not self.running:
+            return
+        self.running = False
+        self.pending.put(None)
+        self.thread.join(timeout)
+        self.thread = None
+        with self.read_lock:
+            self.read_connection.close()
+            self.read_connection = None
+    def add(self, reading, lamp_state=None, curtains_state=None):
+        """Ставит показания в очередь записи, не блокируя поток чтения порта"""
+        row = (reading.timestamp or time.time(),) + tuple(getattr(reading, name) for name in SENSOR_FIELD_NAMES) + (lamp_state, curtains_state)
+        try:
+            self.pending.put_nowait(row)
+            return True
+        except queue.Full:
+            self.rows_dropped += 1
+            return False
+    def flush(self):
+        """Дожидается записи всех поставленных в очередь показаний; без запущенного потока записи ждать некого"""
+        if self.running:
+            self.pending.join()
+    def run(self):
+        connection = connect(self.path)
+        insert = f"INSERT INTO readings ({', '.join(READING_COLUMNS)}) VALUES ({', '.join('?' * len(READING_COLUMNS))})"
+        try:
+            stopping = False
+            while not stopping:
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self.pending.get(timeout=max(deadline - time.monotonic(), 0.001) if batch else self.flush_interval)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        self.pending.task_done()
+                        stopping = True
+                        break
+                    batch.append(item)
+                if not batch:
+                    continue
+                try:
+                    with connection:
+                        connection.executemany(insert, batch)
+                    self.rows_written += len(batch)
+                except sqlite3.Error as e:
+                    self.rows_dropped += len(batch)
+                    self.log(f"❌ Ошибка записи показаний в локальную базу: {str(e)}")
+                finally:
+                    for _ in batch:
+                        self.pending.task_done()
+        finally:
+            connection.close()
+    def query(self, start=None, end=None, limit=None):
+        """Показания за интервал [start, end) по времени Unix; возвращает список кортежей READING_COLUMNS"""
+        sql = f"SELECT {', '.join(READING_COLUMNS)} FROM readings WHERE ts >= ? AND ts < ? ORDER BY ts"
+        params = [start if start is not None else 0, end if end is not None else float('inf')]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self.read_lock:
+            return self.read_connection.execute(sql, params).fetchall()
+    def query_buckets(self, start, end, bucket_seconds):
+        """Средние значения по интервалам bucket_seconds для графиков истории"""
+        averages = ", ".join(f"AVG({name})" for name in SENSOR_FIELD_NAMES)
+        sql = (f"SELECT CAST(ts / ? AS INTEGER) * ? AS bucket, COUNT(*), {averages} FROM readings "
+               f"WHERE ts >= ? AND ts < ? GROUP BY bucket ORDER BY bucket")
+        with self.read_lock:
+            return self.read_connection.execute(sql, (bucket_seconds, bucket_seconds, start, end)).fetchall()
+    def export_csv(self, filename, start=None, end=None):
+        """Выгружает показания за интервал в CSV; возвращает число строк"""
+        rows = self.query(start, end)
+        with open(filename, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(("time",) + READING_COLUMNS[1:])
+            for row in rows:
+                writer.writerow((time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(row[0])),) + row[1:])
+        return len(rows)
+class SensorOutbox:
+    """Долговременная очередь выгрузки показаний: переживает перезапуск и отправляется по порядку после восстановления связи"""
+    def __init__(self, path, send, batch_size=20, retry_interval=5.0, max_retry_interval=300.0, log=None):
+        self.path = path
+        self.send = send
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.log = log or (lambda message: print(f"[LOG] {message}"))
+        self.lock = threading.Lock()
+        self.sending = threading.Lock()
+        self.wakeup = threading.Event()
+        self.wake = self.wakeup.set
+        self.connection = None
+        self.running = False
+        self.closing = False
+        self.thread = None
+        self.failures = 0
+        self.sent_count = 0
+        self.rejected_count = 0
+    def open(self):
+        self.closing = False
+        if self.connection is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = connect(self.path)
+        self.connection.execute("PRAGMA synchronous=FULL")
+        self.connection.executescript(OUTBOX_SCHEMA)
+    def start(self):
+        self.open()
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="SensorOutboxReplay", daemon=True)
+        self.thread.start()
+    def stop(self, timeout=10):
+        """Останавливает отправку и закрывает базу; отмена задачи движка не прерывает пакет в его пуле, поэтому начатая запись дожидается окончания"""
+        self.closing = True
+        if self.running:
+            self.running = False
+            self.wakeup.set()
+            self.thread.join(timeout)
+            self.thread = None
+        if self.sending.acquire(timeout=timeout):
+            self.sending.release()
+        if self.connection is not None:
+            with self.lock:
+                self.connection.close()
+                self.connection = None
+    def enqueue(self, payload):
+        """Сохраняет показания на диск с ключом идемпотентности и будит отправку; возвращает ключ"""
+        key = payload.get('idempotency_key') or uuid.uuid4().hex
+        payload = dict(payload, idempotency_key=key)
+        with self.lock:
+            with self.connection:
+                self.connection.execute("INSERT OR IGNORE INTO outbox (idempotency_key, payload, created) VALUES (?, ?, ?)",
+                                        (key, json.dumps(payload, ensure_ascii=False), time.time()))
+        self.wake()
+        return key
+    def update_payload(self, key, payload):
+        """Сохраняет измененные данные записи, например назначенный при первой отправке ID; после остановки ничего не делает"""
+        with self.lock:
+            if self.connection is None:
+                return
+            with self.connection:
+                self.connection.execute("UPDATE outbox SET payload = ? WHERE idempotency_key = ?",
+                                        (json.dumps(payload, ensure_ascii=False), key))
+    def pending_count(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+    def next_batch(self):
+        with self.lock:
+            rows = self.connection.execute("SELECT seq, idempotency_key, payload FROM outbox ORDER BY seq LIMIT ?", (self.batch_size,)).fetchall()
+        return [(seq, key, json.loads(payload)) for seq, key, payload in rows]
+    def deliver(self, key, payload):
+        try:
+            return self.send(payload, key), None
+        except Exception as e:
+            return OUTBOX_RETRY, str(e)
+    def send_batch(self, batch):
+        """Отправляет записи пакета по одной в порядке очереди и останавливается на первой неудаче: ID выдаются и записи доходят в порядке постановки"""
+        results = []
+        with self.sending:
+            for _, key, payload in batch:
+                if self.closing:
+                    break
+                results.append(self.deliver(key, payload))
+                if results[-1][0] == OUTBOX_RETRY:
+                    break
+        return results
+    def replay_once(self):
+        """Отправляет один пакет самых старых записей; возвращает (отправлено, нужен ли повтор)"""
+        batch = self.next_batch()
+        if not batch:
+            return 0, False
+        results = self.send_batch(batch)
+        return self.record_results(batch, results)
+    def record_results(self, batch, results):
+        """Удаляет доставленные и отклоненные записи, увеличивает счетчик попыток неудачной; записи после нее остаются в очереди без изменений"""
+        done, retry = [], []
+        for (seq, key, _), (status, error) in zip(batch, results):
+            if status == OUTBOX_SENT:
+                done.append((seq,))
+                self.sent_count += 1
+            elif status == OUTBOX_REJECTED:
+                done.append((seq,))
+                self.rejected_count += 1
+                self.log(f"❌ Сервер отклонил показания {key}, запись удалена из очереди")
+            else:
+                retry.append((error, seq))
+        with self.lock:
+            if self.connection is None:
+                return 0, True
+            with self.connection:
+                self.connection.executemany("DELETE FROM outbox WHERE seq = ?", done)
+                self.connection.executemany("UPDATE outbox SET attempts = attempts + 1, last_error = ? WHERE seq = ?", retry)
+        return len(done), bool(retry)
+    def retry_delay(self):
+        delay = min(self.max_retry_interval, self.retry_interval * (2 ** min(self.failures - 1, 10)))
+        return delay * random.uniform(0.8, 1.2)
+    def after_replay(self, delivered, failed):
+        """Учитывает итог прохода; возвращает паузу до следующего (None - ждать новых записей)"""
+        if failed:
+            self.failures += 1
+            if self.failures == 1:
+                self.log(f"⚠️ Сервер недоступен, показания сохраняются в очереди ({self.pending_count()} шт.)")
+            return self.retry_delay()
+        if delivered:
+            if self.failures:
+                self.log("✅ Связь с сервером восстановлена, очередь выгрузки отправлена")
+            self.failures = 0
+            return 0
+        return None
+    def run(self):
+        while self.running:
+            try:
+                delivered, failed = self.replay_once()
+            except Exception as e:
+                self.log(f"❌ Ошибка очереди выгрузки показаний: {str(e)}")
+                delivered, failed = 0, True
+            delay = self.after_replay(delivered, failed)
+            if delay != 0:
+                self.wakeup.wait(delay)
+                self.wakeup.clear()
+    async def run_async(self, call):
+        """Та же отправка очереди как корутина сетевого движка; call выполняет блокирующие функции в его пуле"""
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        self.wake = lambda: loop.call_soon_threadsafe(wakeup.set)
+        self.open()
+        try:
+            while True:
+                try:
+                    batch = await call(self.next_batch)
+                    if batch:
+                        results = await call(self.send_batch, batch)
+                        delivered, failed = await call(self.record_results, batch, results)
+                    else:
+                        delivered, failed = 0, False
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.log(f"❌ Ошибка очереди выгрузки показаний: {str(e)}")
+                    delivered, failed = 0, True
+                delay = self.after_replay(delivered, failed)
+                if delay != 0:
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    wakeup.clear()
+        finally:
+            self.wake = self.wakeup.set
+class SensorIdAllocator:
+    """Выдает ID записей локально блоками: каждый блок начинается после максимума с сервера, при конфликте ID максимум сверяется заново"""
+    def __init__(self, path, fetch_max_id, block_size=100, retry_interval=5.0, max_retry_interval=300.0, clock=time.monotonic):
+        self.path = path
+        self.fetch_max_id = fetch_max_id
+        self.block_size = block_size
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.connection = None
+        self.closed = False
+        self.next_id = None
+        self.lease_end = None
+        self.synced = False
+        self.sync_failures = 0
+        self.sync_retry_at = 0.0
+        self.syncs = 0
+        self.conflicts = 0
+    def open(self):
+        self.closed = False
+        if self.connection is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = connect(self.path)
+        self.connection.execute("PRAGMA synchronous=FULL")
+        self.connection.executescript(META_SCHEMA)
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'sensor_id_lease_end'").fetchone()
+        if row is not None:
+            self.lease_end = int(row[0])
+            self.next_id = self.lease_end + 1
+    def close(self):
+        """Закрывает базу; до следующего open() ID не выдаются, чтобы запоздавшая отправка не открыла соединение снова"""
+        with self.lock:
+            self.closed = True
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+    def lease(self, first_id):
+        """Фиксирует на диске конец нового блока до выдачи ID из него: после перезапуска ID не повторятся"""
+        lease_end = first_id + self.block_size - 1
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('sensor_id_lease_end', ?)", (str(lease_end),))
+        self.next_id = first_id
+        self.lease_end = lease_end
+    def needs_sync(self):
+        """Пора ли сверить максимум с сервером: при запуске, на новом блоке или после конфликта, но не чаще паузы после неудачной сверки"""
+        return (not self.synced or self.next_id > self.lease_end) and self.clock() >= self.sync_retry_at
+    def synced_with(self, max_id):
+        """Учитывает результат сверки; None - сервер недоступен, следующая попытка после экспоненциальной паузы"""
+        if max_id is None:
+            self.sync_failures += 1
+            self.sync_retry_at = self.clock() + min(self.max_retry_interval, self.retry_interval * 2 ** min(self.sync_failures - 1, 10))
+            return
+        self.sync_failures = 0
+        self.sync_retry_at = 0.0
+        self.syncs += 1
+        self.lease(max(max_id + 1, self.next_id or 0))
+        self.synced = True
+    def allocate(self):
+        """Следующий ID; запрос максимума к серверу выполняется без блокировки, без связи нумерация продолжается с сохраненного блока, None - нет ни связи, ни блока"""
+        with self.lock:
+            if self.closed:
+                return None
+            self.open()
+            sync = self.needs_sync()
+        max_id = self.fetch_max_id() if sync else None
+        with self.lock:
+            if self.closed:
+                return None
+            if sync:
+                self.synced_with(max_id)
+            if self.next_id is None:
+                return None
+            if self.next_id > self.lease_end:
+                self.lease(self.next_id)
+            allocated = self.next_id
+            self.next_id += 1
+            return allocated
+    def conflict(self, rejected_id):
+        """Сервер отклонил ID как занятый (его выдал другой клиент): следующий ID будет выдан после новой сверки с сервером"""
+        with self.lock:
+            if self.closed:
+                return
+            self.open()
+            self.conflicts += 1
+            self.lease(max(self.next_id or 0, rejected_id + 1))
+            self.synced = False
+            self.sync_retry_at = 0.0
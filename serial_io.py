@@ -0,0 +1,347 @@
+import re
+import time
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import serial
+from sensor_protocol import (FRAME_DELIMITER, FRAME_SENSOR, FRAME_ACK, FRAME_TEXT, FrameError,
+                             decode_frame, decode_sensor_body, decode_ack_body)
+LINE_SENSOR = "sensor"
+LINE_ACK = "ack"
+LINE_STATUS = "status"
+LINE_ERROR = "error"
+ACK_PATTERN = re.compile(r"^(LED|Curtains) state changed to:\s*(\w+)")
+MODE_ACK_PATTERN = re.compile(r"^MODE:BIN:(\d+) OK")
+ACK_DEVICES = {"LED": "LED", "Curtains": "CURTAINS"}
+ACK_STATES = {"ON": 1, "OFF": 0, "CLOSED": 1, "OPEN": 0}
+STATUS_PREFIXES = ("Lamp:", "Curtains:", "LED:", "CURTAINS:")
+ERROR_MARKERS = ("Failed", "Invalid", "Could not", "error")
+def classify_line(line):
+    """Определяет тип строки Arduino: показания, подтверждение команды, состояние устройств или ошибка"""
+    match = ACK_PATTERN.match(line)
+    if match:
+        return LINE_ACK, (ACK_DEVICES[match.group(1)], ACK_STATES.get(match.group(2).upper()))
+    match = MODE_ACK_PATTERN.match(line)
+    if match:
+        return LINE_ACK, ("MODE", int(match.group(1)))
+    if line.startswith(STATUS_PREFIXES):
+        return LINE_STATUS, None
+    for marker in ERROR_MARKERS:
+        if marker in line:
+            return LINE_ERROR, None
+    return LINE_SENSOR, None
+class SerialLineReader:
+    """Читает строки из порта блокирующим readline с таймаутом и складывает их в ограниченную очередь"""
+    def __init__(self, serial_connection, maxsize=1000, log=None):
+        self.serial_connection = serial_connection
+        self.lines = queue.Queue(maxsize=maxsize)
+        self.log = log or (lambda message: print(f"[LOG] {message}"))
+        self.running = False
+        self.thread = None
+        self.stats_lock = threading.Lock()
+        self.reset_stats()
+    def reset_stats(self):
+        with self.stats_lock:
+            self.started_at = time.time()
+            self.lines_read = 0
+            self.bytes_read = 0
+            self.lines_dropped = 0
+            self.read_errors = 0
+            self.latency_total = 0.0
+            self.latency_max = 0.0
+            self.latency_count = 0
+    def start(self):
+        if self.running:
+            return
+        if getattr(self.serial_connection, 'timeout', None) is None:
+            self.serial_connection.timeout = 1
+        self.running = True
+        self.reset_stats()
+        self.thread = threading.Thread(target=self.run, name="SerialLineReader", daemon=True)
+        self.thread.start()
+    def stop(self, timeout=2):
+        self.running = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+        self.thread = None
+    def run(self):
+        while self.running:
+            try:
+                raw = self.read_raw()
+                if not raw:
+                    self.on_idle()
+                    continue
+                received_at = time.perf_counter()
+                with self.stats_lock:
+                    self.lines_read += 1
+                    self.bytes_read += len(raw)
+                self.handle_raw(raw, received_at)
+            except serial.SerialException as e:
+                with self.stats_lock:
+                    self.read_errors += 1
+                self.log(f"❌ Ошибка последовательного порта: {str(e)}")
+                time.sleep(1)
+            except Exception as e:
+                with self.stats_lock:
+                    self.read_errors += 1
+                self.log(f"❌ Ошибка чтения последовательного порта: {str(e)}")
+                time.sleep(1)
+    def read_raw(self):
+        return self.serial_connection.readline()
+    def on_idle(self):
+        pass
+    def handle_raw(self, raw, received_at):
+        line = raw.decode('utf-8', errors='replace').strip()
+        if line:
+            self.handle_line(line, received_at)
+    def handle_line(self, line, received_at):
+        self.put((received_at, line))
+    def put(self, item):
+        """Кладет элемент в очередь; при переполнении вытесняет самый старый"""
+        while True:
+            try:
+                self.lines.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.lines.get_nowait()
+                    with self.stats_lock:
+                        self.lines_dropped += 1
+                except queue.Empty:
+                    pass
+    def get(self, timeout=None):
+        """Возвращает следующую строку (SensorReading в бинарном режиме) или None по истечении таймаута"""
+        try:
+            received_at, line = self.lines.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        latency = time.perf_counter() - received_at
+        with self.stats_lock:
+            self.latency_total += latency
+            self.latency_count += 1
+            if latency > self.latency_max:
+                self.latency_max = latency
+        return line
+    def stats(self):
+        with self.stats_lock:
+            elapsed = max(time.time() - self.started_at, 1e-9)
+            return {
+                'lines': self.lines_read,
+                'bytes': self.bytes_read,
+                'dropped': self.lines_dropped,
+                'errors': self.read_errors,
+                'queued': self.lines.qsize(),
+                'lines_per_sec': self.lines_read / elapsed,
+                'bytes_per_sec': self.bytes_read / elapsed,
+                'avg_latency_ms': (self.latency_total / self.latency_count * 1000) if self.latency_count else 0.0,
+                'max_latency_ms': self.latency_max * 1000
+            }
+    def format_stats(self):
+        stats = self.stats()
+        return (f"{stats['lines']} строк ({stats['lines_per_sec']:.1f}/с), "
+                f"отброшено {stats['dropped']}, ошибок {stats['errors']}, "
+                f"задержка очереди ср. {stats['avg_latency_ms']:.2f} мс / макс. {stats['max_latency_ms']:.2f} мс")
+class SerialPortActor(SerialLineReader):
+    """Единственный владелец порта: очередь записи и маршрутизация входящих строк подписчикам"""
+    def __init__(self, serial_connection, maxsize=1000, log=None, command_timeout=2.0):
+        super().__init__(serial_connection, maxsize=maxsize, log=log)
+        self.command_timeout = command_timeout
+        self.write_queue = queue.Queue()
+        self.writer_thread = None
+        self.subscribers = {LINE_SENSOR: [], LINE_ACK: [], LINE_STATUS: [], LINE_ERROR: []}
+        self.pending_lock = threading.Lock()
+        self.pending_commands = []
+        self.binary_mode = False
+        self.frame_buffer = b""
+        self.last_seq = None
+    def reset_stats(self):
+        super().reset_stats()
+        with self.stats_lock:
+            self.frames_decoded = 0
+            self.frame_errors = 0
+            self.frames_lost = 0
+    def stats(self):
+        stats = super().stats()
+        with self.stats_lock:
+            stats.update({'binary_mode': self.binary_mode, 'frames': self.frames_decoded,
+                          'frame_errors': self.frame_errors, 'frames_lost': self.frames_lost})
+        return stats
+    def format_stats(self):
+        text = super().format_stats()
+        if self.binary_mode:
+            stats = self.stats()
+            text += f", кадров {stats['frames']} (ошибок CRC/COBS {stats['frame_errors']}, потеряно {stats['frames_lost']})"
+        return text
+    @property
+    def is_open(self):
+        return self.running and self.serial_connection.is_open
+    def subscribe(self, kind, callback):
+        self.subscribers[kind].append(callback)
+    def unsubscribe(self, kind, callback):
+        if callback in self.subscribers[kind]:
+            self.subscribers[kind].remove(callback)
+    def start(self):
+        if self.running:
+            return
+        super().start()
+        self.writer_thread = threading.Thread(target=self.write_loop, name="SerialPortWriter", daemon=True)
+        self.writer_thread.start()
+    def stop(self, timeout=2):
+        was_running = self.running
+        super().stop(timeout)
+        if was_running:
+            self.write_queue.put(None)
+        if self.writer_thread is not None:
+            self.writer_thread.join(timeout)
+            self.writer_thread = None
+        with self.pending_lock:
+            pending, self.pending_commands = self.pending_commands, []
+        for _, _, _, future in pending:
+            if not future.done():
+                future.set_result(None)
+    def close(self):
+        self.stop()
+        if self.serial_connection.is_open:
+            self.serial_connection.close()
+    def write(self, data):
+        """Ставит произвольные байты в очередь записи"""
+        future = Future()
+        self.write_queue.put((data, future))
+        return future
+    def send_command(self, device, state):
+        """Отправляет команду устройству; Future получает строку подтверждения или None по таймауту"""
+        state_value = 1 if state == 1 else 0
+        return self.request(device, state_value, f"{device}:{state_value}\n".encode())
+    def negotiate_binary(self, baud_rate, timeout=None):
+        """Предлагает скетчу перейти на бинарные кадры и скорость baud_rate; Future получает подтверждение или None"""
+        if self.binary_mode:
+            future = Future()
+            future.set_result(f"MODE:BIN:{self.serial_connection.baudrate} OK")
+            return future
+        return self.request("MODE", int(baud_rate), f"MODE:BIN:{int(baud_rate)}\n".encode(), timeout)
+    def enable_binary(self, baud_rate, attempts=3, log=None):
+        """Согласует бинарный протокол; после сброса Arduino первые попытки могут остаться без ответа, при отказе остается текстовый"""
+        log = log or self.log
+        for attempt in range(attempts):
+            try:
+                response = self.negotiate_binary(baud_rate, timeout=2.0).result(timeout=2.5)
+            except FutureTimeoutError:
+                response = None
+            if response:
+                log(f"✅ Бинарный протокол включен, скорость {baud_rate}")
+                return True
+        log("⚠️ Arduino не поддерживает бинарный протокол, используется текстовый")
+        return False
+    def request(self, key, value, data, timeout=None):
+        future = Future()
+        now = time.monotonic()
+        self.expire_pending(now)
+        with self.pending_lock:
+            self.pending_commands.append((key, value, now + (timeout or self.command_timeout), future))
+        self.write_queue.put((data, None))
+        return future
+    def expire_pending(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self.pending_lock:
+            expired = [item for item in self.pending_commands if item[2] <= now]
+            self.pending_commands = [item for item in self.pending_commands if item[2] > now]
+        for _, _, _, future in expired:
+            if not future.done():
+                future.set_result(None)
+    def write_loop(self):
+        while True:
+            item = self.write_queue.get()
+            if item is None:
+                return
+            data, future = item
+            try:
+                self.serial_connection.write(data)
+                self.serial_connection.flush()
+                if future is not None:
+                    future.set_result(True)
+            except Exception as e:
+                self.log(f"❌ Ошибка записи в последовательный порт: {str(e)}")
+                if future is not None:
+                    future.set_exception(e)
+    def on_idle(self):
+        if self.pending_commands:
+            self.expire_pending()
+    def read_raw(self):
+        if self.binary_mode:
+            return self.serial_connection.read_until(FRAME_DELIMITER)
+        return self.serial_connection.readline()
+    def handle_raw(self, raw, received_at):
+        if not self.binary_mode:
+            return super().handle_raw(raw, received_at)
+        if not raw.endswith(FRAME_DELIMITER):
+            self.frame_buffer += raw
+            return
+        data, self.frame_buffer = self.frame_buffer + raw[:-1], b""
+        if data:
+            self.handle_frame(data, received_at)
+    def handle_frame(self, data, received_at):
+        try:
+            frame_type, seq, body = decode_frame(data)
+        except FrameError:
+            with self.stats_lock:
+                self.frame_errors += 1
+            return
+        with self.stats_lock:
+            self.frames_decoded += 1
+            if self.last_seq is not None:
+                self.frames_lost += (seq - self.last_seq - 1) & 0xFFFF
+            self.last_seq = seq
+        try:
+            if frame_type == FRAME_SENSOR:
+                reading, _, _ = decode_sensor_body(body)
+                self.put((received_at, reading))
+                self.notify(LINE_SENSOR, reading)
+            elif frame_type == FRAME_ACK:
+                device, state = decode_ack_body(body)
+                if device == "LED":
+                    line = f"LED state changed to: {'ON' if state else 'OFF'}"
+                else:
+                    line = f"Curtains state changed to: {'CLOSED' if state else 'OPEN'}"
+                self.resolve_ack((device, state), line)
+                self.notify(LINE_ACK, line)
+            elif frame_type == FRAME_TEXT:
+                self.handle_line(body.decode('utf-8', errors='replace').strip(), received_at)
+        except FrameError:
+            with self.stats_lock:
+                self.frame_errors += 1
+    def switch_to_binary(self, baud_rate):
+        """Переключает порт на бинарные кадры; вызывается из потока чтения сразу после подтверждения"""
+        if self.serial_connection.baudrate != baud_rate:
+            self.serial_connection.baudrate = baud_rate
+        self.frame_buffer = b""
+        self.last_seq = None
+        self.binary_mode = True
+    def handle_line(self, line, received_at):
+        if self.pending_commands:
+            self.expire_pending()
+        kind, payload = classify_line(line)
+        if kind == LINE_SENSOR:
+            self.put((received_at, line))
+        elif kind == LINE_ACK:
+            if payload[0] == "MODE" and any(pending[0] == "MODE" for pending in self.pending_commands):
+                self.switch_to_binary(payload[1])
+            self.resolve_ack(payload, line)
+        self.notify(kind, line)
+    def notify(self, kind, item):
+        for callback in list(self.subscribers[kind]):
+            try:
+                callback(item)
+            except Exception as e:
+                self.log(f"❌ Ошибка обработчика строки Arduino: {str(e)}")
+    def resolve_ack(self, payload, line):
+        device, state = payload
+        self.expire_pending()
+        with self.pending_lock:
+            for index, (pending_device, pending_state, _, future) in enumerate(self.pending_commands):
+                if pending_device == device and (state is None or pending_state == state):
+                    del self.pending_commands[index]
+                    break
+            else:
+                return
+        if not future.done():
+            future.set_result(line)
@@ -15,6 +15,11 @@
 #define CURTAINS_PIN 12  
 #define DHT_TYPE DHT22
 #define DISPLAY_INTERVAL 5000
+#define SENSOR_FRAME_INTERVAL 2000
+#define FRAME_SENSOR 0x01
+#define FRAME_ACK 0x02
+#define FRAME_TEXT 0x03
+#define FRAME_MAX_PAYLOAD 64
 enum ProgramState {
   NORMAL_OPERATION
 };
@@ -39,6 +44,9 @@ unsigned long debounceDelay = 50;
 bool bh1750_detected = false; 
 bool ledState = false;
 bool curtainsState = false;
+bool binaryMode = false;
+uint16_t frameSeq = 0;
+unsigned long lastSensorFrame = 0;
 void setup() {
   Serial.begin(9600);
   Wire.begin();
@@ -86,6 +94,10 @@ void loop() {
     lastDisplayChange = millis();
     switchToNextDisplay();
   }
+  if (binaryMode && millis() - lastSensorFrame >= SENSOR_FRAME_INTERVAL) {
+    lastSensorFrame = millis();
+    sendSensorFrame();
+  }
   if (Serial.available() > 0) {
     String command = Serial.readStringUntil('\n');
     processCommand(command);
@@ -96,8 +108,12 @@ void processCommand(String command) {
     int state = command.substring(4).toInt();
     ledState = (state == 1);
     digitalWrite(LED_PIN, ledState ? HIGH : LOW);
-    Serial.print("LED state changed to: ");
-    Serial.println(ledState ? "ON" : "OFF");
+    if (binaryMode) {
+      sendAckFrame(1, ledState);
+    } else {
+      Serial.print("LED state changed to: ");
+      Serial.println(ledState ? "ON" : "OFF");
+    }
     if (currentDisplayMode == DEVICES_STATE) {
       displayDevicesState();
     }
@@ -106,12 +122,115 @@ void processCommand(String command) {
     int state = command.substring(9).toInt();
     curtainsState = (state == 1);
     digitalWrite(CURTAINS_PIN, curtainsState ? HIGH : LOW);
-    Serial.print("Curtains state changed to: ");
-    Serial.println(curtainsState ? "CLOSED" : "OPEN");
+    if (binaryMode) {
+      sendAckFrame(2, curtainsState);
+    } else {
+      Serial.print("Curtains state changed to: ");
+      Serial.println(curtainsState ? "CLOSED" : "OPEN");
+    }
     if (currentDisplayMode == DEVICES_STATE) {
       displayDevicesState();
     }
   }
+  else if (command.startsWith("MODE:BIN:") && !binaryMode) {
+    long baudRate = command.substring(9).toInt();
+    if (baudRate > 0) {
+      Serial.print("MODE:BIN:");
+      Serial.print(baudRate);
+      Serial.println(" OK");
+      Serial.flush();
+      Serial.end();
+      Serial.begin(baudRate);
+      binaryMode = true;
+      lastSensorFrame = 0;
+    }
+  }
+}
+uint16_t crc16(const uint8_t* data, uint8_t length) {
+  uint16_t crc = 0xFFFF;
+  for (uint8_t i = 0; i < length; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (uint8_t bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
+}
+uint8_t cobsEncode(const uint8_t* input, uint8_t length, uint8_t* output) {
+  uint8_t readIndex = 0;
+  uint8_t writeIndex = 1;
+  uint8_t codeIndex = 0;
+  uint8_t code = 1;
+  while (readIndex < length) {
+    if (input[readIndex] == 0) {
+      output[codeIndex] = code;
+      code = 1;
+      codeIndex = writeIndex++;
+      readIndex++;
+    } else {
+      output[writeIndex++] = input[readIndex++];
+      code++;
+    }
+  }
+  output[codeIndex] = code;
+  return writeIndex;
+}
+void sendFrame(uint8_t type, const uint8_t* body, uint8_t length) {
+  uint8_t payload[FRAME_MAX_PAYLOAD + 5];
+  uint8_t encoded[FRAME_MAX_PAYLOAD + 8];
+  uint8_t size = 0;
+  if (length > FRAME_MAX_PAYLOAD) {
+    length = FRAME_MAX_PAYLOAD;
+  }
+  payload[size++] = type;
+  payload[size++] = frameSeq & 0xFF;
+  payload[size++] = frameSeq >> 8;
+  frameSeq++;
+  memcpy(payload + size, body, length);
+  size += length;
+  uint16_t crc = crc16(payload, size);
+  payload[size++] = crc & 0xFF;
+  payload[size++] = crc >> 8;
+  uint8_t encodedSize = cobsEncode(payload, size, encoded);
+  encoded[encodedSize++] = 0;
+  Serial.write(encoded, encodedSize);
+}
+void sendAckFrame(uint8_t device, bool state) {
+  uint8_t body[2] = {device, (uint8_t)(state ? 1 : 0)};
+  sendFrame(FRAME_ACK, body, sizeof(body));
+}
+void sendSensorFrame() {
+  float humidity = dht.readHumidity();
+  float temperature = dht.readTemperature();
+  float soilMoisture = readSoilMoisturePercent();
+  float lux = readLightLevel();
+  uint8_t flags = 0x02;
+  if (isnan(humidity) || isnan(temperature)) {
+    humidity = 0;
+    temperature = 0;
+    logMessage("Failed to read from DHT sensor!");
+  } else {
+    flags |= 0x01;
+  }
+  if (bh1750_detected) {
+    flags |= 0x04;
+  }
+  uint8_t body[19];
+  body[0] = flags;
+  memcpy(body + 1, &temperature, 4);
+  memcpy(body + 5, &humidity, 4);
+  memcpy(body + 9, &soilMoisture, 4);
+  memcpy(body + 13, &lux, 4);
+  body[17] = ledState ? 1 : 0;
+  body[18] = curtainsState ? 1 : 0;
+  sendFrame(FRAME_SENSOR, body, sizeof(body));
+}
+void logMessage(const char* text) {
+  if (binaryMode) {
+    sendFrame(FRAME_TEXT, (const uint8_t*)text, strlen(text));
+  } else {
+    Serial.println(text);
+  }
 }
 void switchToNextDisplay() {
   switch (currentDisplayMode) {
@@ -137,19 +256,24 @@ void handleButtonPress() {
   lastDisplayChange = millis(); 
   switchToNextDisplay();
 }
-void displaySoilMoistureData() {
+int readSoilMoisturePercent() {
   int soilMoistureRaw = analogRead(SOIL_MOISTURE_PIN);
   int soilMoisturePercent = map(soilMoistureRaw, drySoilValue, wetSoilValue, 0, 100);
-  soilMoisturePercent = constrain(soilMoisturePercent, 0, 100);
+  return constrain(soilMoisturePercent, 0, 100);
+}
+void displaySoilMoistureData() {
+  int soilMoisturePercent = readSoilMoisturePercent();
   lcd.clear();
   lcd.setCursor(0, 0);
   lcd.print("Soil moisture:");
   lcd.setCursor(0, 1);
   lcd.print(soilMoisturePercent);
   lcd.print("%");
-  Serial.print("Soil moisture: ");
-  Serial.print(soilMoisturePercent);
-  Serial.println("%");
+  if (!binaryMode) {
+    Serial.print("Soil moisture: ");
+    Serial.print(soilMoisturePercent);
+    Serial.println("%");
+  }
 }
 void displayDHTData() {
   float humidity = dht.readHumidity();
@@ -158,7 +282,9 @@ void displayDHTData() {
     lcd.clear();
     lcd.setCursor(0, 0);
     lcd.print("DHT read failed");
-    Serial.println("Failed to read from DHT sensor!");
+    if (!binaryMode) {
+      Serial.println("Failed to read from DHT sensor!");
+    }
     return;
   }
   lcd.clear();
@@ -170,21 +296,23 @@ void displayDHTData() {
   lcd.print("Temp: ");
   lcd.print(temperature, 1);
   lcd.print("\xDF""C"); 
-  Serial.print("Humidity: ");
-  Serial.print(humidity);
-  Serial.print("% ");
-  Serial.print("Temperature: ");
-  Serial.print(temperature);
-  Serial.println("°C");
+  if (!binaryMode) {
+    Serial.print("Humidity: ");
+    Serial.print(humidity);
+    Serial.print("% ");
+    Serial.print("Temperature: ");
+    Serial.print(temperature);
+    Serial.println("°C");
+  }
 }
-void displayLightData() {
+float readLightLevel() {
   float lux = 0;
   if (bh1750_detected) {
     lightMeter.configure(BH1750::ONE_TIME_HIGH_RES_MODE);
     delay(120); 
     lux = lightMeter.readLightLevel();
     if (lux < 0) {
-      Serial.println("Invalid BH1750 reading, reinitializing sensor...");
+      logMessage("Invalid BH1750 reading, reinitializing sensor...");
       if (lightMeter.begin(BH1750::ONE_TIME_HIGH_RES_MODE)) {
         delay(120);
         lux = lightMeter.readLightLevel();
@@ -199,6 +327,10 @@ void displayLightData() {
       if (lux < 0) lux = 0;
     }
   }
+  return lux;
+}
+void displayLightData() {
+  float lux = readLightLevel();
   lcd.clear();
   lcd.setCursor(0, 0);
   lcd.print("Light level:");
@@ -209,9 +341,11 @@ void displayLightData() {
   } else {
     lcd.print("Sensor error");
   }
-  Serial.print("Light level: ");
-  Serial.print(lux);
-  Serial.println(" lx");
+  if (!binaryMode) {
+    Serial.print("Light level: ");
+    Serial.print(lux);
+    Serial.println(" lx");
+  }
 }
 void displayDevicesState() {
   lcd.clear();
@@ -221,8 +355,10 @@ void displayDevicesState() {
   lcd.setCursor(0, 1);
   lcd.print("Curtains: ");
   lcd.print(curtainsState ? "CLOSED" : "OPEN");
-  Serial.print("Lamp: ");
-  Serial.println(ledState ? "ON" : "OFF");
-  Serial.print("Curtains: ");
-  Serial.println(curtainsState ? "CLOSED" : "OPEN");
+  if (!binaryMode) {
+    Serial.print("Lamp: ");
+    Serial.println(ledState ? "ON" : "OFF");
+    Serial.print("Curtains: ");
+    Serial.println(curtainsState ? "CLOSED" : "OPEN");
+  }
 } 
\ No newline at end of file
@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+import pytest
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from mock_farm_server import MockFarmServer
+from farm_api import FarmApiClient
+def wait_for(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+@pytest.fixture
+def clock():
+    return FakeClock()
+@pytest.fixture
+def server():
+    server = MockFarmServer().start()
+    yield server
+    server.stop()
+@pytest.fixture
+def client(server):
+    client = FarmApiClient(base_url=server.base_url, retries=0, log=lambda message: None, breaker_base_delay=0.05, breaker_max_delay=0.2)
+    yield client
+    client.close()
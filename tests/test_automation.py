@@ -0,0 +1,157 @@
+from concurrent.futures import Future
+import pytest
+from sensor_protocol import SensorReading
+from automation import AutomationEngine, AutomationRule, DeviceStates, parse_thresholds
+THRESHOLDS = {"success": True, "thresholds": {"light_level": {"min": 200, "max": 2000}}}
+LED_ONLY = (AutomationRule("LED", "light_level", "min", "below", 50.0, 300.0, 120.0),)
+CURTAINS_ONLY = (AutomationRule("CURTAINS", "light_level", "max", "above", 100.0, 600.0, 300.0),)
+def make_engine(clock, rules=None, actuate=None):
+    switches = []
+    def record(device, state):
+        switches.append((clock.now, device, state))
+        return actuate(device, state) if actuate else True
+    engine = AutomationEngine(actuate=record, clock=clock, log=lambda message: None, **({'rules': rules} if rules else {}))
+    engine.set_thresholds(THRESHOLDS)
+    return engine, switches
+def feed(engine, clock, values, step=2.0):
+    for value in values:
+        engine.evaluate(SensorReading(light_level=value))
+        clock.now += step
+def test_first_evaluation_from_unknown_state_sets_both_devices(clock):
+    engine, switches = make_engine(clock)
+    feed(engine, clock, [500])
+    assert switches == [(0.0, "LED", 0), (0.0, "CURTAINS", 0)]
+def test_first_switch_after_unknown_state_is_not_delayed_by_minimum_time(clock):
+    engine, switches = make_engine(clock, LED_ONLY)
+    feed(engine, clock, [500, 190])
+    assert switches == [(0.0, "LED", 0), (2.0, "LED", 1)]
+def test_unknown_state_inside_hysteresis_band_is_left_alone(clock):
+    engine, switches = make_engine(clock, LED_ONLY)
+    feed(engine, clock, [200, 225, 250])
+    assert switches == []
+    assert "LED" not in engine.states
+@pytest.mark.parametrize("value, expected", [(199.9, 1), (200, None), (250, None), (250.1, 0)])
+def test_lamp_hysteresis_edges_from_unknown_state(clock, value, expected):
+    engine, switches = make_engine(clock, LED_ONLY)
+    feed(engine, clock, [value])
+    assert [state for _, _, state in switches] == ([] if expected is None else [expected])
+@pytest.mark.parametrize("value, expected", [(1899.9, 0), (1900, None), (2000, None), (2000.1, 1)])
+def test_curtains_hysteresis_edges_from_unknown_state(clock, value, expected):
+    engine, switches = make_engine(clock, CURTAINS_ONLY)
+    feed(engine, clock, [value])
+    assert [state for _, _, state in switches] == ([] if expected is None else [expected])
+def test_band_keeps_current_state_on_both_sides(clock):
+    engine, switches = make_engine(clock, LED_ONLY)
+    feed(engine, clock, [190, 200, 249, 250, 201] + [250] * 200)
+    assert switches == [(0.0, "LED", 1)]
+def test_minimum_on_time_delays_switch_off(clock):
+    engine, switches = make_engine(clock, LED_ONLY)
+    feed(engine, clock, [500, 190])
+    feed(engine, clock, [400] * 148)
+    assert len(switches) == 2
+    feed(engine, clock, [400] * 3)
+    assert switches[2][1:] == ("LED", 0)
+    assert switches[2][0] - switches[1][0] == 300.0
+def test_minimum_off_time_delays_switch_on(clock):
+    engine, switches = make_engine(clock, LED_ONLY)
+    feed(engine, clock, [500, 190] + [400] * 150)
+    assert switches[-1][1:] == ("LED", 0)
+    off_at = switches[-1][0]
+    feed(engine, clock, [100] * 59)
+    assert switches[-1][1:] == ("LED", 0)
+    feed(engine, clock, [100] * 2)
+    assert switches[-1][1:] == ("LED", 1) and switches[-1][0] - off_at == 120.0
+def test_manual_switch_is_respected_and_restarts_minimum_time(clock):
+    engine, switches = make_engine(clock, LED_ONLY)
+    feed(engine, clock, [500])
+    engine.set_state("LED", 1)
+    feed(engine, clock, [400] * 149)
+    assert switches == [(0.0, "LED", 0)]
+    feed(engine, clock, [400])
+    assert switches[-1][1:] == ("LED", 0)
+def test_failed_actuation_is_retried_on_next_reading(clock):
+    results = [False, True]
+    engine, switches = make_engine(clock, LED_ONLY, actuate=lambda device, state: results.pop(0))
+    feed(engine, clock, [190, 190])
+    assert [state for _, _, state in switches] == [1, 1]
+    assert engine.states["LED"] == 1
+def test_disabled_engine_does_nothing(clock):
+    engine, switches = make_engine(clock)
+    engine.enabled = False
+    feed(engine, clock, [10, 5000])
+    assert switches == []
+def test_missing_threshold_skips_rule(clock):
+    engine, switches = make_engine(clock)
+    engine.set_thresholds({"thresholds": {"temperature": {"min": 18}}})
+    feed(engine, clock, [10])
+    assert switches == []
+@pytest.mark.parametrize("data", [
+    {"thresholds": {"light_level": {"min": "200", "max": "2000"}}},
+    {"thresholds": [{"parameter": "light", "min_value": 200, "max_value": 2000}]},
+    {"light_level_min": 200, "light_level_max": 2000, "success": True},
+])
+def test_threshold_formats(data):
+    assert parse_thresholds(data) == {"light_level": {"min": 200.0, "max": 2000.0}}
+def test_unrecognized_thresholds_keep_previous(clock):
+    messages = []
+    engine = AutomationEngine(clock=clock, log=messages.append)
+    assert engine.apply_thresholds(THRESHOLDS)
+    assert engine.apply_thresholds({"success": False, "message": "Unauthorized"}) == {}
+    assert engine.thresholds == {"light_level": {"min": 200.0, "max": 2000.0}}
+    engine.apply_thresholds(THRESHOLDS)
+    assert len(messages) == 2
+    assert messages[0].startswith("📊 Пороги автоматики обновлены") and messages[1].startswith("⚠️ Пороги с сервера не распознаны")
+class Actor:
+    def __init__(self, is_open=True, ack="LED state changed to: ON"):
+        self.is_open = is_open
+        self.ack = ack
+        self.sent = []
+    def send_command(self, device, state):
+        self.sent.append((device, state))
+        future = Future()
+        future.set_result(self.ack)
+        return future
+class Controller:
+    def __init__(self):
+        self.noted = []
+    def note_state(self, device, state):
+        self.noted.append((device, state))
+def make_states(actor=None, controller=None, messages=None, automation=None):
+    updates = []
+    states = DeviceStates(automation, lambda: actor, lambda: controller, on_update=lambda: updates.append(states.snapshot()),
+                          log=(messages.append if messages is not None else lambda message: None))
+    return states, updates
+def test_actuate_sends_command_and_notes_state():
+    actor, controller, messages = Actor(), Controller(), []
+    states, updates = make_states(actor, controller, messages)
+    assert states.actuate("LED", 1)
+    assert actor.sent == [("LED", 1)] and controller.noted == [("LED", 1)] and messages == []
+    assert updates == [(1, None)]
+def test_actuate_reports_missing_ack():
+    messages = []
+    states, _ = make_states(Actor(ack=None), None, messages)
+    assert states.actuate("CURTAINS", 0)
+    assert messages == ["❌ Arduino не подтвердил команду автоматики CURTAINS:0"]
+def test_actuate_with_closed_port():
+    actor, controller = Actor(is_open=False), Controller()
+    for port in (actor, None):
+        states, updates = make_states(port, controller)
+        assert not states.actuate("LED", 1)
+        assert states.snapshot() == (None, None) and updates == []
+    assert actor.sent == [] and controller.noted == []
+def test_server_changes_and_confirmed_commands_reach_automation(clock):
+    engine, _ = make_engine(clock, LED_ONLY)
+    controller = Controller()
+    states, updates = make_states(Actor(), controller, automation=engine)
+    states.handle_device_change("LED", 1)
+    states.handle_device_change("thresholds", {"thresholds": {"light_level": {"min": 100, "max": 900}}})
+    states.handle_device_change("update", None)
+    assert engine.states == {"LED": 1}
+    assert engine.thresholds == {"light_level": {"min": 100.0, "max": 900.0}}
+    clock.now = 5.0
+    states.confirmed("CURTAINS", 1)
+    assert engine.states == {"LED": 1, "CURTAINS": 1} and engine.changed_at["CURTAINS"] == 5.0
+    assert controller.noted == [("CURTAINS", 1)]
+    assert updates == [(1, None), (1, None), (1, None), (1, 1)]
+    states.reset()
+    assert states.snapshot() == (None, None)
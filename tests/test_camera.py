@@ -0,0 +1,95 @@
+import threading
+from camera import CameraManager
+class FakeCapture:
+    """Имитация cv2.VideoCapture: считает grab/read; failures - номера вызовов read, которые завершатся ошибкой"""
+    def __init__(self, index, opened=True, failures=()):
+        self.index = index
+        self.opened = opened
+        self.failures = set(failures)
+        self.grabs = 0
+        self.reads = 0
+        self.released = False
+    def isOpened(self):
+        return self.opened
+    def grab(self):
+        self.grabs += 1
+        return True
+    def read(self):
+        self.reads += 1
+        if self.reads in self.failures:
+            return False, None
+        return True, f"frame {self.index}/{self.grabs + self.reads}"
+    def release(self):
+        self.released = True
+class Factory:
+    def __init__(self, *captures):
+        self.captures = list(captures)
+        self.opened = []
+    def __call__(self, index):
+        capture = self.captures.pop(0) if self.captures else FakeCapture(index)
+        self.opened.append(capture)
+        return capture
+def test_opens_lazily_and_discards_warmup_frames(clock):
+    factory = Factory()
+    camera = CameraManager(0, warmup_frames=5, source_factory=factory, clock=clock)
+    assert not camera.is_open and factory.opened == []
+    assert camera.read() is not None
+    assert camera.read() is not None
+    assert len(factory.opened) == 1
+    assert factory.opened[0].grabs == 5 and factory.opened[0].reads == 2
+def test_reopens_after_read_failure(clock):
+    broken = FakeCapture(0, failures={2})
+    factory = Factory(broken)
+    camera = CameraManager(0, warmup_frames=0, source_factory=factory, clock=clock)
+    assert camera.read() is not None
+    assert camera.read() is not None
+    assert broken.released and len(factory.opened) == 2
+    assert camera.stats()['opens'] == 2 and camera.stats()['failures'] == 0 and camera.last_error is None
+def test_gives_up_after_second_failure(clock):
+    factory = Factory(FakeCapture(0, failures={1}), FakeCapture(0, failures={1}))
+    camera = CameraManager(0, warmup_frames=0, source_factory=factory, clock=clock)
+    assert camera.read() is None
+    assert not camera.is_open and camera.stats()['failures'] == 1
+    assert camera.last_error == "Не удалось получить изображение с камеры"
+    assert camera.read() is not None
+def test_stale_frames_flushed_only_after_idle(clock):
+    factory = Factory()
+    camera = CameraManager(0, warmup_frames=0, source_factory=factory, clock=clock, flush_frames=4, stale_after=1.0)
+    camera.read()
+    capture = factory.opened[0]
+    clock.now += 0.5
+    camera.read()
+    assert capture.grabs == 0
+    clock.now += 1.0
+    camera.read()
+    assert capture.grabs == 0
+    clock.now += 1.01
+    camera.read()
+    assert capture.grabs == 4 and capture.reads == 4
+def test_missing_camera_reports_error_without_exception(clock):
+    missing = FakeCapture(3, opened=False)
+    camera = CameraManager(3, source_factory=Factory(missing), clock=clock)
+    assert camera.read() is None
+    assert not camera.is_open and missing.released
+    assert "индексом 3" in camera.last_error
+def test_index_change_releases_connection(clock):
+    factory = Factory()
+    camera = CameraManager(0, warmup_frames=0, source_factory=factory, clock=clock)
+    camera.read()
+    camera.configure(index=1)
+    assert factory.opened[0].released and not camera.is_open
+    assert camera.read() == "frame 1/1" and factory.opened[1].index == 1
+def test_concurrent_consumers_share_one_connection(clock):
+    factory = Factory()
+    camera = CameraManager(0, warmup_frames=2, source_factory=factory, clock=clock)
+    results = []
+    def consumer():
+        for _ in range(10):
+            results.append(camera.read() is not None)
+    threads = [threading.Thread(target=consumer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 40 and all(results)
+    assert len(factory.opened) == 1 and camera.stats()['frames'] == 40
@@ -0,0 +1,67 @@
+import time
+import pytest
+from farm_api import CircuitBreaker, CircuitOpenError, LED_ENDPOINT, BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN
+from conftest import wait_for
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", failure_threshold=3, base_delay=2.0, max_delay=16.0, jitter=0.5, clock=clock)
+def test_opens_after_threshold_failures(breaker):
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == BREAKER_CLOSED
+    breaker.record_failure()
+    assert breaker.state == BREAKER_OPEN
+    assert 1.0 <= breaker.retry_in() <= 2.0
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+def test_half_open_admits_one_probe_and_delay_grows(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    delays = []
+    for _ in range(6):
+        delays.append(breaker.retry_in())
+        clock.now = breaker.open_until
+        assert breaker.allow()
+        assert breaker.state == BREAKER_HALF_OPEN
+        assert not breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == BREAKER_OPEN
+    assert all(1.0 <= delay <= 16.0 for delay in delays)
+    assert delays[-1] >= 8.0
+def test_successful_probe_closes(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now = breaker.open_until
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == BREAKER_CLOSED
+    assert breaker.allow()
+    assert breaker.retry_in() == 0.0
+    assert breaker.failures == 0
+def test_client_skips_requests_while_open_and_recovers(server, client):
+    server.set_failing(503)
+    for _ in range(client.failure_threshold):
+        assert client.request("GET", LED_ENDPOINT).status_code == 503
+    sent = server.state.requests[LED_ENDPOINT]
+    with pytest.raises(CircuitOpenError):
+        client.request("GET", LED_ENDPOINT)
+    assert server.state.requests[LED_ENDPOINT] == sent
+    assert client.breaker_states()[LED_ENDPOINT]['state'] == BREAKER_OPEN
+    server.recover()
+    time.sleep(client.breaker(LED_ENDPOINT).retry_in())
+    assert client.request("GET", LED_ENDPOINT).status_code == 200
+    assert client.breaker_states()[LED_ENDPOINT]['state'] == BREAKER_CLOSED
+    assert client.stats()['rejected'] == 1
+def test_device_poll_resumes_after_outage(server, client):
+    server.set_failing(503)
+    for _ in range(client.failure_threshold):
+        client.request("GET", LED_ENDPOINT)
+    server.set_device_state(lamp=1)
+    server.recover()
+    def poll():
+        try:
+            return client.request("GET", LED_ENDPOINT).json()['state'] == 1
+        except CircuitOpenError:
+            return False
+    assert wait_for(poll, 5)
@@ -0,0 +1,85 @@
+import pytest
+from concurrent.futures import Future
+from mock_farm_server import MockFarmServer, MockFarmHandler
+from farm_api import FarmApiClient, THRESHOLDS_ENDPOINT
+from network_engine import NetworkEngine
+from device_control import DeviceController, PushUnsupported
+from conftest import wait_for
+class RawEventsHandler(MockFarmHandler):
+    """Канал долгого опроса отвечает 200 с телом, заданным в state.events_body"""
+    def wait_device_state(self, state):
+        body = state.events_body
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+class AckingActor:
+    """Порт Arduino, который сразу подтверждает любую команду"""
+    is_open = True
+    command_timeout = 1
+    def send_command(self, device, state):
+        future = Future()
+        future.set_result(f"{device}:{state}:OK")
+        return future
+@pytest.fixture
+def raw_server():
+    server = MockFarmServer(handler=RawEventsHandler).start()
+    yield server
+    server.stop()
+@pytest.mark.parametrize("body", [b"<html>502 Bad Gateway</html>", b"[1, 0]", b'"ok"', b'{"success": true, "lamp_state": "on", "curtains_state": 0}'])
+def test_malformed_push_response_is_unsupported(raw_server, body):
+    raw_server.state.events_body = body
+    client = FarmApiClient(base_url=raw_server.base_url, retries=0, log=lambda message: None)
+    controller = DeviceController(client, None, None, log=lambda message: None)
+    try:
+        with pytest.raises(PushUnsupported):
+            controller.wait_for_change()
+    finally:
+        client.close()
+def test_malformed_push_response_falls_back_to_polling(raw_server):
+    raw_server.state.events_body = b"<html>maintenance</html>"
+    client = FarmApiClient(base_url=raw_server.base_url, retries=0, log=lambda message: None)
+    engine = NetworkEngine(log=lambda message: None).start()
+    messages = []
+    controller = DeviceController(client, AckingActor(), engine, check_interval=0.05, log=messages.append)
+    engine.spawn("devices", controller.run)
+    try:
+        assert wait_for(lambda: any("не поддерживает канал" in message for message in messages), 10), messages
+        polls = raw_server.state.requests.get("get-lamp-state.php", 0)
+        assert wait_for(lambda: raw_server.state.requests.get("get-lamp-state.php", 0) > polls + 2, 10)
+        assert raw_server.state.requests.get("wait-device-state.php") == 1
+        assert not any("Ошибка в задаче управления устройствами" in message for message in messages), messages
+    finally:
+        engine.stop()
+        client.close()
+class SilentActor:
+    """Порт Arduino, который не подтверждает команды"""
+    is_open = True
+    command_timeout = 1
+    def __init__(self):
+        self.commands = []
+    def send_command(self, device, state):
+        self.commands.append((device, state))
+        future = Future()
+        future.set_result(None)
+        return future
+def test_unacknowledged_commands_do_not_stop_server_sync(server, client):
+    client.cache.ttls[THRESHOLDS_ENDPOINT] = 0
+    engine = NetworkEngine(log=lambda message: None).start()
+    actor = SilentActor()
+    controller = DeviceController(client, actor, engine, check_interval=0.05, thresholds_interval=0, push_wait=0.2, log=lambda message: None)
+    engine.spawn("devices", controller.run)
+    try:
+        assert wait_for(lambda: controller.resync_failures > 0, 10)
+        server.set_device_state(lamp=1, curtains=1)
+        assert wait_for(lambda: controller.server_states == {"LED": 1, "CURTAINS": 1}, 10), controller.server_states
+        server.state.thresholds = dict(server.state.thresholds, version=2)
+        assert wait_for(lambda: (controller.thresholds or {}).get("version") == 2, 10)
+        attempts = len(actor.commands)
+        server.state.requests.clear()
+        wait_for(lambda: False, 1.5)
+        assert len(actor.commands) - attempts <= 8, actor.commands
+        assert sum(server.state.requests.values()) > 3
+    finally:
+        engine.stop()
@@ -0,0 +1,34 @@
+from plant_analysis import detect_plant, encode_jpeg
+from farm_api import MultipartStream, UPLOAD_ENDPOINT
+from synthetic_plants import synthetic_plant
+DATA = {'text': "Анализ состояния растений", 'timestamp': "2024-01-01 12:00:00", 'has_analysis': 'true'}
+def photo_files():
+    original = synthetic_plant(640, 360)
+    analysis = detect_plant(original)[0]
+    return {'image': ('original.jpg', encode_jpeg(original), 'image/jpeg'),
+            'analysis_image': ('analysis.jpg', encode_jpeg(analysis), 'image/jpeg')}
+def test_streamed_upload_matches_in_memory_multipart(server, client):
+    files = photo_files()
+    assert client.post_multipart(UPLOAD_ENDPOINT, DATA, files).status_code == 200
+    assert client.post(UPLOAD_ENDPOINT, data=DATA, files={name: (filename, data.tobytes(), content_type)
+                                                          for name, (filename, data, content_type) in files.items()}).status_code == 200
+    streamed, in_memory = server.state.uploads
+    assert streamed == in_memory
+    assert streamed['image'] == files['image'][1].tobytes()
+    assert streamed['analysis_image'] == files['analysis_image'][1].tobytes()
+    assert streamed['text'].decode() == DATA['text']
+def test_multipart_reads_in_blocks_match_iteration():
+    body = MultipartStream(DATA, photo_files())
+    whole = b"".join(bytes(part) for part in body)
+    assert len(whole) == len(body)
+    body.seek(0)
+    blocks = []
+    while True:
+        block = body.read(8191)
+        if not block:
+            break
+        blocks.append(block)
+    assert b"".join(blocks) == whole
+    assert body.tell() == len(body)
+    body.seek(-10, 2)
+    assert body.read() == whole[-10:]
@@ -0,0 +1,36 @@
+import os
+import sys
+import json
+import signal
+import subprocess
+from farm_daemon import load_settings, DEFAULT_SETTINGS
+from conftest import ROOT
+def test_missing_config_uses_defaults(tmp_path):
+    assert load_settings(str(tmp_path / "missing.json")) == DEFAULT_SETTINGS
+def test_config_overrides_known_keys(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({'sensor_interval': 5, 'upload_mode': "unknown", 'extra': 1}), encoding='utf-8')
+    settings = load_settings(str(path))
+    assert settings['sensor_interval'] == 5
+    assert settings['upload_mode'] == DEFAULT_SETTINGS['upload_mode']
+    assert 'extra' not in settings
+def test_first_run_without_config_starts_and_stops(tmp_path, server):
+    environment = dict(os.environ, HOME=str(tmp_path), PYTHONUNBUFFERED="1")
+    process = subprocess.Popen([sys.executable, "farm_daemon.py", "--port", "loop://", "--server", server.base_url, "--no-photos"],
+                               cwd=ROOT, env=environment, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding='utf-8')
+    output = []
+    started = False
+    for line in process.stdout:
+        output.append(line)
+        if "Ошибка" in line:
+            break
+        if "Система запущена без интерфейса" in line:
+            started = True
+            break
+    process.send_signal(signal.SIGTERM)
+    output += process.communicate(timeout=30)[0].splitlines(keepends=True)
+    text = "".join(output)
+    assert started, text
+    assert process.returncode == 0, text
+    assert "не найден, будут использованы значения по умолчанию" in text
+    assert "Система остановлена" in text
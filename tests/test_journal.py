@@ -0,0 +1,87 @@
+import random
+from datetime import datetime
+import pytest
+from journal import Journal, JournalFilter, IMPORTANT_MESSAGES, REPORT_SEPARATOR
+from FitoDomik import JournalModel
+MOMENT = datetime(2026, 1, 1, 12, 0, 0)
+def linear_filter(message):
+    """Прежний отбор: перебор подстрок списком на каждое сообщение"""
+    if message.startswith("❌") or "ошибка" in message.lower() or "ERROR" in message.upper():
+        return True
+    for important_msg in IMPORTANT_MESSAGES:
+        if important_msg in message:
+            return True
+    return REPORT_SEPARATOR in message
+def minute_messages(minute, rng):
+    """Сообщения одной минуты работы: показания, выбор ID, отчет об отправке, раз в час - фото и сбой сети"""
+    messages = [f"📊 Получены данные: Temperature: {rng.uniform(18, 28):.1f} C, Humidity: {rng.uniform(40, 70):.1f} %" for _ in range(5)]
+    messages.append(f"Используем ID {minute + 1} для новой записи")
+    messages.append(f"📅 2026-01-01 12:{minute % 60:02d}:00\n{REPORT_SEPARATOR}\n🆔 ID записи:              {minute + 1}\n{REPORT_SEPARATOR}")
+    if minute % 60 == 0:
+        messages += ["📸 Делаем фото с камеры...", "🔍 Анализируем изображение растения...", "✅ Фото успешно загружено для пользователя с ID: 1",
+                     "❌ Ошибка получения состояния лампы: HTTP 503"]
+    return messages
+def filled(capacity, count):
+    journal = Journal(capacity, message_filter=lambda message: True)
+    for number in range(count):
+        journal.add(f"📅 {number}")
+    return journal
+def rows(journal):
+    return [journal.line(row) for row in range(len(journal))]
+def test_lines_wrap_around_capacity():
+    journal = filled(4, 10)
+    assert journal.flush() == 4
+    assert rows(journal) == ["📅 6", "📅 7", "📅 8", "📅 9"]
+    for number in range(10, 13):
+        journal.add(f"📅 {number}")
+        journal.flush()
+    assert journal.start == 3
+    assert rows(journal) == ["📅 9", "📅 10", "📅 11", "📅 12"]
+    assert journal.stats()['evicted'] == 3
+    assert journal.text() == "\n".join(rows(journal))
+def test_pending_lines_capped_at_capacity():
+    journal = filled(4, 3)
+    journal.add("📅 a\nb\nc")
+    assert journal.take_pending() == ["📅 2", "📅 a", "b", "c"]
+@pytest.mark.parametrize("size, count, expected", [(0, 3, 0), (2, 2, 0), (3, 2, 1), (3, 4, 3), (4, 4, 4), (4, 9, 4)])
+def test_overflow_counts(size, count, expected):
+    journal = filled(4, size)
+    journal.flush()
+    assert journal.overflow(count) == expected
+class Recorder:
+    def __init__(self, model):
+        self.events = []
+        model.rowsAboutToBeRemoved.connect(lambda parent, first, last: self.events.append(("remove", first, last)))
+        model.rowsAboutToBeInserted.connect(lambda parent, first, last: self.events.append(("insert", first, last)))
+@pytest.mark.parametrize("size, count, events", [
+    (1, 2, [("insert", 1, 2)]),
+    (3, 2, [("remove", 0, 0), ("insert", 2, 3)]),
+    (3, 3, [("remove", 0, 1), ("insert", 1, 3)]),
+    (3, 4, [("remove", 0, 2), ("insert", 0, 3)]),
+])
+def test_model_flush_removes_only_displaced_rows(size, count, events):
+    journal = filled(4, size)
+    journal.flush()
+    model = JournalModel(journal)
+    recorder = Recorder(model)
+    for number in range(count):
+        journal.add(f"📅 new {number}")
+    assert model.flush() == count
+    assert recorder.events == events
+    assert model.rowCount() == min(4, size + count)
+    assert rows(journal)[-count:] == [f"📅 new {number}" for number in range(count)]
+def test_filter_matches_linear_filter():
+    rng = random.Random(7)
+    messages = [message for minute in range(0, 180, 7) for message in minute_messages(minute, rng)]
+    messages += [f"prefix {important} suffix" for important in IMPORTANT_MESSAGES]
+    messages += ["❌ сбой", "Произошла ОШИБКА", "Connection Error", "ERROR: timeout", "📊 Получены данные: Light: 10 lx", "", "просто текст"]
+    message_filter = JournalFilter()
+    assert [message_filter(message) for message in messages] == [linear_filter(message) for message in messages]
+    assert any(message_filter(message) for message in messages)
+    assert not all(message_filter(message) for message in messages)
+def test_filtered_messages_are_counted():
+    journal = Journal(10)
+    assert not journal.add("📊 Получены данные: Light: 10 lx")
+    assert journal.add("❌ Ошибка", moment=MOMENT)
+    assert journal.take_pending() == ["2026-01-01 12:00:00 - ❌ Ошибка"]
+    assert journal.stats()['skipped'] == 1
@@ -0,0 +1,109 @@
+import time
+import threading
+from photo_pipeline import PhotoPipeline
+from conftest import wait_for
+class Stages:
+    """Подменные стадии конвейера: съемка и загрузка могут ждать разрешения, загрузка записывает источники и время попыток"""
+    def __init__(self, upload_ok=True):
+        self.upload_ok = upload_ok
+        self.capture_started = threading.Event()
+        self.capture_release = threading.Event()
+        self.capture_release.set()
+        self.upload_started = threading.Event()
+        self.upload_release = threading.Event()
+        self.upload_release.set()
+        self.uploaded = []
+        self.attempts = []
+    def capture(self):
+        self.capture_started.set()
+        self.capture_release.wait(5)
+        return "frame"
+    def analyze(self, job):
+        return job.source
+    def upload(self, job):
+        self.attempts.append(time.monotonic())
+        self.upload_started.set()
+        self.upload_release.wait(5)
+        if self.upload_ok:
+            self.uploaded.append(job.payload)
+        return self.upload_ok
+def make_pipeline(stages, **kwargs):
+    messages = []
+    pipeline = PhotoPipeline(stages.capture, stages.analyze, stages.upload, log=messages.append, **kwargs)
+    return pipeline, messages
+def test_request_dropped_while_photo_is_queued():
+    stages = Stages()
+    stages.capture_release.clear()
+    pipeline, messages = make_pipeline(stages)
+    try:
+        assert pipeline.request("first")
+        assert stages.capture_started.wait(5)
+        assert pipeline.request("second")
+        assert not pipeline.request("third")
+        assert pipeline.stats()['dropped_requests'] == 1
+        stages.capture_release.set()
+        assert wait_for(lambda: stages.uploaded == ["first", "second"], 5), stages.uploaded
+    finally:
+        pipeline.stop()
+    assert any("Фото third пропущено" in message for message in messages)
+def test_oldest_upload_dropped_when_queue_full():
+    stages = Stages()
+    stages.upload_release.clear()
+    pipeline, messages = make_pipeline(stages, upload_workers=1, upload_queue=2)
+    try:
+        for number, source in enumerate(("1", "2", "3", "4")):
+            assert pipeline.request(source)
+            assert wait_for(lambda: pipeline.captured == number + 1 and pipeline.requests.unfinished_tasks == 0, 5)
+            if number == 0:
+                assert stages.upload_started.wait(5)
+        assert pipeline.stats()['dropped_uploads'] == 1
+        assert [job.payload for job in pipeline.uploads] == ["3", "4"]
+        stages.upload_release.set()
+        assert wait_for(lambda: len(stages.uploaded) == 3, 5)
+    finally:
+        pipeline.stop()
+    assert stages.uploaded == ["1", "3", "4"]
+    assert any("переполнена" in message for message in messages)
+def test_failed_upload_backs_off_and_is_given_up():
+    stages = Stages(upload_ok=False)
+    pipeline, messages = make_pipeline(stages, retries=2, retry_interval=0.1, max_retry_interval=1.0)
+    try:
+        pipeline.request("scheduled")
+        assert wait_for(lambda: pipeline.stats()['dropped_uploads'] == 1, 5), messages
+        time.sleep(0.3)
+    finally:
+        pipeline.stop()
+    assert len(stages.attempts) == 3
+    gaps = [later - earlier for earlier, later in zip(stages.attempts, stages.attempts[1:])]
+    assert 0.05 <= gaps[0] <= 0.5
+    assert 0.1 <= gaps[1] <= 0.7
+    assert pipeline.stats()['upload_failures'] == 3
+    assert pipeline.stats()['queued'] == 0
+    assert any("не загружено после 3 попыток" in message for message in messages)
+def test_retry_waits_for_retry_after():
+    stages = Stages(upload_ok=False)
+    pipeline, _ = make_pipeline(stages, retries=1, retry_interval=0.01, retry_after=lambda: 0.3)
+    try:
+        pipeline.request()
+        assert wait_for(lambda: len(stages.attempts) == 2, 5)
+    finally:
+        pipeline.stop()
+    assert stages.attempts[1] - stages.attempts[0] >= 0.3
+def test_request_after_restart_is_not_dropped():
+    stages = Stages()
+    stages.capture_release.clear()
+    pipeline, _ = make_pipeline(stages)
+    pipeline.request("before stop")
+    assert stages.capture_started.wait(5)
+    stopper = threading.Thread(target=pipeline.stop)
+    stopper.start()
+    assert wait_for(lambda: pipeline.requests.full(), 5)
+    stages.capture_release.set()
+    stopper.join(10)
+    assert pipeline.requests.empty()
+    assert pipeline.requests.unfinished_tasks == 0
+    try:
+        assert pipeline.request("after restart")
+        assert wait_for(lambda: "after restart" in stages.uploaded, 5), stages.uploaded
+    finally:
+        pipeline.stop()
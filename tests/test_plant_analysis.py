@@ -0,0 +1,109 @@
+import cv2
+import numpy as np
+import pytest
+from plant_analysis import LEAF_COLORS, ROI_COLOR, LeafColorClassifier, detect_plant, roi_rect
+from synthetic_plants import synthetic_plant
+def detect_plant_reference(image):
+    """Прежняя реализация PlantPhotoThread.detect_plant: inRange по каждому классу дважды, морфология по каждому классу"""
+    height, width = image.shape[:2]
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    detection_image = image.copy()
+    total_mask = np.zeros((height, width), dtype=np.uint8)
+    kernel = np.ones((3, 3), np.uint8)
+    for color_range in LEAF_COLORS.values():
+        mask = cv2.inRange(hsv, color_range["lower"], color_range["upper"])
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+        total_mask = cv2.bitwise_or(total_mask, mask)
+    contours, _ = cv2.findContours(total_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    filtered_contours = [contour for contour in contours if cv2.contourArea(contour) > 100]
+    cv2.drawContours(detection_image, filtered_contours, -1, (0, 255, 0), 2)
+    plant_mask = np.zeros_like(total_mask)
+    cv2.drawContours(plant_mask, filtered_contours, -1, 255, -1)
+    color_percentages = {}
+    plant_pixels = np.count_nonzero(plant_mask)
+    if plant_pixels > 0:
+        for color_name, color_range in LEAF_COLORS.items():
+            mask = cv2.inRange(hsv, color_range["lower"], color_range["upper"])
+            color_pixels = cv2.countNonZero(cv2.bitwise_and(mask, plant_mask))
+            color_percentages[color_name] = (color_pixels / plant_pixels) * 100
+    return detection_image, plant_mask, color_percentages
+@pytest.mark.parametrize("seed", range(3))
+def test_single_pass_matches_reference(seed):
+    image = synthetic_plant(960, 540, seed=seed)
+    expected_image, expected_mask, expected_percentages = detect_plant_reference(image)
+    detection_image, plant_mask, percentages = detect_plant(image)
+    assert percentages == expected_percentages
+    assert set(percentages) == set(LEAF_COLORS)
+    assert np.array_equal(plant_mask, expected_mask)
+    assert np.array_equal(detection_image, expected_image)
+def test_labels_match_in_range_per_color():
+    hsv = np.stack(np.meshgrid(np.arange(0, 180, 3), np.arange(0, 256, 5), np.arange(0, 256, 5), indexing='ij'), axis=-1).astype(np.uint8)
+    hsv = hsv.reshape(-1, 1, 3)
+    classifier = LeafColorClassifier()
+    labels = classifier.label(hsv)
+    for name, color_range in LEAF_COLORS.items():
+        in_range = cv2.inRange(hsv, color_range["lower"], color_range["upper"]) > 0
+        assert np.array_equal((labels & classifier.bits[name]) > 0, in_range), name
+def test_image_without_plant():
+    image = np.full((120, 160, 3), (170, 175, 180), dtype=np.uint8)
+    _, plant_mask, percentages = detect_plant(image)
+    assert not plant_mask.any()
+    assert percentages == {}
+GREEN = (40, 160, 40)
+YELLOW = (30, 200, 220)
+def leaves(width=1280, height=720, boxes=((200, 150, 520, 560), (760, 100, 1100, 400))):
+    """Фон и прямоугольные листья с желтым пятном в первом: границы растения известны точно"""
+    image = np.full((height, width, 3), (170, 175, 180), dtype=np.uint8)
+    for left, top, right, bottom in boxes:
+        cv2.rectangle(image, (left, top), (right - 1, bottom - 1), GREEN, -1)
+    cv2.rectangle(image, (300, 300), (399, 399), YELLOW, -1)
+    return image, boxes
+def box_mask(shape, boxes):
+    mask = np.zeros(shape[:2], dtype=np.uint8)
+    for left, top, right, bottom in boxes:
+        mask[top:bottom, left:right] = 255
+    return mask
+def overlap(first, second):
+    return np.count_nonzero(first & second) / np.count_nonzero(first | second)
+def test_options_off_match_full_resolution_reference():
+    image = synthetic_plant(640, 360, seed=5)
+    expected = detect_plant_reference(image)
+    for actual in (detect_plant(image, max_side=None, roi=None), detect_plant(image, max_side=640), detect_plant(image, roi=(0, 0, 1, 1))[1:]):
+        assert actual[-1] == expected[2]
+        assert np.array_equal(actual[-2], expected[1])
+    assert np.array_equal(detect_plant(image, max_side=640)[0], expected[0])
+@pytest.mark.parametrize("max_side", [640, 320])
+def test_downscaled_mask_and_contours_map_to_full_resolution(max_side):
+    image, boxes = leaves()
+    detection_image, plant_mask, percentages = detect_plant(image, max_side=max_side)
+    assert plant_mask.shape == image.shape[:2]
+    assert overlap(plant_mask, box_mask(image.shape, boxes)) > 0.97
+    scale = image.shape[1] / max_side
+    for left, top, right, bottom in boxes:
+        contour = np.argwhere(np.all(detection_image[top - 8:bottom + 8, left - 8:right + 8] == (0, 255, 0), axis=-1))
+        (min_y, min_x), (max_y, max_x) = contour.min(axis=0), contour.max(axis=0)
+        assert abs(min_x - 8) <= scale + 1 and abs(min_y - 8) <= scale + 1
+        assert abs(max_x - (right - left + 7)) <= scale + 1 and abs(max_y - (bottom - top + 7)) <= scale + 1
+    full = detect_plant(image)[2]
+    assert percentages.keys() == full.keys()
+    assert all(abs(percentages[name] - full[name]) < 1.0 for name in full)
+def test_roi_crops_analysis_and_offsets_results():
+    image, boxes = leaves()
+    roi = (0.5, 0.0, 0.5, 1.0)
+    x, y, width, height = roi_rect(image.shape, roi)
+    detection_image, plant_mask, percentages = detect_plant(image, roi=roi)
+    assert (x, y, width, height) == (640, 0, 640, 720)
+    assert np.array_equal(plant_mask, box_mask(image.shape, boxes[1:]))
+    assert percentages == detect_plant(image[y:y + height, x:x + width])[2]
+    assert percentages["yellow"] == 0
+    assert tuple(detection_image[360, x]) == ROI_COLOR
+    assert tuple(detection_image[360, x + width - 1]) == ROI_COLOR
+    assert np.array_equal(detection_image[:, :x - 2], image[:, :x - 2])
+def test_roi_with_downscale():
+    image, boxes = leaves()
+    roi = (0.5, 0.0, 0.5, 1.0)
+    plant_mask = detect_plant(image, max_side=320, roi=roi)[1]
+    assert plant_mask.shape == image.shape[:2]
+    assert not plant_mask[:, :640].any()
+    assert overlap(plant_mask, box_mask(image.shape, boxes[1:])) > 0.97
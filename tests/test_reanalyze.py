@@ -0,0 +1,60 @@
+import os
+import cv2
+import pytest
+from reanalyze import AnalysisIndex, LEAF_COLORS, reanalyze, settings_key
+from synthetic_plants import synthetic_plant
+PHOTOS = 4
+@pytest.fixture
+def archive(tmp_path):
+    directory = tmp_path / "photos"
+    (directory / "2026-01").mkdir(parents=True)
+    for number in range(PHOTOS):
+        cv2.imwrite(str(directory / "2026-01" / f"farm_photo_{number}.jpg"), synthetic_plant(320, 180, seed=number))
+    cv2.imwrite(str(directory / "2026-01" / "farm_analysis_0.jpg"), synthetic_plant(320, 180))
+    return directory
+@pytest.fixture
+def index(tmp_path):
+    index = AnalysisIndex(str(tmp_path / "index.db"))
+    yield index
+    index.close()
+def run(directory, index, **kwargs):
+    return reanalyze(str(directory), index, workers=1, log=lambda message: None, **kwargs)
+def test_second_run_skips_analyzed_files_under_any_path_spelling(archive, index, tmp_path, monkeypatch):
+    assert run(archive, index) == (PHOTOS, 0, 0)
+    monkeypatch.chdir(tmp_path)
+    for spelling in ("photos", "./photos", os.path.realpath("photos")):
+        assert run(spelling, index) == (0, PHOTOS, 0)
+    assert index.export_csv(str(tmp_path / "index.csv")) == PHOTOS
+    assert index.done(settings_key(LEAF_COLORS, None, None)).keys() == {
+        os.path.join("2026-01", f"farm_photo_{number}.jpg") for number in range(PHOTOS)}
+def test_interrupted_run_resumes_with_remaining_files(archive, tmp_path):
+    class InterruptedIndex(AnalysisIndex):
+        def add(self, row):
+            super().add(row)
+            if len(self.pending) == 2:
+                raise KeyboardInterrupt
+    interrupted = InterruptedIndex(str(tmp_path / "index.db"))
+    with pytest.raises(KeyboardInterrupt):
+        run(archive, interrupted)
+    interrupted.close()
+    index = AnalysisIndex(str(tmp_path / "index.db"))
+    try:
+        assert run(archive, index) == (PHOTOS - 2, 2, 0)
+        assert run(archive, index) == (0, PHOTOS, 0)
+    finally:
+        index.close()
+def test_changed_settings_reanalyze_every_file(archive, index):
+    run(archive, index)
+    assert run(archive, index, max_side=160) == (PHOTOS, 0, 0)
+    colors = {name: dict(color_range) for name, color_range in LEAF_COLORS.items()}
+    colors["yellow"]["upper"] = colors["yellow"]["upper"] - 1
+    assert run(archive, index, colors=colors, max_side=160) == (PHOTOS, 0, 0)
+    assert run(archive, index, colors=colors, max_side=160) == (0, PHOTOS, 0)
+def test_failed_files_are_retried(archive, index):
+    broken = archive / "2026-01" / "farm_photo_broken.jpg"
+    broken.write_bytes(b"not a jpeg")
+    assert run(archive, index) == (PHOTOS + 1, 0, 1)
+    assert run(archive, index) == (1, PHOTOS, 1)
+    cv2.imwrite(str(broken), synthetic_plant(320, 180))
+    assert run(archive, index) == (1, PHOTOS, 0)
+    assert run(archive, index) == (0, PHOTOS + 1, 0)
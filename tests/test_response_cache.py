@@ -0,0 +1,33 @@
+from farm_api import LED_ENDPOINT, CURTAINS_ENDPOINT, THRESHOLDS_ENDPOINT
+def test_led_state_revalidated_with_etag(server, client):
+    first = client.get(LED_ENDPOINT)
+    second = client.get(LED_ENDPOINT)
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert server.state.not_modified == 1
+    assert server.state.requests[LED_ENDPOINT] == 2
+    assert client.cache.stats()['revalidated'] == 1
+def test_thresholds_served_from_cache_within_ttl(server, client):
+    first = client.get(THRESHOLDS_ENDPOINT).json()
+    assert client.get(THRESHOLDS_ENDPOINT).json() == first
+    assert server.state.requests[THRESHOLDS_ENDPOINT] == 1
+    assert client.cache.stats()['hits'] == 1
+def test_changed_led_state_is_returned(server, client):
+    assert client.get(LED_ENDPOINT).json()['state'] == 0
+    server.set_device_state(lamp=1)
+    assert client.get(LED_ENDPOINT).json()['state'] == 1
+    assert server.state.not_modified == 0
+def test_stale_copy_returned_on_server_error(server, client):
+    server.set_device_state(lamp=1)
+    for endpoint in (LED_ENDPOINT, CURTAINS_ENDPOINT, THRESHOLDS_ENDPOINT):
+        client.get(endpoint)
+    server.set_failing(503)
+    led = client.get(LED_ENDPOINT)
+    assert led.status_code == 200
+    assert led.json()['state'] == 1
+    assert client.get(CURTAINS_ENDPOINT).status_code == 200
+    assert client.get(THRESHOLDS_ENDPOINT).json()['success']
+    assert client.cache.stats()['stale'] == 2
+def test_server_error_without_cached_copy_is_returned(server, client):
+    server.set_failing(503)
+    assert client.get(LED_ENDPOINT).status_code == 503
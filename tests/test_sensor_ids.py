@@ -0,0 +1,127 @@
+from sensor_store import SensorIdAllocator, OUTBOX_SENT
+from sensor_ingest import SensorIngest
+def payload(temperature=21.0):
+    return {'user_id': 1, 'temperature': temperature, 'humidity': 50.0, 'soil_moisture': 40.0, 'light_level': 300.0, 'co2': 400,
+            'pressure': 1013.25, 'lamp_state': 0, 'curtains_state': 0}
+def test_block_starts_after_server_max(tmp_path):
+    allocator = SensorIdAllocator(str(tmp_path / "ids.db"), lambda: 41, block_size=10)
+    assert [allocator.allocate() for _ in range(3)] == [42, 43, 44]
+    assert allocator.syncs == 1
+    allocator.close()
+def test_new_block_and_restart_resync_with_server(tmp_path):
+    server_max = [0]
+    path = str(tmp_path / "ids.db")
+    allocator = SensorIdAllocator(path, lambda: server_max[0], block_size=3)
+    assert [allocator.allocate() for _ in range(3)] == [1, 2, 3]
+    server_max[0] = 50
+    assert allocator.allocate() == 51
+    assert allocator.syncs == 2
+    allocator.close()
+    restarted = SensorIdAllocator(path, lambda: server_max[0], block_size=3)
+    assert restarted.allocate() == 54
+    assert restarted.syncs == 1
+    restarted.close()
+def test_offline_continues_saved_lease(tmp_path):
+    path = str(tmp_path / "ids.db")
+    assert SensorIdAllocator(path, lambda: None).allocate() is None
+    allocator = SensorIdAllocator(path, lambda: 10, block_size=2)
+    assert allocator.allocate() == 11
+    allocator.close()
+    offline = SensorIdAllocator(path, lambda: None, block_size=2)
+    assert [offline.allocate() for _ in range(3)] == [13, 14, 15]
+    offline.close()
+def test_offline_sync_backs_off_between_attempts(tmp_path, clock):
+    path = str(tmp_path / "ids.db")
+    allocator = SensorIdAllocator(path, lambda: 10, block_size=100)
+    allocator.allocate()
+    allocator.close()
+    calls = []
+    def fetch_max_id():
+        calls.append(clock.now)
+        return None
+    offline = SensorIdAllocator(path, fetch_max_id, block_size=100, retry_interval=5.0, max_retry_interval=20.0, clock=clock)
+    for step in range(60):
+        assert offline.allocate() == 111 + step
+        clock.now += 1.0
+    assert calls == [0.0, 5.0, 15.0, 35.0, 55.0]
+    offline.close()
+def test_server_request_made_without_holding_lock(tmp_path):
+    held = []
+    allocator = SensorIdAllocator(str(tmp_path / "ids.db"), lambda: held.append(allocator.lock.locked()) or 0)
+    assert allocator.allocate() == 1
+    assert held == [False]
+    allocator.close()
+def test_save_to_server_makes_no_network_requests(tmp_path):
+    calls = []
+    ingest = SensorIngest(None, None, str(tmp_path / "sensors.db"), log=lambda message: None)
+    ingest.id_allocator.fetch_max_id = lambda: calls.append(1)
+    ingest.outbox.open()
+    try:
+        assert ingest.save_to_server()
+        assert calls == []
+        assert 'id' not in ingest.outbox.next_batch()[0][2]
+    finally:
+        ingest.outbox.stop()
+def test_conflict_forces_resync(tmp_path):
+    server_max = [0]
+    allocator = SensorIdAllocator(str(tmp_path / "ids.db"), lambda: server_max[0], block_size=100)
+    assert allocator.allocate() == 1
+    server_max[0] = 7
+    allocator.conflict(1)
+    assert allocator.allocate() == 8
+    assert allocator.conflicts == 1
+    allocator.close()
+def test_two_clients_never_share_an_id(tmp_path, server, client):
+    clients = [SensorIngest(None, client, str(tmp_path / f"client{index}.db"), log=lambda message: None) for index in range(2)]
+    for ingest in clients:
+        ingest.outbox.open()
+    try:
+        for round_number in range(20):
+            for ingest in clients:
+                data = payload(20.0 + round_number % 5)
+                key = ingest.outbox.enqueue(data)
+                assert ingest.post_sensor_data(data, key) == OUTBOX_SENT
+    finally:
+        for ingest in clients:
+            ingest.outbox.stop()
+            ingest.id_allocator.close()
+    ids = [record['id'] for record in server.state.sensor_records]
+    assert len(ids) == 40
+    assert len(set(ids)) == 40
+    assert server.state.id_conflicts > 0
+def test_conflict_detected_in_success_false_message(tmp_path, client):
+    ingest = SensorIngest(None, client, str(tmp_path / "ids.db"), log=lambda message: None)
+    class Response:
+        status_code = 200
+        def __init__(self, data):
+            self.data = data
+        def json(self):
+            return self.data
+    assert ingest.is_id_conflict(Response({'success': False, 'message': "Duplicate entry '5' for key 'PRIMARY'"}))
+    assert not ingest.is_id_conflict(Response({'success': False, 'message': "Неверные данные"}))
+    assert not ingest.is_id_conflict(Response({'success': True}))
+def test_lost_response_is_not_inserted_twice_without_key_dedupe(tmp_path, server, client):
+    server.state.dedupe_by_key = False
+    server.state.drop_responses = 1
+    ingest = SensorIngest(None, client, str(tmp_path / "ids.db"), log=lambda message: None)
+    ingest.outbox.open()
+    try:
+        key = ingest.outbox.enqueue(payload())
+        assert ingest.post_sensor_data(ingest.outbox.next_batch()[0][2], key) != OUTBOX_SENT
+        assert ingest.post_sensor_data(ingest.outbox.next_batch()[0][2], key) == OUTBOX_SENT
+    finally:
+        ingest.outbox.stop()
+        ingest.id_allocator.close()
+    assert len(server.state.sensor_records) == 1
+    assert server.state.id_conflicts == 1
+    assert ingest.id_allocator.conflicts == 0
+def test_closed_allocator_refuses_ids_until_reopened(tmp_path):
+    allocator = SensorIdAllocator(str(tmp_path / "ids.db"), lambda: 0, block_size=100)
+    assert allocator.allocate() == 1
+    allocator.close()
+    assert allocator.allocate() is None
+    allocator.conflict(1)
+    assert allocator.connection is None and allocator.conflicts == 0
+    allocator.open()
+    assert allocator.allocate() == 101
+    allocator.close()
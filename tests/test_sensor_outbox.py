@@ -0,0 +1,107 @@
+import time
+import threading
+import serial
+from serial_io import SerialPortActor
+from sensor_store import SensorOutbox, OUTBOX_SENT
+from sensor_ingest import SensorIngest
+from network_engine import NetworkEngine
+from conftest import wait_for
+def start_ingest(actor, client, path, messages):
+    """Прием показаний с быстрыми повторами очереди и сверки ID: каждое показание сразу ставится в очередь отправки"""
+    ingest = SensorIngest(actor, client, path, interval=0, log=messages.append)
+    ingest.outbox.retry_interval = 0.05
+    ingest.outbox.max_retry_interval = 0.2
+    ingest.id_allocator.retry_interval = 0.05
+    ingest.id_allocator.max_retry_interval = 0.2
+    ingest.start()
+    assert wait_for(lambda: ingest.outbox.running, 5)
+    return ingest
+def feed(actor, ingest, temperatures):
+    """Пишет строки скетча в петлю порта и ждет, пока каждое показание окажется в очереди отправки"""
+    for temperature in temperatures:
+        queued = ingest.outbox.pending_count()
+        actor.write(f"Temperature: {temperature:.1f} C, Humidity: 55.0 %, Soil moisture: 40 %, Light level: 300 lx\n".encode())
+        assert wait_for(lambda: ingest.outbox.pending_count() > queued, 5), f"Показание {temperature} не попало в очередь"
+def test_outage_restart_and_recovery_deliver_every_row_once(tmp_path, server, client):
+    path = str(tmp_path / "sensors.db")
+    actor = SerialPortActor(serial.serial_for_url("loop://", timeout=0.1), log=lambda message: None)
+    actor.start()
+    messages = []
+    temperatures = [20.0 + index / 10 for index in range(12)]
+    try:
+        server.set_failing(503)
+        ingest = start_ingest(actor, client, path, messages)
+        feed(actor, ingest, temperatures[:8])
+        time.sleep(0.5)
+        assert not server.state.sensor_records
+        ingest.stop()
+        ingest = start_ingest(actor, client, path, messages)
+        assert ingest.outbox.pending_count() == 8
+        feed(actor, ingest, temperatures[8:])
+        server.state.drop_responses = 3
+        server.recover()
+        assert wait_for(lambda: ingest.outbox.pending_count() == 0, 30), messages
+        ingest.stop()
+    finally:
+        actor.close()
+    records = server.state.sensor_records
+    assert sorted(float(record['temperature']) for record in records) == temperatures
+    assert len(server.state.idempotency_keys) == len(temperatures)
+    assert len({record['id'] for record in records}) == len(temperatures)
+    assert server.state.duplicates == 3
+    assert any("Сервер недоступен" in message for message in messages)
+    assert any("очередь выгрузки отправлена" in message for message in messages)
+def test_replay_assigns_ids_and_delivers_in_enqueue_order(tmp_path, server, client):
+    ingest = SensorIngest(None, client, str(tmp_path / "sensors.db"), log=lambda message: None)
+    ingest.outbox.open()
+    temperatures = [20.0 + index for index in range(10)]
+    try:
+        for temperature in temperatures:
+            ingest.outbox.enqueue({'user_id': 1, 'temperature': temperature, 'humidity': 55.0, 'soil_moisture': 40.0, 'light_level': 300.0,
+                                   'co2': 400, 'pressure': 1013.25, 'lamp_state': 0, 'curtains_state': 0})
+        server.state.drop_responses = 1
+        assert ingest.outbox.replay_once() == (0, True)
+        assert [float(record['temperature']) for record in server.state.sensor_records] == temperatures[:1]
+        assert ingest.outbox.replay_once() == (10, False)
+    finally:
+        ingest.outbox.stop()
+        ingest.id_allocator.close()
+    records = server.state.sensor_records
+    assert [float(record['temperature']) for record in records] == temperatures
+    ids = [int(record['id']) for record in records]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+def test_stop_waits_for_send_running_in_engine_pool(tmp_path):
+    started, release = threading.Event(), threading.Event()
+    sent = []
+    def send(payload, key):
+        sent.append(key)
+        started.set()
+        release.wait(5)
+        return OUTBOX_SENT
+    outbox = SensorOutbox(str(tmp_path / "sensors.db"), send, log=lambda message: None)
+    engine = NetworkEngine(log=lambda message: None)
+    engine.start()
+    try:
+        outbox.open()
+        for temperature in (20.0, 21.0):
+            outbox.enqueue({'temperature': temperature})
+        engine.spawn("sensor_outbox", outbox.run_async, engine.call)
+        assert started.wait(5)
+        engine.cancel("sensor_outbox")
+        stopper = threading.Thread(target=outbox.stop)
+        stopper.start()
+        time.sleep(0.2)
+        assert stopper.is_alive() and outbox.connection is not None
+        release.set()
+        stopper.join(5)
+        assert not stopper.is_alive()
+    finally:
+        release.set()
+        engine.stop()
+    assert len(sent) == 1
+    assert outbox.connection is None
+    outbox.update_payload(sent[0], {'temperature': 20.0, 'id': 1})
+    assert outbox.record_results([(1, sent[0], {})], [(OUTBOX_SENT, None)]) == (0, True)
+    outbox.open()
+    assert outbox.pending_count() == 2
+    outbox.stop()
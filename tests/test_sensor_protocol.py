@@ -0,0 +1,72 @@
+import re
+import random
+import pytest
+from sensor_protocol import SensorLineParser, SensorReading, ReadingAggregator
+RECORDED_LINES = [
+    "Initializing BH1750 sensor...",
+    "BH1750 sensor initialized successfully!",
+    "Dry soil value: 1000",
+    "Soil moisture: 47%",
+    "Humidity: 41.30% Temperature: 23.80°C",
+    "Light level: 312.50 lx",
+    "Lamp: OFF",
+    "LED state changed to: ON",
+    "Failed to read from DHT sensor!",
+    "Light level: 0.00 lx",
+    "Temperature: 20.0 C, Humidity: 55.0 %, Soil moisture: 40 %, Light level: 300 lx",
+    "temp: 19.5 humidity : 60 CO2: 415 Pressure: 1009.8",
+    "Temp:21 co2:400 pressure :1013.25",
+    "Soil  moisture :  12",
+]
+def legacy_parse(line):
+    """Прежний разбор SensorMonitoringThread.update_sensor_values: шесть re.search на каждую строку"""
+    state = {}
+    for name, pattern in (("temperature", r'[Tt]emp(?:erature)?\s*:\s*(\d+\.?\d*)'), ("humidity", r'[Hh]umidity\s*:\s*(\d+\.?\d*)'),
+                          ("soil_moisture", r'[Ss]oil\s*moisture\s*:\s*(\d+\.?\d*)'), ("light_level", r'[Ll]ight\s*level\s*:\s*(\d+\.?\d*)'),
+                          ("co2", r'[Cc][Oo]2\s*:\s*(\d+\.?\d*)'), ("pressure", r'[Pp]ressure\s*:\s*(\d+\.?\d*)')):
+        match = re.search(pattern, line)
+        if match:
+            state[name] = float(match.group(1))
+    return state
+@pytest.mark.parametrize("line", RECORDED_LINES)
+def test_parser_matches_legacy_parse(line):
+    reading = SensorLineParser().parse(line, timestamp=1.0)
+    parsed = {} if reading is None else {name: value for name, value in reading._asdict().items() if value is not None and name != "timestamp"}
+    assert parsed == legacy_parse(line)
+def test_line_without_readings_returns_none():
+    assert SensorLineParser().parse("Curtains: OPEN") is None
+def make_readings(count, seed=429):
+    """Показания каждые 2 с с трендом и шумом; часть строк без влажности почвы"""
+    rng = random.Random(seed)
+    return [SensorReading(temperature=22.0 + 3.0 * index / count + rng.gauss(0, 0.2), humidity=50.0 + rng.gauss(0, 2.0),
+                          soil_moisture=float(rng.randint(40, 45)) if index % 3 else None, light_level=300.0 + rng.gauss(0, 30.0),
+                          timestamp=1700000000.0 + index * 2) for index in range(count)]
+def test_summary_matches_exact_statistics():
+    readings = make_readings(1800)
+    aggregator = ReadingAggregator()
+    for reading in readings:
+        aggregator.add(reading)
+    summary = aggregator.summary()
+    assert set(summary) == {"temperature", "humidity", "soil_moisture", "light_level"}
+    for name, stats in summary.items():
+        values = [getattr(reading, name) for reading in readings if getattr(reading, name) is not None]
+        assert stats['count'] == len(values)
+        assert stats['min'] == min(values)
+        assert stats['max'] == max(values)
+        assert stats['mean'] == pytest.approx(sum(values) / len(values), abs=1e-9)
+        assert stats['last'] == values[-1]
+    assert aggregator.samples == len(readings)
+def test_summary_fields_and_points():
+    readings = make_readings(4)
+    aggregator = ReadingAggregator(fields=("temperature", "soil_moisture"), keep_points=True)
+    for reading in readings:
+        aggregator.add(reading)
+    aggregator.add(SensorReading(humidity=50.0, timestamp=1800000000.0))
+    fields = aggregator.summary_fields()
+    assert fields['samples'] == 4
+    assert (fields['period_start'], fields['period_end']) == (1700000000.0, 1700000006.0)
+    assert fields['soil_moisture_count'] == 2
+    assert fields['temperature_mean'] == round(sum(reading.temperature for reading in readings) / 4, 2)
+    assert aggregator.point_rows()[1] == [1700000002.0, readings[1].temperature, readings[1].soil_moisture]
+    aggregator.reset()
+    assert aggregator.summary() == {} and aggregator.point_rows() == []
@@ -0,0 +1,85 @@
+import csv
+import time
+import pytest
+from sensor_protocol import SensorReading, SENSOR_FIELD_NAMES
+from sensor_store import SensorStore, READING_COLUMNS
+from conftest import wait_for
+BASE = 1700000000.0
+def reading(index, **values):
+    return SensorReading(**dict(dict(temperature=20.0 + index, humidity=50.0, soil_moisture=40.0, light_level=float(index)), **values),
+                         timestamp=BASE + index * 60)
+@pytest.fixture
+def store(tmp_path):
+    store = SensorStore(str(tmp_path / "sensors.db"), batch_size=10, flush_interval=0.5, log=lambda message: None)
+    store.open()
+    yield store
+    store.close()
+def test_full_batch_written_at_once_partial_batch_after_interval(store):
+    for index in range(10):
+        store.add(reading(index))
+    assert wait_for(lambda: store.rows_written == 10, 5)
+    for index in range(10, 15):
+        store.add(reading(index))
+    time.sleep(0.1)
+    assert len(store.query()) == 10
+    store.flush()
+    assert store.rows_written == 15
+    assert len(store.query()) == 15
+def test_rows_keep_fields_and_device_states(store):
+    store.add(reading(1, co2=None), lamp_state=1, curtains_state=0)
+    store.flush()
+    row = dict(zip(READING_COLUMNS, store.query()[0]))
+    assert row['ts'] == BASE + 60
+    assert row['temperature'] == 21.0
+    assert row['co2'] is None
+    assert (row['lamp_state'], row['curtains_state']) == (1, 0)
+def test_query_range_is_half_open(store):
+    for index in range(10):
+        store.add(reading(index))
+    store.flush()
+    rows = store.query(BASE + 2 * 60, BASE + 5 * 60)
+    assert [row[0] for row in rows] == [BASE + index * 60 for index in (2, 3, 4)]
+    assert len(store.query(BASE + 2 * 60, limit=3)) == 3
+    assert store.query(BASE + 10 * 60) == []
+def test_query_buckets_averages(store):
+    for index in range(6):
+        store.add(reading(index))
+    store.flush()
+    expected = {}
+    for index in range(6):
+        expected.setdefault(int((BASE + index * 60) / 180) * 180, []).append(20.0 + index)
+    buckets = store.query_buckets(BASE, BASE + 6 * 60, 180)
+    temperature = 2 + SENSOR_FIELD_NAMES.index("temperature")
+    assert [(bucket[0], bucket[1], bucket[temperature]) for bucket in buckets] == [
+        (start, len(values), sum(values) / len(values)) for start, values in sorted(expected.items())]
+    assert len(buckets) > 1
+def test_export_csv(store, tmp_path):
+    for index in range(4):
+        store.add(reading(index))
+    store.flush()
+    filename = tmp_path / "export.csv"
+    assert store.export_csv(str(filename), BASE + 60) == 3
+    with open(filename, encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["time"] + list(READING_COLUMNS[1:])
+    assert rows[1][0] == time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(BASE + 60))
+    assert float(rows[1][READING_COLUMNS.index("temperature")]) == 21.0
+    assert len(rows) == 4
+def test_close_writes_pending_rows_and_reopen_reads_them(tmp_path):
+    path = str(tmp_path / "sensors.db")
+    store = SensorStore(path, batch_size=100, flush_interval=30, log=lambda message: None)
+    store.flush()
+    store.open()
+    for index in range(5):
+        store.add(reading(index))
+    store.close()
+    assert store.rows_written == 5
+    store.add(reading(5))
+    store.flush()
+    store.close()
+    reopened = SensorStore(path, log=lambda message: None)
+    reopened.open()
+    try:
+        assert len(reopened.query()) == 5
+    finally:
+        reopened.close()
@@ -0,0 +1,93 @@
+import os
+import time
+import pytest
+import serial
+from sensor_protocol import SensorReading, FRAME_DELIMITER, FRAME_SENSOR, FRAME_ACK, encode_frame, encode_sensor_body, encode_ack_body
+from serial_io import SerialPortActor, LINE_ACK
+from arduino_sim import SimulatedArduino
+@pytest.fixture
+def actor():
+    actor = SerialPortActor(serial.serial_for_url("loop://", timeout=0.05), log=lambda message: None, command_timeout=0.3)
+    actor.start()
+    yield actor
+    actor.close()
+def sensor_frame(seq, temperature=23.5):
+    return encode_frame(FRAME_SENSOR, seq, encode_sensor_body(SensorReading(temperature=temperature, humidity=41.0, soil_moisture=47.0, light_level=312.5)))
+def next_reading(actor, timeout=2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        item = actor.get(timeout=0.1)
+        if isinstance(item, SensorReading):
+            return item
+    return None
+def switch_to_binary(actor, baud_rate=115200):
+    """Согласование на петле: эхо команды MODE не считается ответом, подтверждение пишем сами"""
+    future = actor.negotiate_binary(baud_rate, timeout=2)
+    actor.write(f"MODE:BIN:{baud_rate} OK\n".encode())
+    assert future.result(timeout=3) == f"MODE:BIN:{baud_rate} OK"
+    assert actor.binary_mode and actor.serial_connection.baudrate == baud_rate
+def test_command_resolved_by_ack_line(actor):
+    acks = []
+    actor.subscribe(LINE_ACK, acks.append)
+    future = actor.send_command("LED", 1)
+    actor.write(b"LED state changed to: ON\n")
+    assert future.result(timeout=2) == "LED state changed to: ON"
+    assert acks == ["LED state changed to: ON"]
+    assert not actor.pending_commands
+def test_ack_for_other_state_does_not_resolve(actor):
+    future = actor.send_command("CURTAINS", 1)
+    actor.write(b"Curtains state changed to: OPEN\n")
+    assert future.result(timeout=2) is None
+def test_command_times_out_without_ack(actor):
+    start = time.monotonic()
+    future = actor.send_command("CURTAINS", 0)
+    assert future.result(timeout=3) is None
+    assert 0.25 <= time.monotonic() - start < 2
+    assert not actor.pending_commands
+def test_close_resolves_pending_commands():
+    actor = SerialPortActor(serial.serial_for_url("loop://", timeout=0.05), log=lambda message: None, command_timeout=30)
+    actor.start()
+    future = actor.send_command("LED", 0)
+    actor.close()
+    assert future.result(timeout=1) is None
+def test_text_sensor_lines_are_queued(actor):
+    actor.write(b"Light level: 312.50 lx\r\n")
+    assert actor.get(timeout=2) == "Light level: 312.50 lx"
+def test_binary_frames_decoded_with_crc_and_sequence_checks(actor):
+    switch_to_binary(actor)
+    actor.write(sensor_frame(1))
+    reading = next_reading(actor)
+    assert reading is not None and reading.temperature == pytest.approx(23.5) and reading.light_level == pytest.approx(312.5)
+    corrupted = bytearray(sensor_frame(2))
+    corrupted[3] ^= 0xFF
+    actor.write(bytes(corrupted))
+    actor.write(sensor_frame(5, temperature=24.0))
+    reading = next_reading(actor)
+    assert reading is not None and reading.temperature == pytest.approx(24.0)
+    stats = actor.stats()
+    assert stats['frames'] == 2 and stats['frame_errors'] == 1 and stats['frames_lost'] == 3
+def test_binary_ack_frame_resolves_command(actor):
+    """Эхо команды в петле становится отдельным испорченным кадром, подтверждение приходит следующим кадром"""
+    switch_to_binary(actor)
+    future = actor.send_command("LED", 1)
+    actor.write(FRAME_DELIMITER + encode_frame(FRAME_ACK, 1, encode_ack_body("LED", 1)))
+    assert future.result(timeout=2) == "LED state changed to: ON"
+@pytest.mark.skipif(not hasattr(os, "openpty"), reason="нужен pty")
+def test_binary_loopback_with_simulated_arduino():
+    simulator, port_name = SimulatedArduino.open_pty(interval=0.01)
+    port = serial.Serial(port_name, 9600, timeout=0.2)
+    actor = SerialPortActor(port, log=lambda message: None)
+    actor.start()
+    simulator.start()
+    try:
+        assert actor.enable_binary(115200, log=lambda message: None)
+        assert port.baudrate == 115200
+        assert actor.send_command("LED", 1).result(timeout=3) == "LED state changed to: ON"
+        assert simulator.led_state == 1
+        readings = [next_reading(actor) for _ in range(20)]
+        assert all(reading is not None and reading.temperature is not None for reading in readings)
+        stats = actor.stats()
+        assert stats['frame_errors'] == 0 and stats['frames_lost'] == 0
+    finally:
+        actor.close()
+        simulator.stop()